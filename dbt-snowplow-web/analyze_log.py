@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Summarize a dbt run log in a single streaming pass.
+
+The log is read in large binary chunks and only the lines around a match are
+decoded, so multi-GB debug logs are scanned at close to disk speed with bounded
+memory. Error messages are counted with the Space-Saving top-K algorithm, which
+keeps a fixed number of counters no matter how many distinct messages occur.
+The result is written as JSON for generate_dbt_test_assets.py, and as the
+top_errors.txt report statistics.sh used to produce.
+"""
+
+import os
+import re
+import sys
+import json
+import heapq
+import argparse
+
+ERROR_MARKER = b'000200: '
+SUMMARY_MARKER = b'Done. PASS='
+FUNCTION_MARKER = b'Invalid function'
+SUMMARY_KEYS = ['PASS', 'WARN', 'ERROR', 'SKIP', 'TOTAL']
+CHUNK_BYTES = 16 << 20
+
+# `grep '^[[:space:]][[:space:]]000200:'`, matched over a whole chunk at once. A literal
+# newline prefix is much faster than re.M, so the first line of a chunk is matched separately
+ERROR_LINE = re.compile(rb'[ \t\r\f\v]{2}' + re.escape(ERROR_MARKER) + rb'([^\n]*)')
+NEXT_ERROR_LINE = re.compile(rb'\n' + ERROR_LINE.pattern)
+
+class TopK:
+    """
+    Space-Saving heavy hitters over a stream of keys with a fixed number of counters.
+
+    Every key whose true count exceeds total / capacity is guaranteed to be kept;
+    a count is overestimated by at most the error recorded with it.
+    """
+
+    def __init__(self, capacity=1000):
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        self.total = 0
+        self._heap = []
+
+    def add(self, key):
+        self.total += 1
+        counts = self.counts
+        if key in counts:
+            counts[key] += 1
+            heapq.heappush(self._heap, (counts[key], key))
+        elif len(counts) < self.capacity:
+            counts[key] = 1
+            self.errors[key] = 0
+            heapq.heappush(self._heap, (1, key))
+        else:
+            # Replace the key with the smallest count; stale heap entries are skipped
+            while True:
+                count, evicted = heapq.heappop(self._heap)
+                if counts.get(evicted) == count:
+                    break
+            del counts[evicted]
+            del self.errors[evicted]
+            counts[key] = count + 1
+            self.errors[key] = count
+            heapq.heappush(self._heap, (count + 1, key))
+
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(count, key) for key, count in counts.items()]
+            heapq.heapify(self._heap)
+
+    def most_common(self, n):
+        """
+        The n keys with the highest counts as (key, count, error) tuples.
+
+        Equal counts are ordered by descending key, as `sort | uniq -c | sort -nr`
+        orders them under LC_ALL=C: -r also reverses sort's whole-line tie-break.
+        """
+        top = sorted(self.counts.items(), key=lambda item: (item[1], item[0]), reverse=True)[:n]
+        return [(key, count, self.errors[key]) for key, count in top]
+
+def parse_summary(line):
+    """Parse the PASS/WARN/ERROR/SKIP/TOTAL counts of dbt's final `Done.` line."""
+    values = dict(re.findall(r'\b(PASS|WARN|ERROR|SKIP|TOTAL)=(\d+)', line))
+    return {key: int(values[key]) for key in SUMMARY_KEYS if key in values}
+
+def analyze_log(log_file, capacity=1000, chunk_bytes=CHUNK_BYTES):
+    """
+    Scan a dbt run log once.
+
+    Error lines are the ones that start with two whitespace characters followed
+    by `000200: `; the message is the text after the marker, like
+    `awk -F'000200: '` in the former statistics.sh.
+
+    Args:
+        log_file (str): Path to the dbt log, e.g. assets/run.log
+        capacity (int): Counters kept per top-K table
+        chunk_bytes (int): Bytes read at a time
+
+    Returns:
+        dict: summary line, line and byte counts, and the error and function error counters
+    """
+    errors = TopK(capacity)
+    function_errors = TopK(capacity)
+    summary_line = None
+    lines = 0
+    size = 0
+
+    with open(log_file, 'rb') as f:
+        rest = b''
+        while True:
+            chunk = f.read(chunk_bytes)
+            if chunk:
+                # Only whole lines are scanned, the partial last line waits for the next chunk
+                end = chunk.rfind(b'\n')
+                if end < 0:
+                    rest += chunk
+                    continue
+                buffer, rest = rest + chunk[:end + 1], chunk[end + 1:]
+            else:
+                buffer, rest = rest, b''
+                if buffer and not buffer.endswith(b'\n'):
+                    lines += 1
+            size += len(buffer)
+            lines += buffer.count(b'\n')
+
+            position = buffer.rfind(SUMMARY_MARKER)
+            if position >= 0:
+                start = buffer.rfind(b'\n', 0, position) + 1
+                stop = buffer.find(b'\n', position)
+                summary_line = buffer[start:stop if stop >= 0 else len(buffer)]
+
+            first = ERROR_LINE.match(buffer)
+            for match in ([first] if first else []) + list(NEXT_ERROR_LINE.finditer(buffer)):
+                message = match.group(1).split(ERROR_MARKER, 1)[0].rstrip(b'\r')
+                errors.add(message)
+                if FUNCTION_MARKER in message:
+                    function_errors.add(message)
+            if not chunk:
+                break
+
+    return {
+        'summary': parse_summary(summary_line.decode('utf-8', 'replace')) if summary_line else None,
+        'lines': lines,
+        'bytes': size,
+        'errors': errors,
+        'function_errors': function_errors,
+    }
+
+def _entries(counter, n):
+    return [{'message': key.decode('utf-8', 'replace'), 'count': count, 'max_overcount': error}
+            for key, count, error in counter.most_common(n)]
+
+def build_report(result, top_errors=10, top_functions=15):
+    """Turn an analyze_log result into the JSON report."""
+    return {
+        'summary': result['summary'],
+        'lines': result['lines'],
+        'bytes': result['bytes'],
+        'error_lines': result['errors'].total,
+        'function_error_lines': result['function_errors'].total,
+        'top_errors': _entries(result['errors'], top_errors),
+        'top_function_errors': _entries(result['function_errors'], top_functions),
+    }
+
+def write_top_errors(report, file_path):
+    """Write the report in the top_errors.txt layout of the former statistics.sh."""
+    with open(file_path, 'w') as f:
+        if report['summary']:
+            f.write("# DBT Run Summary\n")
+            for key in SUMMARY_KEYS:
+                f.write(f"{key}: {report['summary'].get(key, '')}\n")
+            f.write("\n")
+        f.write("# Total top 10 errors\n")
+        for entry in report['top_errors']:
+            f.write(f"{entry['count']:>7} {entry['message']}\n")
+        f.write("\n# Top function errors\n")
+        for entry in report['top_function_errors']:
+            f.write(f"{entry['count']:>7} {entry['message']}\n")
+
+def main():
+    parser = argparse.ArgumentParser(description='Summarize a dbt run log in one streaming pass')
+    parser.add_argument('--log', default='dbt-snowplow-web/assets/run.log',
+                        help='dbt log to analyze (default: dbt-snowplow-web/assets/run.log)')
+    parser.add_argument('--output-dir', default='dbt-snowplow-web/assets',
+                        help='Directory for run_stats.json and top_errors.txt (default: dbt-snowplow-web/assets)')
+    parser.add_argument('--top-errors', type=int, default=10, help='Error messages to report (default: 10)')
+    parser.add_argument('--top-functions', type=int, default=15, help='Function errors to report (default: 15)')
+    parser.add_argument('--capacity', type=int, default=1000,
+                        help='Counters kept per top-K table, bounding memory (default: 1000)')
+    args = parser.parse_args()
+
+    try:
+        result = analyze_log(args.log, capacity=max(args.capacity, args.top_errors, args.top_functions))
+    except OSError as e:
+        print(f"Error reading {args.log}: {e}")
+        return 1
+
+    report = build_report(result, args.top_errors, args.top_functions)
+    os.makedirs(args.output_dir, exist_ok=True)
+    stats_file = os.path.join(args.output_dir, 'run_stats.json')
+    with open(stats_file, 'w') as f:
+        json.dump(report, f, indent=2)
+    write_top_errors(report, os.path.join(args.output_dir, 'top_errors.txt'))
+
+    if report['summary'] is None:
+        print(f"⚠ No 'Done. PASS=' summary found in {args.log}")
+    print(f"✓ Scanned {report['lines']:,} lines ({report['bytes'] / 1e6:.1f} MB), "
+          f"{report['error_lines']:,} error lines; saved {stats_file}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
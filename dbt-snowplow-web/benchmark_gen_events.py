@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Benchmark the event generator engines in gen_events.py and report rows per second.
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import gen_events
+
+def time_engine(engine, num_events, output_file, executor=None, workers=1):
+    """
+    Generate and write num_events rows with one engine through the shard pipeline.
+
+    Args:
+        engine (str): 'python' or 'numpy'
+        num_events (int): Number of rows to generate
+        output_file (str): CSV file to write the rows to
+        executor (ProcessPoolExecutor): Pool to run shards on, in-process when None
+        workers (int): Size of the pool, used to bound the shards in flight
+
+    Returns:
+        float: Wall-clock seconds for generation plus CSV writing
+    """
+    tasks = gen_events.shard_tasks(engine, datetime.now().date(), num_events, seed=0)
+
+    start = time.perf_counter()
+    with gen_events.open_event_csv(output_file) as csvfile:
+        gen_events.write_shards(gen_events.iter_shards(tasks, executor, window=2 * workers), csvfile)
+    return time.perf_counter() - start
+
+def run_benchmark(row_counts, engines, worker_counts=(1,), repeat=3):
+    """
+    Time every engine and worker count at every row count, keeping the best of `repeat` runs.
+
+    Returns:
+        list: One dict per (engine, workers, rows) with seconds and rows_per_sec
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output_file = os.path.join(tmp_dir, 'events.csv')
+        for workers in worker_counts:
+            executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+            try:
+                for num_events in row_counts:
+                    for engine in engines:
+                        seconds = min(time_engine(engine, num_events, output_file, executor, workers) for _ in range(repeat))
+                        results.append({
+                            'engine': engine,
+                            'workers': workers,
+                            'rows': num_events,
+                            'seconds': seconds,
+                            'rows_per_sec': num_events / seconds if seconds > 0 else 0.0,
+                        })
+            finally:
+                if executor is not None:
+                    executor.shutdown()
+    return results
+
+def print_results(results):
+    """Print a rows/sec table with the speedup over the single-worker python engine."""
+    baseline = {r['rows']: r['rows_per_sec'] for r in results if r['engine'] == 'python' and r['workers'] == 1}
+
+    print(f"\n{'engine':<8} {'workers':>7} {'rows':>12} {'seconds':>10} {'rows/sec':>14} {'speedup':>9}")
+    for r in results:
+        speedup = r['rows_per_sec'] / baseline[r['rows']] if baseline.get(r['rows']) else float('nan')
+        print(f"{r['engine']:<8} {r['workers']:>7} {r['rows']:>12,} {r['seconds']:>10.3f} "
+              f"{r['rows_per_sec']:>14,.0f} {speedup:>8.1f}x")
+
+def measure_peak_memory(engine, num_events, workers=1):
+    """
+    Run gen_events.py in a fresh interpreter and return its peak resident memory.
+
+    Returns:
+        float: Peak RSS in MiB of the generator process and its worker processes
+    """
+    script = (
+        "import resource, runpy, sys\n"
+        "sys.argv = sys.argv[1:]\n"
+        "runpy.run_path(sys.argv[0], run_name='__main__')\n"
+        "peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,\n"
+        "           resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)\n"
+        "print(f'PEAK_RSS_KB={peak}')\n"
+    )
+    gen_events_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gen_events.py')
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        result = subprocess.run(
+            [sys.executable, '-c', script, gen_events_path, str(num_events),
+             '--engine', engine, '--workers', str(workers), '--seed', '0'],
+            cwd=tmp_dir, capture_output=True, text=True, check=True
+        )
+    peak_kb = int(result.stdout.rsplit('PEAK_RSS_KB=', 1)[1])
+    return peak_kb / 1024
+
+def run_memory_benchmark(row_counts, engines, worker_counts=(1,)):
+    """Print the peak memory of a full gen_events.py run for every row count."""
+    print(f"\n{'engine':<8} {'workers':>7} {'rows/day':>12} {'peak RSS MiB':>13}")
+    for workers in worker_counts:
+        for engine in engines:
+            for num_events in row_counts:
+                peak_mib = measure_peak_memory(engine, num_events, workers)
+                print(f"{engine:<8} {workers:>7} {num_events:>12,} {peak_mib:>13.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark gen_events.py engines')
+    parser.add_argument('--rows', default='10000,100000', help='Comma-separated row counts (default: 10000,100000)')
+    parser.add_argument('--engines', default='python,numpy', help='Comma-separated engines (default: python,numpy)')
+    parser.add_argument('--workers', default='1', help='Comma-separated worker process counts (default: 1)')
+    parser.add_argument('--memory', action='store_true',
+                        help='Measure peak memory of full gen_events.py runs instead of rows/sec')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement, best is kept (default: 3)')
+    args = parser.parse_args()
+
+    row_counts = [int(r) for r in args.rows.split(',')]
+    engines = args.engines.split(',')
+    worker_counts = [int(w) for w in args.workers.split(',')]
+
+    if args.memory:
+        run_memory_benchmark(row_counts, engines, worker_counts)
+    else:
+        print_results(run_benchmark(row_counts, engines, worker_counts, repeat=args.repeat))
+
+if __name__ == '__main__':
+    main()
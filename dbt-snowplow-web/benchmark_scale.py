@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Sweep the dbt-snowplow-web pipeline over row counts and chart how every stage scales.
+
+For every row count the full and the incremental run are executed through
+pipeline.py, recording generation, load and dbt run wall time. The results are
+saved as JSON and drawn as log-log charts per stage, where linear scaling is a
+straight line of slope 1 and super-linear blowups bend upwards.
+"""
+
+import os
+import sys
+import json
+import math
+import argparse
+import subprocess
+
+import pipeline
+from generate_dbt_test_assets import line_chart_svg, write_chart
+
+SCALE_STAGES = ['generate', 'load', 'run']
+PHASES = ['full', 'incremental']
+
+def run_point(rows, pipeline_args):
+    """
+    Run the full and incremental pipeline once for one row count.
+
+    Stages skipped as up to date did no work, so they are left out of the
+    seconds and listed under 'cached' instead.
+
+    Returns:
+        list: One record per phase with the wall-clock seconds of every stage
+    """
+    args = pipeline.parse_args(['--rows', str(rows), '--incremental', *pipeline_args])
+    runner = pipeline.Pipeline(args)
+    runner.run_all()
+    runner.print_timings()
+
+    records = []
+    for phase in PHASES:
+        record = {'rows': rows, 'phase': phase, 'cached': []}
+        for stage in SCALE_STAGES:
+            if stage == 'generate':
+                # Both days are generated up front, so generation belongs to the full run
+                timings = [t for t in runner.timings if t['stage'] == stage] if phase == 'full' else []
+            else:
+                timings = [t for t in runner.timings if t['stage'] == stage and t['phase'] == phase]
+            seconds = [t['seconds'] for t in timings if not t['cached']]
+            record[stage] = sum(seconds) if seconds else None
+            if any(t['cached'] for t in timings):
+                record['cached'].append(stage)
+        records.append(record)
+    return records
+
+def scaling_exponents(results, stage, phase):
+    """
+    Local scaling exponents between consecutive row counts.
+
+    An exponent of 1 is linear scaling, 2 quadratic; fixed overhead shows up as
+    exponents well below 1 at small row counts.
+
+    Returns:
+        dict: rows -> exponent from the previous row count to this one
+    """
+    points = sorted((r['rows'], r[stage]) for r in results if r['phase'] == phase and r.get(stage))
+    exponents = {}
+    for (rows_a, seconds_a), (rows_b, seconds_b) in zip(points, points[1:]):
+        if rows_b > rows_a and seconds_a > 0 and seconds_b > 0:
+            exponents[rows_b] = math.log(seconds_b / seconds_a) / math.log(rows_b / rows_a)
+    return exponents
+
+def print_results(results, threshold=1.2):
+    """Print seconds and scaling exponents per stage, flagging super-linear steps."""
+    exponents = {(stage, phase): scaling_exponents(results, stage, phase) for stage in SCALE_STAGES for phase in PHASES}
+
+    print(f"\n{'phase':<12} {'rows':>12} " + ' '.join(f"{stage + ' s':>12} {'exp':>6}" for stage in SCALE_STAGES))
+    flagged = []
+    for record in sorted(results, key=lambda r: (PHASES.index(r['phase']), r['rows'])):
+        cells = []
+        for stage in SCALE_STAGES:
+            seconds = record.get(stage)
+            exponent = exponents[(stage, record['phase'])].get(record['rows'])
+            if seconds is not None:
+                cells.append(f"{seconds:>12.2f}")
+            else:
+                cells.append(f"{'cached' if stage in record.get('cached', ()) else '-':>12}")
+            cells.append(f"{exponent:>6.2f}" if exponent is not None else f"{'-':>6}")
+            if exponent is not None and exponent > threshold:
+                flagged.append((record['phase'], stage, record['rows'], exponent))
+        print(f"{record['phase']:<12} {record['rows']:>12,} " + ' '.join(cells))
+
+    for phase, stage, rows, exponent in flagged:
+        print(f"⚠ {phase} {stage} scales super-linearly up to {rows:,} rows (exponent {exponent:.2f})")
+
+def generate_scaling_charts(results, output_dir, png=False):
+    """
+    Draw one log-log chart per stage with a line per phase and a linear reference.
+
+    The charts are written as plain SVG; pass png to also convert them to PNG.
+
+    Returns:
+        list: Paths of the saved charts
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    for stage in SCALE_STAGES:
+        series = {}
+        for phase in PHASES:
+            points = sorted((r['rows'], r[stage]) for r in results if r['phase'] == phase and r.get(stage))
+            if points:
+                series[phase] = points
+        if not series:
+            continue
+
+        # Linear scaling through the first measured point
+        reference = next(iter(series.values()))
+        (rows_0, seconds_0), rows_max = reference[0], reference[-1][0]
+        series['linear'] = [(rows_0, seconds_0), (rows_max, seconds_0 * rows_max / rows_0)]
+        svg = line_chart_svg(f"{stage} wall time vs rows", 'rows per day', 'seconds', series, log_x=True, log_y=True,
+                             styles={'linear': {'color': '#999999', 'dash': '3,3'}}, width=700)
+        paths.append(write_chart(svg, output_dir, f"scale_{stage}", png))
+    return paths
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Sweep pipeline.py over row counts and chart the scaling of every stage',
+        epilog='Any other arguments are passed on to pipeline.py, e.g. --engine numpy --format parquet.'
+    )
+    parser.add_argument('--rows', default='1000,10000,100000,1000000,10000000',
+                        help='Comma-separated rows per day (default: 1000,10000,100000,1000000,10000000)')
+    parser.add_argument('--output-dir', default='dbt-snowplow-web/assets', help='Directory for the charts and results')
+    parser.add_argument('--results-file', default=None,
+                        help='JSON file with the results (default: OUTPUT_DIR/scale_benchmark.json)')
+    parser.add_argument('--charts-only', action='store_true', help='Redraw the charts from an existing results file')
+    parser.add_argument('--reuse-data', action='store_true',
+                        help='Reuse cached generated files instead of timing generation at every point')
+    parser.add_argument('--png', action='store_true', help='Also write the charts as PNG (requires cairosvg)')
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help='Flag steps whose scaling exponent exceeds this (default: 1.2)')
+    args, pipeline_args = parser.parse_known_args()
+
+    results_file = args.results_file or os.path.join(args.output_dir, 'scale_benchmark.json')
+    if args.charts_only:
+        with open(results_file) as f:
+            results = json.load(f)
+    else:
+        if not args.reuse_data:
+            pipeline_args = ['--force', 'generate', '--no-cache', *pipeline_args]
+        results = []
+        os.makedirs(os.path.dirname(os.path.abspath(results_file)), exist_ok=True)
+        for rows in [int(r) for r in args.rows.split(',')]:
+            print(f"\n=== Scale point: {rows:,} rows per day ===")
+            try:
+                results.extend(run_point(rows, pipeline_args))
+            except (subprocess.CalledProcessError, RuntimeError) as e:
+                print(f"❌ Error at {rows:,} rows: {e}")
+                break
+            finally:
+                # Keep what was measured so far, a large point may not finish
+                with open(results_file, 'w') as f:
+                    json.dump(results, f, indent=2)
+        print(f"Results saved to {results_file}")
+
+    print_results(results, args.threshold)
+    try:
+        generate_scaling_charts(results, args.output_dir, png=args.png)
+    except Exception as e:
+        print(f"Error generating charts: {str(e)}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Content-addressed cache of generated event datasets.
+
+An entry is keyed by a hash of everything that determines the generated bytes:
+row count, seed, dates, workload profile, format, engine and the generator
+version. Entries are built in a temporary directory and published with one
+atomic rename, so a crashed or concurrent run never leaves a partial entry
+behind. A hit hardlinks the cached files into place instead of regenerating
+them. The least recently used entries are evicted once the cache grows past
+its size cap.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import argparse
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+CACHE_DIR = SCRIPT_DIR / '.dataset_cache'
+DEFAULT_MAX_GB = 20.0
+
+# The files whose content decides what the generator writes
+GENERATOR_FILES = [SCRIPT_DIR / 'gen_events.py', SCRIPT_DIR / 'event_schema.py']
+
+MANIFEST = 'manifest.json'
+
+# Temporary entries older than this are left over from a crashed run
+STALE_SECONDS = 24 * 3600
+
+def generator_version():
+    """SHA-256 of the generator sources, so any change to them misses the cache."""
+    digest = hashlib.sha256()
+    for path in GENERATOR_FILES:
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+def cache_key(params):
+    """
+    Hash the generation parameters together with the generator version.
+
+    Args:
+        params (dict): JSON-serializable parameters that determine the output
+
+    Returns:
+        str: Hex digest naming the cache entry
+    """
+    payload = json.dumps({'params': params, 'generator': generator_version()}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def link_path(source, target):
+    """Hardlink a file or every file of a directory tree, copying when links are not possible."""
+    source, target = Path(source), Path(target)
+    if source.is_dir():
+        for root, _, files in os.walk(source):
+            target_root = target / Path(root).relative_to(source)
+            target_root.mkdir(parents=True, exist_ok=True)
+            for name in files:
+                link_path(Path(root) / name, target_root / name)
+        return
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+def remove_path(path):
+    """Remove a file or a directory tree if it exists."""
+    path = Path(path)
+    if path.is_dir() and not path.is_symlink():
+        shutil.rmtree(path)
+    elif path.exists() or path.is_symlink():
+        path.unlink()
+
+def path_bytes(path):
+    """Size of a file or of every file below a directory."""
+    path = Path(path)
+    if not path.is_dir():
+        return path.stat().st_size
+    return sum(file.stat().st_size for file in path.rglob('*') if file.is_file())
+
+def restore(key, outputs, cache_dir=CACHE_DIR):
+    """
+    Hardlink a cached entry into place.
+
+    Existing outputs are unlinked first, never written through, so files that
+    share an inode with the cache are not modified.
+
+    Args:
+        key (str): Cache key
+        outputs (list): Output paths, the same ones the entry was published with
+        cache_dir (Path): Cache directory
+
+    Returns:
+        bool: True on a hit, False when the entry does not exist
+    """
+    entry = Path(cache_dir) / key
+    try:
+        with open(entry / MANIFEST) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return False
+    names = [Path(output).name for output in outputs]
+    if manifest.get('outputs') != names or not all((entry / 'files' / name).exists() for name in names):
+        return False
+
+    for output, name in zip(outputs, names):
+        remove_path(output)
+        link_path(entry / 'files' / name, output)
+    # The manifest's mtime is the entry's last use
+    os.utime(entry / MANIFEST)
+    return True
+
+def publish(key, outputs, params=None, cache_dir=CACHE_DIR):
+    """
+    Add freshly generated outputs to the cache under key.
+
+    The entry is linked together in a temporary directory and renamed into
+    place, so readers only ever see complete entries. When another run
+    published the same key first, its entry is kept.
+
+    Returns:
+        bool: True when this call published the entry
+    """
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    entry = cache_dir / key
+    if (entry / MANIFEST).exists():
+        return False
+
+    staging = cache_dir / f"tmp-{key}-{os.getpid()}"
+    remove_path(staging)
+    (staging / 'files').mkdir(parents=True)
+    try:
+        for output in outputs:
+            link_path(output, staging / 'files' / Path(output).name)
+        manifest = {
+            'outputs': [Path(output).name for output in outputs],
+            'bytes': path_bytes(staging / 'files'),
+            'params': params,
+            'created': time.time(),
+        }
+        with open(staging / MANIFEST, 'w') as f:
+            json.dump(manifest, f, indent=2, default=str)
+        os.rename(staging, entry)
+    except OSError:
+        remove_path(staging)
+        if (entry / MANIFEST).exists():
+            return False
+        raise
+    return True
+
+def entries(cache_dir=CACHE_DIR):
+    """
+    List the published entries, least recently used first.
+
+    Returns:
+        list: (key, bytes, last used epoch seconds, params) tuples
+    """
+    result = []
+    cache_dir = Path(cache_dir)
+    if not cache_dir.is_dir():
+        return result
+    for entry in cache_dir.iterdir():
+        try:
+            with open(entry / MANIFEST) as f:
+                manifest = json.load(f)
+            last_used = (entry / MANIFEST).stat().st_mtime
+        except (OSError, ValueError):
+            continue
+        result.append((entry.name, manifest.get('bytes', 0), last_used, manifest.get('params')))
+    return sorted(result, key=lambda item: item[2])
+
+def evict(max_bytes, keep=None, cache_dir=CACHE_DIR):
+    """
+    Remove least recently used entries until the cache fits in max_bytes.
+
+    Temporary entries left over by crashed runs are removed as well.
+
+    Args:
+        max_bytes (int): Size cap of the cache
+        keep (str): Key that is never evicted, e.g. the entry just published
+        cache_dir (Path): Cache directory
+
+    Returns:
+        list: Keys of the evicted entries
+    """
+    cache_dir = Path(cache_dir)
+    if cache_dir.is_dir():
+        for stale in cache_dir.glob('tmp-*'):
+            if time.time() - stale.stat().st_mtime > STALE_SECONDS:
+                remove_path(stale)
+
+    cached = entries(cache_dir)
+    total = sum(size for _, size, _, _ in cached)
+    evicted = []
+    for key, size, _, _ in cached:
+        if total <= max_bytes:
+            break
+        if key == keep:
+            continue
+        remove_path(cache_dir / key)
+        total -= size
+        evicted.append(key)
+    return evicted
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect or trim the generated dataset cache')
+    parser.add_argument('--cache-dir', default=str(CACHE_DIR), help=f"Cache directory (default: {CACHE_DIR.name})")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('list', help='List the entries, least recently used first')
+    evict_parser = subparsers.add_parser('evict', help='Evict entries until the cache fits in --max-gb')
+    evict_parser.add_argument('--max-gb', type=float, default=DEFAULT_MAX_GB,
+                              help=f"Size cap in GB, 0 empties the cache (default: {DEFAULT_MAX_GB:g})")
+    args = parser.parse_args()
+
+    if args.command == 'list':
+        cached = entries(args.cache_dir)
+        for key, size, last_used, params in cached:
+            print(f"{key[:12]}  {size / 1e6:>10.1f} MB  {time.strftime('%Y-%m-%d %H:%M', time.localtime(last_used))}  "
+                  f"{json.dumps(params, sort_keys=True)}")
+        print(f"✓ {len(cached)} entries, {sum(size for _, size, _, _ in cached) / 1e9:.2f} GB in {args.cache_dir}")
+    else:
+        evicted = evict(int(args.max_gb * 1e9), cache_dir=args.cache_dir)
+        print(f"✓ Evicted {len(evicted)} entries from {args.cache_dir}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
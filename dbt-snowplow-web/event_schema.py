@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Single source of truth for the layout of the Snowplow events table.
+
+COLUMNS lists every column in load order with one logical type. The generator's
+CSV header, the CREATE TABLE events DDL in load_events_data.sql, the events
+column_types in seeds.yml and the Arrow schema of Parquet output and direct
+loads are all derived from it. `python3 event_schema.py sync` rewrites the two
+checked-in files, and `check` reports any drift.
+
+The module also holds the encoders that turn typed generator columns (numpy
+arrays of epoch microseconds, integers and floats) into CSV text or Arrow
+arrays, so generated events are written in their final types.
+"""
+
+import re
+import sys
+import argparse
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed for typed columns
+    np = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # pyarrow is only needed for Parquet output and direct loads
+    pa = None
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+LOAD_SQL_SCRIPT = SCRIPT_DIR / 'load_events_data.sql'
+SEEDS_FILE = SCRIPT_DIR / 'seeds.yml'
+
+# Every column of the events table in load order, with its logical type.
+# Types follow the Snowplow atomic.events table.
+COLUMNS = [
+    ('app_id', 'string'),
+    ('platform', 'string'),
+    ('etl_tstamp', 'timestamp'),
+    ('collector_tstamp', 'timestamp'),
+    ('dvce_created_tstamp', 'timestamp'),
+    ('event', 'string'),
+    ('event_id', 'string'),
+    ('txn_id', 'integer'),
+    ('name_tracker', 'string'),
+    ('v_tracker', 'string'),
+    ('v_collector', 'string'),
+    ('v_etl', 'string'),
+    ('user_id', 'string'),
+    ('user_ipaddress', 'string'),
+    ('user_fingerprint', 'string'),
+    ('domain_userid', 'string'),
+    ('domain_sessionidx', 'integer'),
+    ('network_userid', 'string'),
+    ('geo_country', 'string'),
+    ('geo_region', 'string'),
+    ('geo_city', 'string'),
+    ('geo_zipcode', 'string'),
+    ('geo_latitude', 'double'),
+    ('geo_longitude', 'double'),
+    ('geo_region_name', 'string'),
+    ('ip_isp', 'string'),
+    ('ip_organization', 'string'),
+    ('ip_domain', 'string'),
+    ('ip_netspeed', 'string'),
+    ('page_url', 'string'),
+    ('page_title', 'string'),
+    ('page_referrer', 'string'),
+    ('page_urlscheme', 'string'),
+    ('page_urlhost', 'string'),
+    ('page_urlport', 'integer'),
+    ('page_urlpath', 'string'),
+    ('page_urlquery', 'string'),
+    ('page_urlfragment', 'string'),
+    ('refr_urlscheme', 'string'),
+    ('refr_urlhost', 'string'),
+    ('refr_urlport', 'integer'),
+    ('refr_urlpath', 'string'),
+    ('refr_urlquery', 'string'),
+    ('refr_urlfragment', 'string'),
+    ('refr_medium', 'string'),
+    ('refr_source', 'string'),
+    ('refr_term', 'string'),
+    ('mkt_medium', 'string'),
+    ('mkt_source', 'string'),
+    ('mkt_term', 'string'),
+    ('mkt_content', 'string'),
+    ('mkt_campaign', 'string'),
+    ('se_category', 'string'),
+    ('se_action', 'string'),
+    ('se_label', 'string'),
+    ('se_property', 'string'),
+    ('se_value', 'double'),
+    ('tr_orderid', 'string'),
+    ('tr_affiliation', 'string'),
+    ('tr_total', 'decimal'),
+    ('tr_tax', 'decimal'),
+    ('tr_shipping', 'decimal'),
+    ('tr_city', 'string'),
+    ('tr_state', 'string'),
+    ('tr_country', 'string'),
+    ('ti_orderid', 'string'),
+    ('ti_sku', 'string'),
+    ('ti_name', 'string'),
+    ('ti_category', 'string'),
+    ('ti_price', 'decimal'),
+    ('ti_quantity', 'integer'),
+    ('pp_xoffset_min', 'integer'),
+    ('pp_xoffset_max', 'integer'),
+    ('pp_yoffset_min', 'integer'),
+    ('pp_yoffset_max', 'integer'),
+    ('useragent', 'string'),
+    ('br_name', 'string'),
+    ('br_family', 'string'),
+    ('br_version', 'string'),
+    ('br_type', 'string'),
+    ('br_renderengine', 'string'),
+    ('br_lang', 'string'),
+    ('br_features_pdf', 'boolean'),
+    ('br_features_flash', 'boolean'),
+    ('br_features_java', 'boolean'),
+    ('br_features_director', 'boolean'),
+    ('br_features_quicktime', 'boolean'),
+    ('br_features_realplayer', 'boolean'),
+    ('br_features_windowsmedia', 'boolean'),
+    ('br_features_gears', 'boolean'),
+    ('br_features_silverlight', 'boolean'),
+    ('br_cookies', 'boolean'),
+    ('br_colordepth', 'string'),
+    ('br_viewwidth', 'integer'),
+    ('br_viewheight', 'integer'),
+    ('os_name', 'string'),
+    ('os_family', 'string'),
+    ('os_manufacturer', 'string'),
+    ('os_timezone', 'string'),
+    ('dvce_type', 'string'),
+    ('dvce_ismobile', 'boolean'),
+    ('dvce_screenwidth', 'integer'),
+    ('dvce_screenheight', 'integer'),
+    ('doc_charset', 'string'),
+    ('doc_width', 'integer'),
+    ('doc_height', 'integer'),
+    ('tr_currency', 'string'),
+    ('tr_total_base', 'decimal'),
+    ('tr_tax_base', 'decimal'),
+    ('tr_shipping_base', 'decimal'),
+    ('ti_currency', 'string'),
+    ('ti_price_base', 'decimal'),
+    ('base_currency', 'string'),
+    ('geo_timezone', 'string'),
+    ('mkt_clickid', 'string'),
+    ('mkt_network', 'string'),
+    ('etl_tags', 'string'),
+    ('dvce_sent_tstamp', 'timestamp'),
+    ('refr_domain_userid', 'string'),
+    ('refr_dvce_tstamp', 'timestamp'),
+    ('domain_sessionid', 'string'),
+    ('derived_tstamp', 'timestamp'),
+    ('event_vendor', 'string'),
+    ('event_name', 'string'),
+    ('event_format', 'string'),
+    ('event_version', 'string'),
+    ('event_fingerprint', 'string'),
+    ('true_tstamp', 'timestamp'),
+    ('load_tstamp', 'timestamp'),
+    ('contexts_com_snowplowanalytics_snowplow_web_page_1', 'string'),
+    ('unstruct_event_com_snowplowanalytics_snowplow_consent_preferences_1', 'string'),
+    ('unstruct_event_com_snowplowanalytics_snowplow_cmp_visible_1', 'string'),
+    ('contexts_com_iab_snowplow_spiders_and_robots_1', 'string'),
+    ('contexts_com_snowplowanalytics_snowplow_ua_parser_context_1', 'string'),
+    ('contexts_nl_basjes_yauaa_context_1', 'string'),
+    ('unstruct_event_com_snowplowanalytics_snowplow_web_vitals_1', 'string'),
+]
+
+HEADERS = [name for name, _ in COLUMNS]
+COLUMN_TYPES = dict(COLUMNS)
+
+# Logical type -> type in the CREATE TABLE DDL, which also runs on DuckDB
+DDL_TYPES = {
+    'string': 'STRING',
+    'timestamp': 'TIMESTAMP_NTZ',
+    'integer': 'INTEGER',
+    'double': 'DOUBLE',
+    'decimal': 'DECIMAL(18,2)',
+    'boolean': 'BOOLEAN',
+}
+
+# Logical type -> dbt seed column type in seeds.yml
+SEED_TYPES = {
+    'string': 'TEXT',
+    'timestamp': 'TIMESTAMP_NTZ(9)',
+    'integer': 'NUMBER(38,0)',
+    'double': 'FLOAT',
+    'decimal': 'NUMBER(18,2)',
+    'boolean': 'BOOLEAN',
+}
+
+DDL_BLOCK = re.compile(r'(CREATE TABLE IF NOT EXISTS events \()\n.*?\n(\);)', re.S)
+SEED_BLOCK = re.compile(r'(  - name: events\n(?:.*\n)*?      column_types:\n)((?:        \w+: .*\n)+)')
+
+def create_table_columns():
+    """Column list of the CREATE TABLE events statement."""
+    return ',\n'.join(f"    {name} {DDL_TYPES[column_type]}" for name, column_type in COLUMNS)
+
+def seed_column_types():
+    """Lines of the events column_types mapping in seeds.yml."""
+    return ''.join(f"        {name}: {SEED_TYPES[column_type]}\n" for name, column_type in COLUMNS)
+
+def render_sql(text):
+    """Replace the CREATE TABLE events column list of load_events_data.sql."""
+    return DDL_BLOCK.sub(lambda match: f"{match.group(1)}\n{create_table_columns()}\n{match.group(2)}", text, count=1)
+
+def render_seeds(text):
+    """Replace the events column_types of seeds.yml."""
+    return SEED_BLOCK.sub(lambda match: match.group(1) + seed_column_types(), text, count=1)
+
+def stale_files(sql_file=LOAD_SQL_SCRIPT, seeds_file=SEEDS_FILE):
+    """
+    Files whose events layout differs from COLUMNS.
+
+    Returns:
+        list: (path, rendered text) of every file that needs a sync
+    """
+    stale = []
+    for path, render in ((Path(sql_file), render_sql), (Path(seeds_file), render_seeds)):
+        text = path.read_text()
+        rendered = render(text)
+        if rendered != text:
+            stale.append((path, rendered))
+    return stale
+
+def arrow_schema():
+    """Arrow schema of the events table in header order."""
+    if pa is None:
+        raise RuntimeError("Parquet output and direct loads require pyarrow. Install it with: pip install pyarrow")
+    
+    arrow_types = {
+        'string': pa.string(),
+        'timestamp': pa.timestamp('us'),
+        'integer': pa.int64(),
+        'double': pa.float64(),
+        'decimal': pa.decimal128(18, 2),
+        'boolean': pa.bool_(),
+    }
+    return pa.schema([(name, arrow_types[column_type]) for name, column_type in COLUMNS])
+
+def split_fixed_width(text):
+    """Turn an (n, width) uint8 array of ASCII characters into a list of n strings."""
+    width = text.shape[1]
+    joined = text.tobytes().decode('ascii')
+    return [joined[i:i + width] for i in range(0, len(joined), width)]
+
+def format_timestamps(epoch_us):
+    """Format int64 epoch microseconds as 'YYYY-MM-DD HH:MM:SS.mmm' strings."""
+    text = np.datetime_as_string(epoch_us.astype('datetime64[us]').astype('datetime64[ms]'))
+    text = text.astype('S23').view(np.uint8).reshape(len(epoch_us), 23).copy()
+    text[:, 10] = ord(' ')
+    return split_fixed_width(text)
+
+def encode_csv(values, column_type):
+    """
+    Encode a typed numpy column as CSV field strings.
+
+    Strings and string lists are already encoded and are returned unchanged.
+    """
+    if np is None or not isinstance(values, np.ndarray):
+        return values
+    if column_type == 'timestamp':
+        return format_timestamps(values)
+    if column_type == 'double':
+        return list(map(repr, values.tolist()))
+    return list(map(str, values.tolist()))
+
+def encode_arrow(values, field, num_events):
+    """
+    Build the Arrow array of one column.
+
+    Typed numpy columns are converted without going through text. String
+    values are cast to the column type, and empty strings become NULLs, the
+    same as an empty CSV field does on COPY INTO.
+    """
+    if np is not None and isinstance(values, np.ndarray):
+        if field.type == pa.timestamp('us'):
+            # Truncated to the millisecond precision of the CSV text
+            epoch_us = values.astype(np.int64, copy=False)
+            return pa.array(epoch_us - epoch_us % 1000, pa.int64()).view(field.type)
+        return pa.array(values, field.type)
+    if isinstance(values, str):
+        return pa.repeat(pa.scalar(values or None, pa.string()).cast(field.type), num_events)
+    values = pa.array(values, pa.string())
+    values = pc.if_else(pc.equal(values, ''), pa.scalar(None, pa.string()), values)
+    return values.cast(field.type)
+
+def main():
+    parser = argparse.ArgumentParser(description='Keep load_events_data.sql and seeds.yml in line with the events schema')
+    parser.add_argument('command', choices=['check', 'sync', 'ddl'],
+                        help='check for drift, sync the files, or print the CREATE TABLE column list')
+    args = parser.parse_args()
+
+    if args.command == 'ddl':
+        print(create_table_columns())
+        return 0
+    stale = stale_files()
+    if args.command == 'check':
+        for path, _ in stale:
+            print(f"❌ {path.name} does not match event_schema.py, run: python3 event_schema.py sync")
+        if not stale:
+            print(f"✓ {LOAD_SQL_SCRIPT.name} and {SEEDS_FILE.name} match the {len(COLUMNS)} columns of event_schema.py")
+        return 1 if stale else 0
+    for path, rendered in stale:
+        path.write_text(rendered)
+        print(f"✓ Rewrote the events columns of {path.name}")
+    if not stale:
+        print("✓ Already in sync")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
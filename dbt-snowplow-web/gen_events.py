@@ -3,64 +3,294 @@
 Script to generate events.csv files with Snowplow event data for yesterday and today.
 """
 
+import io
+import os
 import csv
+import shutil
 import uuid
 import random
-from datetime import datetime, timedelta
+import hashlib
+import math
+from bisect import bisect_left
+from collections import deque
+from functools import lru_cache, partial
+from datetime import date, datetime, timedelta
 import json
+from itertools import repeat
 
-def generate_event_data(target_date, num_events=1000):
-    """Generate sample Snowplow event data for a specific date."""
-    
-    # Sample data for variety
-    countries = ['US', 'CA', 'GB', 'DE', 'FR', 'JP', 'AU', 'BR', 'IN', 'MX']
-    cities = ['New York', 'London', 'Berlin', 'Paris', 'Tokyo', 'Sydney', 'São Paulo', 'Mumbai', 'Mexico City']
-    user_agents = [
-        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-        'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-        'Mozilla/5.0 (iPhone; CPU iPhone OS 14_6 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.1.1 Mobile/15E148 Safari/604.1',
-        'Mozilla/5.0 (Linux; Android 11; SM-G991B) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.120 Mobile Safari/537.36'
-    ]
-    
-    pages = [
-        'https://example.com/home',
-        'https://example.com/products',
-        'https://example.com/about',
-        'https://example.com/contact',
-        'https://example.com/blog'
-    ]
+import event_schema
+from event_schema import split_fixed_width
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed for the batch engine
+    np = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is only needed for Parquet output and direct loads
+    pa = None
+
+# Sample data for variety
+countries = ['US', 'CA', 'GB', 'DE', 'FR', 'JP', 'AU', 'BR', 'IN', 'MX']
+cities = ['New York', 'London', 'Berlin', 'Paris', 'Tokyo', 'Sydney', 'São Paulo', 'Mumbai', 'Mexico City']
+user_agents = [
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Mozilla/5.0 (iPhone; CPU iPhone OS 14_6 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.1.1 Mobile/15E148 Safari/604.1',
+    'Mozilla/5.0 (Linux; Android 11; SM-G991B) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.120 Mobile Safari/537.36'
+]
+
+pages = [
+    'https://example.com/home',
+    'https://example.com/products',
+    'https://example.com/about',
+    'https://example.com/contact',
+    'https://example.com/blog'
+]
+
+# Event names to randomly select from
+event_names = ['page_ping', 'web_vitals', 'cmp_visible', 'consent_preferences', 'unstruct', 'struct', 'page_view']
+
+# Workload profiles. 'flat' makes every event its own user and single-event session.
+# The others lay events out as sessions of returning users, like real traffic.
+PROFILES = {
+    'flat': None,
+    'web': {
+        'users': 100_000,          # returning users, sessions are Zipf distributed over them
+        'user_skew': 1.1,
+        'pages': 1_000,            # page paths, page views are Zipf distributed over them
+        'page_skew': 1.2,
+        'events_per_session': 8.0, # mean of the geometric session length
+        'ping_share': 0.6,         # share of later events in a session that are page pings
+        'other_share': 0.05,       # share that are web_vitals / consent events
+        'heartbeat': 10,           # seconds between page pings, snowplow__heartbeat
+        'logged_in': 0.3,          # share of users with a user_id
+    },
+}
+
+# domain_sessionidx counts a user's sessions in whole seconds of their start since this day,
+# from a per-user base, so it keeps growing across shards, days and windows instead of
+# restarting in every shard. It stays within the INTEGER column until 2080.
+SESSIONIDX_EPOCH = date(2020, 1, 1)
+
+def _sessionidx_base(user):
+    """Per-user offset of domain_sessionidx, a hash of the user (or an array of users) below one million."""
+    return user * 2654435761 % 1_000_000
+
+# Events of a session that are neither page views nor page pings
+session_event_names = ['web_vitals', 'cmp_visible', 'consent_preferences']
+
+def workload_profile(name, seed, **overrides):
+    """
+    Resolve a workload profile for the generators.
+
+    Overrides that are None keep the profile's value. The user pool is derived
+    from the run seed, so every shard and every day sees the same users.
+
+    Args:
+        name (str): Key of PROFILES
+        seed (int): Run seed
+        **overrides: Profile settings to change, e.g. users=1000
+
+    Returns:
+        dict: Profile settings, or None for the flat profile
+    """
+    if PROFILES[name] is None:
+        return None
+    profile = dict(PROFILES[name])
+    profile.update({key: value for key, value in overrides.items() if value is not None})
+    digest = hashlib.sha256(f"{seed}:users".encode()).digest()
+    profile['user_salt'] = int.from_bytes(digest[:8], 'big')
+    return profile
+
+def _id_prefix(salt):
+    """First three groups of a version 4 UUID taken from a 64-bit salt."""
+    digits = f"{salt:016x}"
+    return f"{digits[0:8]}-{digits[8:12]}-4{digits[13:16]}-"
+
+@lru_cache(maxsize=16)
+def _zipf_cdf(size, skew):
+    """Cumulative Zipf(skew) distribution over ranks 0..size-1."""
+    total = 0.0
+    cdf = []
+    for rank in range(1, size + 1):
+        total += rank ** -skew
+        cdf.append(total)
+    return [value / total for value in cdf]
+
+def _page(index):
+    """URL, path and title of the page with the given popularity rank."""
+    path = '/' if index == 0 else f"/page-{index}"
+    return f"https://example.com{path}", path, 'Home' if index == 0 else f"Page {index}"
+
+def _session_columns(profile, users, session_ids, sessionidx, expand, kinds, pages, page_view_ids):
+    """
+    Turn a session plan into the per-event string columns it overrides.
+
+    users, session_ids and sessionidx hold one value per session; expand maps
+    such a list to one value per event. kinds, pages and page_view_ids are per event.
+    """
+    user_prefix = _id_prefix(profile['user_salt'])
+    network_prefix = _id_prefix(profile['user_salt'] ^ 0x5bd1e9955bd1e995)
+    logged_in = int(profile['logged_in'] * 1000)
+    page_info = {page: _page(page) for page in set(pages)}
+    return {
+        'event': ['page_view' if kind == 'page_view' else 'page_ping' if kind == 'page_ping' else 'unstruct' for kind in kinds],
+        'event_name': kinds,
+        # A fixed share of the user pool is logged in, independent of the seed
+        'user_id': expand([f"user-{user}" if user * 2654435761 % 1000 < logged_in else '' for user in users]),
+        'domain_userid': expand([f"{user_prefix}8000-{user:012x}" for user in users]),
+        'domain_sessionidx': expand(list(map(str, sessionidx))),
+        'network_userid': expand([f"{network_prefix}8000-{user:012x}" for user in users]),
+        'domain_sessionid': expand(session_ids),
+        'page_url': [page_info[page][0] for page in pages],
+        'page_urlpath': [page_info[page][1] for page in pages],
+        'page_title': [page_info[page][2] for page in pages],
+        'contexts_com_snowplowanalytics_snowplow_web_page_1': ['[{"id": "%s"}]' % page_view_id for page_view_id in page_view_ids],
+    }
+
+def plan_sessions(profile, num_events, rng, hour=None, target_date=SESSIONIDX_EPOCH):
+    """
+    Lay out num_events events as sessions of a workload profile, row by row.
+
+    Session lengths are geometric with the profile's mean. Every session belongs
+    to a Zipf-distributed user and starts with a page view; later events are page
+    pings one heartbeat apart, further page views of Zipf-distributed pages, or a
+    few other events. Sessions stay within the day, or within hour when given.
+
+    Args:
+        profile (dict): Resolved workload profile, see workload_profile
+        num_events (int): Number of events to plan
+        rng (random.Random): Random generator
+        hour (int): Keep every event within this hour of the day
+        target_date (date): Day the sessions fall on, which domain_sessionidx counts from
+
+    Returns:
+        dict: 'offset_us' (microseconds since midnight per event) and 'columns'
+    """
+    window_start, window = (0, 86400) if hour is None else (hour * 3600, 3600)
+    user_cdf = _zipf_cdf(profile['users'], profile['user_skew'])
+    page_cdf = _zipf_cdf(profile['pages'], profile['page_skew'])
+    stop = 1.0 / max(profile['events_per_session'], 1.0)
+    heartbeat = profile['heartbeat']
+    ping_share = profile['ping_share']
+    other_share = ping_share + profile['other_share']
+
+    sessions = []  # (start, user, event offsets, kinds, pages)
+    remaining = num_events
+    while remaining > 0:
+        length = 1 if stop >= 1 else 1 + int(math.log(1.0 - rng.random()) / math.log(1.0 - stop))
+        length = min(length, remaining)
+        remaining -= length
+
+        offsets, kinds, session_pages = [0.0], ['page_view'], [bisect_left(page_cdf, rng.random())]
+        for _ in range(length - 1):
+            draw = rng.random()
+            if draw < ping_share:
+                offsets.append(offsets[-1] + heartbeat + rng.random())
+                kinds.append('page_ping')
+                session_pages.append(session_pages[-1])
+            elif draw < other_share:
+                offsets.append(offsets[-1] + rng.uniform(0, heartbeat))
+                kinds.append(rng.choice(session_event_names))
+                session_pages.append(session_pages[-1])
+            else:
+                offsets.append(offsets[-1] + rng.uniform(heartbeat, 6 * heartbeat))
+                kinds.append('page_view')
+                session_pages.append(bisect_left(page_cdf, rng.random()))
+        start = rng.random() * max(window - offsets[-1], 0)
+        user = bisect_left(user_cdf, rng.random())
+        sessions.append((start, user, offsets, kinds, session_pages))
+
+    # domain_sessionidx follows the session start, see SESSIONIDX_EPOCH; sessions of
+    # one user that start in the same second take the next free index
+    day_seconds = (target_date - SESSIONIDX_EPOCH).days * 86400 + window_start
+    sessionidx = [0] * len(sessions)
+    last = {}
+    for index in sorted(range(len(sessions)), key=lambda index: sessions[index][0]):
+        start, user = sessions[index][0], sessions[index][1]
+        value = _sessionidx_base(user) + day_seconds + int(start)
+        sessionidx[index] = last[user] = max(value, last.get(user, 0) + 1)
+
+    offset_us, session_of_event, kinds, pages, page_view_ids = [], [], [], [], []
+    for index, (start, _, offsets, session_kinds, session_pages) in enumerate(sessions):
+        for offset, kind in zip(offsets, session_kinds):
+            offset_us.append(int((window_start + min(start + offset, window - 0.001)) * 1_000_000))
+            if kind == 'page_view':
+                page_view_id = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+            page_view_ids.append(page_view_id)
+            session_of_event.append(index)
+        kinds.extend(session_kinds)
+        pages.extend(session_pages)
+
+    session_ids = [str(uuid.UUID(int=rng.getrandbits(128), version=4)) for _ in sessions]
+    users = [session[1] for session in sessions]
+    return {
+        'offset_us': offset_us,
+        'columns': _session_columns(profile, users, session_ids, sessionidx,
+                                    lambda values: [values[session] for session in session_of_event],
+                                    kinds, pages, page_view_ids),
+    }
+
+# CSV headers in the column order of the events table, see event_schema.py
+headers = event_schema.HEADERS
+HEADER_INDEX = {name: index for index, name in enumerate(headers)}
+
+def generate_event_data(target_date, num_events=1000, rng=None, hour=None, profile=None, anomalies=None):
+    """
+    Generate sample Snowplow event data for a specific date.
+
+    Pass a seeded random.Random as rng to make the output reproducible; by default
+    the global random module and uuid.uuid4 are used. When hour is given, every
+    collector timestamp falls within that hour of the day. With a workload profile
+    (see workload_profile) the events form sessions of returning users instead of
+    one single-event session per row; anomalies (see anomaly_settings) mixes in
+    late, duplicate and bot events.
+    """
     
-    # Event names to randomly select from
-    event_names = ['page_ping', 'web_vitals', 'cmp_visible', 'consent_preferences', 'unstruct', 'struct', 'page_view']
+    if rng is None:
+        rng = random
+        new_uuid = uuid.uuid4
+    else:
+        def new_uuid():
+            return uuid.UUID(int=rng.getrandbits(128), version=4)
     
+    plan = plan_sessions(profile, num_events, rng, hour, target_date) if profile else None
+    planned = [(HEADER_INDEX[name], values) for name, values in plan['columns'].items()] if plan else []
+    day_start = datetime.combine(target_date, datetime.min.time())
     events = []
     
     for i in range(num_events):
         # Generate timestamps for the target date
-        hour = random.randint(0, 23)
-        minute = random.randint(0, 59)
-        second = random.randint(0, 59)
-        
-        base_time = datetime.combine(target_date, datetime.min.time().replace(hour=hour, minute=minute, second=second))
-        # Add milliseconds for compatibility with dbt models
-        base_time = base_time.replace(microsecond=random.randint(0, 999999))
+        if plan is None:
+            event_hour = rng.randint(0, 23) if hour is None else hour
+            minute = rng.randint(0, 59)
+            second = rng.randint(0, 59)
+            
+            base_time = datetime.combine(target_date, datetime.min.time().replace(hour=event_hour, minute=minute, second=second))
+            # Add milliseconds for compatibility with dbt models
+            base_time = base_time.replace(microsecond=rng.randint(0, 999999))
+        else:
+            base_time = day_start + timedelta(microseconds=plan['offset_us'][i])
         collector_tstamp = base_time
-        dvce_created_tstamp = base_time - timedelta(seconds=random.randint(1, 5), microseconds=random.randint(0, 999999))
-        etl_tstamp = base_time + timedelta(seconds=random.randint(1, 3), microseconds=random.randint(0, 999999))
+        dvce_created_tstamp = base_time - timedelta(seconds=rng.randint(1, 5), microseconds=rng.randint(0, 999999))
+        etl_tstamp = base_time + timedelta(seconds=rng.randint(1, 3), microseconds=rng.randint(0, 999999))
         
         # Generate event data
-        event_id = str(uuid.uuid4())
-        domain_userid = str(uuid.uuid4())
-        domain_sessionid = str(uuid.uuid4())
-        network_userid = str(uuid.uuid4())
+        event_id = str(new_uuid())
+        domain_userid = str(new_uuid())
+        domain_sessionid = str(new_uuid())
+        network_userid = str(new_uuid())
         
-        country = random.choice(countries)
-        city = random.choice(cities)
-        user_agent = random.choice(user_agents)
-        page_url = random.choice(pages)
+        country = rng.choice(countries)
+        city = rng.choice(cities)
+        user_agent = rng.choice(user_agents)
+        page_url = rng.choice(pages)
         
         # Randomly select event name
-        event_name = random.choice(event_names)
+        event_name = rng.choice(event_names)
         
         # Generate contexts (simplified JSON)
         ua_context = [{
@@ -69,19 +299,19 @@ def generate_event_data(target_date, num_events=1000):
             'useragentFamily': 'Safari' if 'Safari' in user_agent else 'Chrome'
         }]
         
-        web_page_context = [{'id': str(uuid.uuid4())}]
+        web_page_context = [{'id': str(new_uuid())}]
         iab_context = [{'category': 'BROWSER', 'spiderOrRobot': False}]
         yauaa_context = [{'agentClass': 'Browser', 'deviceClass': 'Phone' if 'Mobile' in user_agent else 'Desktop'}]
         
         # Generate web vitals
         web_vitals = [{
-            'cls': round(random.uniform(0.01, 0.1), 3),
-            'fcp': random.randint(100, 500),
-            'fid': random.randint(10, 100),
-            'inp': random.randint(10, 100),
-            'lcp': random.randint(1000, 3000),
+            'cls': round(rng.uniform(0.01, 0.1), 3),
+            'fcp': rng.randint(100, 500),
+            'fid': rng.randint(10, 100),
+            'inp': rng.randint(10, 100),
+            'lcp': rng.randint(1000, 3000),
             'navigation_type': 'navigate',
-            'ttfb': random.randint(50, 300)
+            'ttfb': rng.randint(50, 300)
         }]
         
         event = [
@@ -99,7 +329,7 @@ def generate_event_data(target_date, num_events=1000):
             'beam-enrich-1.4.2-rc1-common-1.4.2-rc1',  # v_etl
             '',  # user_id
             '',  # user_ipaddress
-            str(uuid.uuid4()),  # user_fingerprint
+            str(new_uuid()),  # user_fingerprint
             domain_userid,  # domain_userid
             '1',  # domain_sessionidx
             network_userid,  # network_userid
@@ -107,8 +337,8 @@ def generate_event_data(target_date, num_events=1000):
             '',  # geo_region
             city,  # geo_city
             '',  # geo_zipcode
-            str(random.uniform(-90, 90)),  # geo_latitude
-            str(random.uniform(-180, 180)),  # geo_longitude
+            str(rng.uniform(-90, 90)),  # geo_latitude
+            str(rng.uniform(-180, 180)),  # geo_longitude
             '',  # geo_region_name
             '',  # ip_isp
             '',  # ip_organization
@@ -178,19 +408,19 @@ def generate_event_data(target_date, num_events=1000):
             '',  # br_features_silverlight
             'TRUE',  # br_cookies
             '24',  # br_colordepth
-            str(random.randint(800, 1920)),  # br_viewwidth
-            str(random.randint(600, 1080)),  # br_viewheight
+            str(rng.randint(800, 1920)),  # br_viewwidth
+            str(rng.randint(600, 1080)),  # br_viewheight
             '',  # os_name
             '',  # os_family
             '',  # os_manufacturer
             'America/New_York',  # os_timezone
             '',  # dvce_type
             'TRUE' if 'Mobile' in user_agent else 'FALSE',  # dvce_ismobile
-            str(random.randint(320, 1920)),  # dvce_screenwidth
-            str(random.randint(568, 1080)),  # dvce_screenheight
+            str(rng.randint(320, 1920)),  # dvce_screenwidth
+            str(rng.randint(568, 1080)),  # dvce_screenheight
             'UTF-8',  # doc_charset
-            str(random.randint(800, 1920)),  # doc_width
-            str(random.randint(600, 1080)),  # doc_height
+            str(rng.randint(800, 1920)),  # doc_width
+            str(rng.randint(600, 1080)),  # doc_height
             '',  # tr_currency
             '',  # tr_total_base
             '',  # tr_tax_base
@@ -211,7 +441,7 @@ def generate_event_data(target_date, num_events=1000):
             event_name,  # event_name
             'jsonschema',  # event_format
             '1-0-0',  # event_version
-            str(uuid.uuid4()),  # event_fingerprint
+            str(new_uuid()),  # event_fingerprint
             '',  # true_tstamp
             '',  # load_tstamp
             json.dumps(web_page_context),  # contexts_com_snowplowanalytics_snowplow_web_page_1
@@ -222,34 +452,429 @@ def generate_event_data(target_date, num_events=1000):
             json.dumps(yauaa_context),  # contexts_nl_basjes_yauaa_context_1
             json.dumps(web_vitals)  # unstruct_event_com_snowplowanalytics_snowplow_web_vitals_1
         ]
+        for index, values in planned:
+            event[index] = values[i]
         
         events.append(event)
     
+    if anomalies:
+        for i, column, value in anomaly_edits(anomalies, num_events, lambda column, i: events[i][HEADER_INDEX[column]], rng):
+            events[i][HEADER_INDEX[column]] = value
+    
     return events
 
+# Lag distributions of late and delayed events, all with a mean of `scale` seconds
+LAG_DISTRIBUTIONS = {
+    'exponential': lambda rng, scale: rng.expovariate(1.0 / scale),
+    'uniform': lambda rng, scale: rng.uniform(0, 2 * scale),
+    'pareto': lambda rng, scale: scale / 3 * rng.paretovariate(1.5),  # heavy tail
+}
+
+# Columns of a bot session, matched by snowplow__ua_bot_filter and the IAB enrichment
+bot_columns = {
+    'useragent': 'Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)',
+    'dvce_ismobile': 'FALSE',
+    'contexts_com_iab_snowplow_spiders_and_robots_1': json.dumps([{'category': 'SPIDER_OR_ROBOT', 'spiderOrRobot': True}]),
+    'contexts_com_snowplowanalytics_snowplow_ua_parser_context_1': json.dumps([{
+        'deviceFamily': 'Spider', 'osFamily': 'Other', 'useragentFamily': 'Googlebot'}]),
+    'contexts_nl_basjes_yauaa_context_1': json.dumps([{'agentClass': 'Robot', 'deviceClass': 'Robot'}]),
+}
+
+def anomaly_settings(late_share=0.0, delayed_share=0.0, late_lag='exponential', late_lag_hours=24.0,
+                     duplicate_share=0.0, bot_share=0.0):
+    """
+    Collect the knobs that make the generator emit late, duplicate and bot events.
+
+    Args:
+        late_share (float): Share of events created on an offline device: dvce_created_tstamp
+            and derived_tstamp lie the lag before the collector saw them
+        delayed_share (float): Share of events collected the lag earlier that only arrive
+            with this batch, so incremental runs have to look back for them
+        late_lag (str): Key of LAG_DISTRIBUTIONS
+        late_lag_hours (float): Mean lag in hours
+        duplicate_share (float): Share of events that repeat the event_id of another event
+        bot_share (float): Share of sessions from a spider or robot
+
+    Returns:
+        dict: The settings, or None when every share is zero
+    """
+    if not (late_share or delayed_share or duplicate_share or bot_share):
+        return None
+    return {'late_share': late_share, 'delayed_share': delayed_share, 'late_lag': late_lag,
+            'late_lag_hours': late_lag_hours, 'duplicate_share': duplicate_share, 'bot_share': bot_share}
+
+def _shift_tstamp(text, seconds):
+    """Move a 'YYYY-MM-DD HH:MM:SS.mmm' timestamp back by seconds."""
+    shifted = datetime.strptime(text, '%Y-%m-%d %H:%M:%S.%f') - timedelta(seconds=seconds)
+    return shifted.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+
+def _shift_epoch_us(epoch_us, seconds):
+    """Move epoch microseconds back by seconds, at the millisecond precision of the text timestamps."""
+    return epoch_us - epoch_us % 1000 - round(seconds * 1_000_000)
+
+def anomaly_edits(anomalies, num_events, value, rng, shift=_shift_tstamp):
+    """
+    Pick the events to turn into late, delayed, duplicate and bot events.
+
+    Works on generated events of either engine: value(column, index) reads a
+    generated value, and the result lists the values to overwrite. Bots are
+    chosen by domain_sessionid, so every event of a bot session is a bot event.
+
+    Args:
+        anomalies (dict): Settings from anomaly_settings
+        num_events (int): Number of generated events
+        value (callable): value(column, index) -> generated value
+        rng (random.Random): Random generator
+        shift (callable): shift(timestamp, seconds) -> the timestamp moved back by seconds
+
+    Returns:
+        list: (index, column, value) edits
+    """
+    edits = []
+    lag = LAG_DISTRIBUTIONS[anomalies['late_lag']]
+    scale = anomalies['late_lag_hours'] * 3600
+    late_share = anomalies['late_share']
+    delayed_share = late_share + anomalies['delayed_share']
+    if delayed_share:
+        for i in range(num_events):
+            draw = rng.random()
+            if draw >= delayed_share:
+                continue
+            seconds = lag(rng, scale)
+            # A late event was sent on time from the device's point of view, a delayed one was not collected
+            columns = ('dvce_created_tstamp', 'derived_tstamp') if draw < late_share else (
+                'collector_tstamp', 'dvce_created_tstamp', 'dvce_sent_tstamp', 'derived_tstamp')
+            edits.extend((i, column, shift(value(column, i), seconds)) for column in columns)
+
+    if anomalies['duplicate_share'] and num_events > 1:
+        duplicates = {i for i in range(num_events) if rng.random() < anomalies['duplicate_share']}
+        originals = [i for i in range(num_events) if i not in duplicates] or [0]
+        edits.extend((i, 'event_id', value('event_id', rng.choice(originals))) for i in sorted(duplicates))
+
+    if anomalies['bot_share']:
+        threshold = anomalies['bot_share'] * 2 ** 32
+        for i in range(num_events):
+            if int(value('domain_sessionid', i)[:8], 16) < threshold:
+                edits.extend((i, column, column_value) for column, column_value in bot_columns.items())
+    return edits
+
+def _require_numpy():
+    """Fail with a readable message when the batch engine is used without numpy."""
+    if np is None:
+        raise RuntimeError("The numpy engine requires numpy. Install it with: pip install numpy")
+
+def _uuid4_column(rng, num_events):
+    """Build version 4 UUID strings from one random byte buffer."""
+    raw = np.frombuffer(rng.bytes(16 * num_events), dtype=np.uint8).reshape(num_events, 16).copy()
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40  # version 4
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80  # RFC 4122 variant
+
+    hex_digits = np.frombuffer(b''.join(b'%02x' % i for i in range(256)), dtype=np.uint8).reshape(256, 2)
+    hexed = hex_digits[raw].reshape(num_events, 32)
+
+    text = np.full((num_events, 36), ord('-'), dtype=np.uint8)
+    text[:, 0:8] = hexed[:, 0:8]
+    text[:, 9:13] = hexed[:, 8:12]
+    text[:, 14:18] = hexed[:, 12:16]
+    text[:, 19:23] = hexed[:, 16:20]
+    text[:, 24:36] = hexed[:, 20:32]
+    return split_fixed_width(text)
+
+def _choice_column(rng, pool, num_events):
+    """Pick values from a pool using an index array."""
+    return np.asarray(pool, dtype=object)[rng.integers(0, len(pool), num_events)].tolist()
+
+@lru_cache(maxsize=16)
+def _zipf_cdf_array(size, skew):
+    """_zipf_cdf as a numpy array for searchsorted."""
+    return np.asarray(_zipf_cdf(size, skew))
+
+def _plan_sessions_numpy(profile, num_events, rng, hour=None, target_date=SESSIONIDX_EPOCH):
+    """
+    Lay out num_events events as sessions of a workload profile, with numpy.
+
+    Draws the same kind of plan as plan_sessions, one array per property instead
+    of one session at a time.
+
+    Args:
+        profile (dict): Resolved workload profile, see workload_profile
+        num_events (int): Number of events to plan
+        rng (numpy.random.Generator): Random generator
+        hour (int): Keep every event within this hour of the day
+        target_date (date): Day the sessions fall on, which domain_sessionidx counts from
+
+    Returns:
+        dict: 'offset_us' (int64 microseconds since midnight per event) and 'columns'
+    """
+    window_start, window = (0, 86400) if hour is None else (hour * 3600, 3600)
+    stop = 1.0 / max(profile['events_per_session'], 1.0)
+    heartbeat = profile['heartbeat']
+
+    # Session lengths until they cover num_events, the last one cut to fit
+    lengths = np.empty(0, dtype=np.int64)
+    while lengths.sum() < num_events:
+        lengths = np.concatenate([lengths, rng.geometric(stop, int(num_events * stop) + 16)])
+    ends = np.cumsum(lengths)
+    num_sessions = int(np.searchsorted(ends, num_events)) + 1 if num_events else 0
+    lengths = lengths[:num_sessions]
+    if num_sessions:
+        lengths[-1] -= ends[num_sessions - 1] - num_events
+    first = np.cumsum(lengths) - lengths
+    session_of_event = np.repeat(np.arange(num_sessions), lengths)
+    position = np.arange(num_events) - first[session_of_event]
+
+    # Every session opens with a page view, later events are pings, page views or others
+    draw = rng.random(num_events)
+    is_ping = (position > 0) & (draw < profile['ping_share'])
+    is_other = (position > 0) & ~is_ping & (draw < profile['ping_share'] + profile['other_share'])
+    is_page_view = ~is_ping & ~is_other
+    kinds = np.where(is_page_view, 'page_view', 'page_ping').astype(object)
+    kinds[is_other] = np.asarray(session_event_names, dtype=object)[rng.integers(0, len(session_event_names), int(is_other.sum()))]
+
+    gaps = np.where(is_ping, heartbeat + rng.random(num_events),
+                    np.where(is_other, rng.uniform(0, heartbeat, num_events), rng.uniform(heartbeat, 6 * heartbeat, num_events)))
+    gaps[position == 0] = 0
+    elapsed = np.cumsum(gaps)
+    offsets = elapsed - elapsed[first][session_of_event]
+    durations = offsets[first + lengths - 1] if num_sessions else np.empty(0)
+    starts = rng.random(num_sessions) * np.maximum(window - durations, 0)
+    offset_seconds = window_start + np.minimum(starts[session_of_event] + offsets, window - 0.001)
+
+    users = np.searchsorted(_zipf_cdf_array(profile['users'], profile['user_skew']), rng.random(num_sessions))
+    # domain_sessionidx follows the session start as in plan_sessions. Within a user,
+    # index i gets max(value_j + i - j) over the earlier sessions j; the user number
+    # scaled by 2**40 keeps the running maximum from leaking between users.
+    order = np.lexsort((starts, users))
+    sorted_users = users[order]
+    day_seconds = (target_date - SESSIONIDX_EPOCH).days * 86400 + window_start
+    values = _sessionidx_base(sorted_users) + day_seconds + starts[order].astype(np.int64)
+    rank = np.arange(num_sessions)
+    group = np.cumsum(np.r_[True, sorted_users[1:] != sorted_users[:-1]]) if num_sessions else rank
+    sessionidx = np.empty(num_sessions, dtype=np.int64)
+    sessionidx[order] = rank + np.maximum.accumulate(values - rank + (group << 40)) - (group << 40)
+
+    # Page pings and other events stay on the page of the page view before them
+    page_view_of_event = np.cumsum(is_page_view) - 1
+    num_page_views = int(is_page_view.sum())
+    page_views = np.searchsorted(_zipf_cdf_array(profile['pages'], profile['page_skew']), rng.random(num_page_views))
+    page_view_ids = np.asarray(_uuid4_column(rng, num_page_views), dtype=object)
+
+    columns = _session_columns(profile, users.tolist(), _uuid4_column(rng, num_sessions), sessionidx.tolist(),
+                               lambda values: np.asarray(values, dtype=object)[session_of_event].tolist(),
+                               kinds.tolist(), page_views[page_view_of_event].tolist(),
+                               page_view_ids[page_view_of_event].tolist())
+    return {'offset_us': (offset_seconds * 1_000_000).astype(np.int64), 'columns': columns}
+
+def generate_event_columns(target_date, num_events=1000, rng=None, hour=None, profile=None, anomalies=None,
+                           typed=False):
+    """
+    Generate sample Snowplow event data for a specific date as whole columns.
+
+    Produces the same layout as generate_event_data, but each column is built with
+    numpy in one pass instead of row by row. Columns that never change are returned
+    as plain strings. With typed, timestamp, integer and double columns are left as
+    numpy arrays in their event_schema types instead of being formatted as text.
+
+    Args:
+        target_date (date): Day the collector timestamps fall on
+        num_events (int): Number of events to generate
+        rng (numpy.random.Generator): Random generator, a fresh one when not given
+        hour (int): Keep every collector timestamp within this hour of the day
+        profile (dict): Workload profile from workload_profile; None gives one single-event session per row
+        anomalies (dict): Late, duplicate and bot event settings from anomaly_settings
+        typed (bool): Keep numeric and timestamp columns as numpy arrays
+
+    Returns:
+        list: One entry per header, either a list of values, a numpy array or a constant string
+    """
+    _require_numpy()
+    if rng is None:
+        rng = np.random.default_rng()
+    plan = _plan_sessions_numpy(profile, num_events, rng, hour, target_date) if profile else None
+
+    def planned(name, flat):
+        """The column of the session plan, or the flat one built by flat()."""
+        return plan['columns'][name] if plan else flat()
+
+    # Timestamps as int64 epoch microseconds
+    day_start = datetime.combine(target_date, datetime.min.time())
+    day_start_us = int((day_start - datetime(1970, 1, 1)).total_seconds()) * 1_000_000
+    if plan:
+        collector_us = day_start_us + plan['offset_us']
+    else:
+        if hour is None:
+            collector_seconds = rng.integers(0, 86400, num_events)
+        else:
+            collector_seconds = hour * 3600 + rng.integers(0, 3600, num_events)
+        collector_us = day_start_us + collector_seconds * 1_000_000 + rng.integers(0, 1_000_000, num_events)
+    dvce_created_us = collector_us - rng.integers(1, 6, num_events) * 1_000_000 - rng.integers(0, 1_000_000, num_events)
+    etl_us = collector_us + rng.integers(1, 4, num_events) * 1_000_000 + rng.integers(0, 1_000_000, num_events)
+
+    # Everything derived from the user agent is looked up through its index
+    ua_index = rng.integers(0, len(user_agents), num_events)
+    ua_contexts = np.asarray([json.dumps([{
+        'deviceFamily': 'iPhone' if 'iPhone' in user_agent else 'Desktop',
+        'osFamily': 'iOS' if 'iPhone' in user_agent else 'Windows',
+        'useragentFamily': 'Safari' if 'Safari' in user_agent else 'Chrome'
+    }]) for user_agent in user_agents], dtype=object)
+    yauaa_contexts = np.asarray([
+        json.dumps([{'agentClass': 'Browser', 'deviceClass': 'Phone' if 'Mobile' in user_agent else 'Desktop'}])
+        for user_agent in user_agents
+    ], dtype=object)
+    is_mobile = np.asarray(['TRUE' if 'Mobile' in user_agent else 'FALSE' for user_agent in user_agents], dtype=object)
+
+    web_vitals_template = ('[{"cls": %r, "fcp": %d, "fid": %d, "inp": %d, "lcp": %d, '
+                           '"navigation_type": "navigate", "ttfb": %d}]')
+    web_vitals = [web_vitals_template % values for values in zip(
+        np.round(rng.uniform(0.01, 0.1, num_events), 3).tolist(),
+        rng.integers(100, 501, num_events).tolist(),
+        rng.integers(10, 101, num_events).tolist(),
+        rng.integers(10, 101, num_events).tolist(),
+        rng.integers(1000, 3001, num_events).tolist(),
+        rng.integers(50, 301, num_events).tolist(),
+    )]
+
+    columns = dict.fromkeys(headers, '')
+    columns.update({
+        'app_id': 'default',
+        'platform': 'web',
+        'etl_tstamp': etl_us,
+        'collector_tstamp': collector_us,
+        'dvce_created_tstamp': dvce_created_us,
+        'event': planned('event', lambda: 'page_view'),
+        'event_id': _uuid4_column(rng, num_events),
+        'name_tracker': 'eng.gcp-dev1',
+        'v_tracker': 'js-2.17.2',
+        'v_collector': 'ssc-2.1.2-googlepubsub',
+        'v_etl': 'beam-enrich-1.4.2-rc1-common-1.4.2-rc1',
+        'user_fingerprint': _uuid4_column(rng, num_events),
+        'user_id': planned('user_id', lambda: ''),
+        'domain_userid': planned('domain_userid', lambda: _uuid4_column(rng, num_events)),
+        'domain_sessionidx': planned('domain_sessionidx', lambda: '1'),
+        'network_userid': planned('network_userid', lambda: _uuid4_column(rng, num_events)),
+        'geo_country': _choice_column(rng, countries, num_events),
+        'geo_city': _choice_column(rng, cities, num_events),
+        'geo_latitude': rng.uniform(-90, 90, num_events),
+        'geo_longitude': rng.uniform(-180, 180, num_events),
+        'page_url': planned('page_url', lambda: _choice_column(rng, pages, num_events)),
+        'page_title': planned('page_title', lambda: 'Sample Page'),
+        'page_referrer': 'https://www.google.com/',
+        'page_urlscheme': 'https',
+        'page_urlhost': 'example.com',
+        'page_urlport': '443',
+        'page_urlpath': planned('page_urlpath', lambda: '/'),
+        'refr_urlscheme': 'https',
+        'refr_urlhost': 'www.google.com',
+        'refr_urlport': '443',
+        'refr_urlpath': '/',
+        'refr_medium': 'search',
+        'refr_source': 'Google',
+        'useragent': np.asarray(user_agents, dtype=object)[ua_index].tolist(),
+        'br_lang': 'en-US',
+        'br_cookies': 'TRUE',
+        'br_colordepth': '24',
+        'br_viewwidth': rng.integers(800, 1921, num_events),
+        'br_viewheight': rng.integers(600, 1081, num_events),
+        'os_timezone': 'America/New_York',
+        'dvce_ismobile': is_mobile[ua_index].tolist(),
+        'dvce_screenwidth': rng.integers(320, 1921, num_events),
+        'dvce_screenheight': rng.integers(568, 1081, num_events),
+        'doc_charset': 'UTF-8',
+        'doc_width': rng.integers(800, 1921, num_events),
+        'doc_height': rng.integers(600, 1081, num_events),
+        'geo_timezone': 'America/New_York',
+        'dvce_sent_tstamp': dvce_created_us,
+        'domain_sessionid': planned('domain_sessionid', lambda: _uuid4_column(rng, num_events)),
+        'derived_tstamp': collector_us,
+        'event_vendor': 'com.snowplowanalytics.snowplow',
+        'event_name': planned('event_name', lambda: _choice_column(rng, event_names, num_events)),
+        'event_format': 'jsonschema',
+        'event_version': '1-0-0',
+        'event_fingerprint': _uuid4_column(rng, num_events),
+        'contexts_com_snowplowanalytics_snowplow_web_page_1': planned('contexts_com_snowplowanalytics_snowplow_web_page_1', lambda: [
+            '[{"id": "%s"}]' % page_id for page_id in _uuid4_column(rng, num_events)]),
+        'contexts_com_iab_snowplow_spiders_and_robots_1': json.dumps([{'category': 'BROWSER', 'spiderOrRobot': False}]),
+        'contexts_com_snowplowanalytics_snowplow_ua_parser_context_1': ua_contexts[ua_index].tolist(),
+        'contexts_nl_basjes_yauaa_context_1': yauaa_contexts[ua_index].tolist(),
+        'unstruct_event_com_snowplowanalytics_snowplow_web_vitals_1': web_vitals,
+    })
+
+    if anomalies:
+        edits = anomaly_edits(anomalies, num_events, lambda column, i: columns[column][i],
+                              random.Random(int(rng.integers(2 ** 63))),
+                              shift=_shift_epoch_us)
+        # Columns may share one array (derived_tstamp is collector_tstamp), so edited ones are copied first
+        edited = {}
+        for i, column, value in edits:
+            if column not in edited:
+                values = columns[column]
+                edited[column] = [values] * num_events if isinstance(values, str) else values.copy()
+            edited[column][i] = value
+        columns.update(edited)
+
+    if not typed:
+        # Shared arrays are formatted once
+        encoded = {}
+        for name, values in columns.items():
+            if isinstance(values, np.ndarray):
+                if id(values) not in encoded:
+                    encoded[id(values)] = event_schema.encode_csv(values, event_schema.COLUMN_TYPES[name])
+                columns[name] = encoded[id(values)]
+    return [columns[name] for name in headers]
+
+def _csv_field(value):
+    """Encode one value the way csv.writer does with the default QUOTE_MINIMAL dialect."""
+    if any(c in value for c in ',"\r\n'):
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
+def _csv_column(values):
+    """Encode a whole column, skipping per-value work when nothing needs quoting."""
+    if not any(c in '\x00'.join(values) for c in ',"\r\n'):
+        return values
+    if len(set(values)) < 256:
+        encoded = {value: _csv_field(value) for value in set(values)}
+        return [encoded[value] for value in values]
+    return [_csv_field(value) for value in values]
+
+def generate_event_lines(target_date, num_events=1000, rng=None, hour=None, profile=None, anomalies=None):
+    """
+    Generate sample Snowplow events for a specific date as encoded CSV lines.
+
+    Runs of constant columns are joined into a single segment up front, so each
+    line is assembled from a few dozen pieces instead of every individual field.
+    The output is byte-for-byte what csv.writer would produce for the same rows.
+    """
+    columns = generate_event_columns(target_date, num_events=num_events, rng=rng, hour=hour, profile=profile,
+                                     anomalies=anomalies)
+
+    segments = []
+    for column in columns:
+        if isinstance(column, str):
+            column = _csv_field(column)
+            if segments and isinstance(segments[-1], str):
+                segments[-1] += ',' + column
+                continue
+        else:
+            column = _csv_column(column)
+        segments.append(column)
+
+    # Fold the separators into the constant segments so rows are a plain concatenation
+    pieces = []
+    for i, segment in enumerate(segments):
+        suffix = ',' if i < len(segments) - 1 else '\r\n'
+        if isinstance(segment, str):
+            pieces.append(segment + suffix)
+        else:
+            pieces.append(segment)
+            pieces.append(suffix)
+    if num_events == 0:
+        return []
+    return [''.join(row) for row in zip(*(repeat(piece) if isinstance(piece, str) else piece for piece in pieces))]
+
 def write_events_csv(filename, events):
     """Write events to CSV file."""
     
-    # CSV headers based on the sample data - matching exact order from existing events.csv
-    headers = [
-        'app_id', 'platform', 'etl_tstamp', 'collector_tstamp', 'dvce_created_tstamp', 'event', 'event_id', 'txn_id', 'name_tracker', 'v_tracker',
-        'v_collector', 'v_etl', 'user_id', 'user_ipaddress', 'user_fingerprint', 'domain_userid', 'domain_sessionidx', 'network_userid', 'geo_country', 'geo_region',
-        'geo_city', 'geo_zipcode', 'geo_latitude', 'geo_longitude', 'geo_region_name', 'ip_isp', 'ip_organization', 'ip_domain', 'ip_netspeed', 'page_url',
-        'page_title', 'page_referrer', 'page_urlscheme', 'page_urlhost', 'page_urlport', 'page_urlpath', 'page_urlquery', 'page_urlfragment', 'refr_urlscheme', 'refr_urlhost',
-        'refr_urlport', 'refr_urlpath', 'refr_urlquery', 'refr_urlfragment', 'refr_medium', 'refr_source', 'refr_term', 'mkt_medium', 'mkt_source', 'mkt_term',
-        'mkt_content', 'mkt_campaign', 'se_category', 'se_action', 'se_label', 'se_property', 'se_value', 'tr_orderid', 'tr_affiliation', 'tr_total', 'tr_tax',
-        'tr_shipping', 'tr_city', 'tr_state', 'tr_country', 'ti_orderid', 'ti_sku', 'ti_name', 'ti_category', 'ti_price', 'ti_quantity', 'pp_xoffset_min', 'pp_xoffset_max',
-        'pp_yoffset_min', 'pp_yoffset_max', 'useragent', 'br_name', 'br_family', 'br_version', 'br_type', 'br_renderengine', 'br_lang', 'br_features_pdf', 'br_features_flash',
-        'br_features_java', 'br_features_director', 'br_features_quicktime', 'br_features_realplayer', 'br_features_windowsmedia', 'br_features_gears', 'br_features_silverlight',
-        'br_cookies', 'br_colordepth', 'br_viewwidth', 'br_viewheight', 'os_name', 'os_family', 'os_manufacturer', 'os_timezone', 'dvce_type', 'dvce_ismobile', 'dvce_screenwidth',
-        'dvce_screenheight', 'doc_charset', 'doc_width', 'doc_height', 'tr_currency', 'tr_total_base', 'tr_tax_base', 'tr_shipping_base', 'ti_currency', 'ti_price_base',
-        'base_currency', 'geo_timezone', 'mkt_clickid', 'mkt_network', 'etl_tags', 'dvce_sent_tstamp', 'refr_domain_userid', 'refr_dvce_tstamp', 'domain_sessionid', 'derived_tstamp',
-        'event_vendor', 'event_name', 'event_format', 'event_version', 'event_fingerprint', 'true_tstamp', 'load_tstamp', 'contexts_com_snowplowanalytics_snowplow_web_page_1',
-        'unstruct_event_com_snowplowanalytics_snowplow_consent_preferences_1', 'unstruct_event_com_snowplowanalytics_snowplow_cmp_visible_1',
-        'contexts_com_iab_snowplow_spiders_and_robots_1', 'contexts_com_snowplowanalytics_snowplow_ua_parser_context_1', 'contexts_nl_basjes_yauaa_context_1',
-        'unstruct_event_com_snowplowanalytics_snowplow_web_vitals_1'
-    ]
-    
     with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
         writer = csv.writer(csvfile)
         writer.writerow(headers)
@@ -257,18 +882,372 @@ def write_events_csv(filename, events):
     
     print(f"Generated {len(events)} events in {filename}")
 
+# Rows per shard. Shard boundaries and seeds depend only on this and the run seed,
+# never on the number of workers, so a seed always produces the same bytes.
+# A shard is also the unit that is held in memory, so it is kept small.
+SHARD_ROWS = 20_000
+
+# Output files are written through a buffer of this size
+WRITE_BUFFER_BYTES = 1 << 20
+
+def shard_seed(seed, target_date, shard_index):
+    """Derive the 64-bit seed of one shard from the run seed, the day and the shard index."""
+    digest = hashlib.sha256(f"{seed}:{target_date.isoformat()}:{shard_index}".encode()).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+def generate_shard(engine, target_date, shard_index, num_events, seed, hour=None, profile=None, anomalies=None):
+    """
+    Generate one shard of events as UTF-8 encoded CSV rows without a header.
+
+    Runs inside a worker process, so it only takes and returns picklable values.
+
+    Returns:
+        tuple: (number of rows, CSV bytes)
+    """
+    rng_seed = shard_seed(seed, target_date, shard_index)
+    if engine == 'numpy':
+        _require_numpy()
+        text = ''.join(generate_event_lines(target_date, num_events, rng=np.random.default_rng(rng_seed), hour=hour,
+                                            profile=profile, anomalies=anomalies))
+    else:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(generate_event_data(target_date, num_events, rng=random.Random(rng_seed), hour=hour,
+                                                         profile=profile, anomalies=anomalies))
+        text = buffer.getvalue()
+    return num_events, text.encode('utf-8')
+
+def shard_tasks(engine, target_date, num_events, seed, shard_rows=SHARD_ROWS, by_hour=False, profile=None,
+                anomalies=None):
+    """
+    Split one day of num_events rows into fixed-size shard tasks.
+
+    With by_hour the day is first split into 24 hours and every shard stays
+    within one hour, which is what the date/hour partitioned Parquet output needs.
+    Every shard plans its own sessions from the workload profile and mixes in
+    its own late, duplicate and bot events.
+
+    Returns:
+        list: (engine, target_date, shard_index, num_events, seed, hour, profile, anomalies) tuples
+    """
+    if not by_hour:
+        return [(engine, target_date, index, min(shard_rows, num_events - start), seed, None, profile, anomalies)
+                for index, start in enumerate(range(0, num_events, shard_rows))]
+    
+    tasks = []
+    for hour in range(24):
+        hour_rows = num_events // 24 + (1 if hour < num_events % 24 else 0)
+        for start in range(0, hour_rows, shard_rows):
+            tasks.append((engine, target_date, len(tasks), min(shard_rows, hour_rows - start), seed, hour, profile,
+                          anomalies))
+    return tasks
+
+def window_tasks(engine, start, hours, num_events, seed, shard_rows=SHARD_ROWS, profile=None, anomalies=None):
+    """
+    Split num_events rows over `hours` consecutive hours from `start` into shard tasks.
+
+    Shard indexes are numbered per hour of the day, so consecutive windows on the
+    same day never repeat a shard seed and never produce the same events.
+
+    Returns:
+        list: (engine, target_date, shard_index, num_events, seed, hour, profile, anomalies) tuples
+    """
+    tasks = []
+    for offset in range(hours):
+        slot = start + timedelta(hours=offset)
+        hour_rows = num_events // hours + (1 if offset < num_events % hours else 0)
+        for index, row_start in enumerate(range(0, hour_rows, shard_rows)):
+            tasks.append((engine, slot.date(), slot.hour * 1000 + index,
+                          min(shard_rows, hour_rows - row_start), seed, slot.hour, profile, anomalies))
+    return tasks
+
+def iter_shards(tasks, executor=None, window=2, worker=generate_shard):
+    """
+    Yield shard results in shard order as a stream.
+
+    With a process pool at most `window` shards are in flight or waiting to be
+    written at any time, so memory stays flat no matter how many rows are requested.
+    """
+    if executor is None:
+        for task in tasks:
+            yield worker(*task)
+        return
+    
+    pending = deque()
+    for task in tasks:
+        pending.append(executor.submit(worker, *task))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def open_event_csv(filename):
+    """Open a buffered binary CSV file for streaming shards and write the header."""
+    # A previous file may be a hardlink into the dataset cache, so it is replaced rather than truncated
+    if os.path.lexists(filename):
+        os.remove(filename)
+    csvfile = open(filename, 'wb', buffering=WRITE_BUFFER_BYTES)
+    csvfile.write((','.join(headers) + '\r\n').encode('utf-8'))
+    return csvfile
+
+def write_shards(shards, *csvfiles):
+    """
+    Stream shard results into one or more open CSV files.
+
+    Returns:
+        int: Number of rows written to each file
+    """
+    total_rows = 0
+    for rows, data in shards:
+        for csvfile in csvfiles:
+            csvfile.write(data)
+        total_rows += rows
+    return total_rows
+
+# Parquet files are compressed with this codec
+PARQUET_COMPRESSION = 'zstd'
+
+@lru_cache(maxsize=None)
+def arrow_schema():
+    """Build the Arrow schema of the events table in header order."""
+    return event_schema.arrow_schema()
+
+def events_to_arrow(columns, num_events):
+    """
+    Convert generated columns into a typed Arrow table.
+
+    Typed numpy columns are converted directly, and text columns are cast to
+    the column type of the events table with empty strings as NULLs.
+    """
+    schema = arrow_schema()
+    arrays = [event_schema.encode_arrow(column, field, num_events) for column, field in zip(columns, schema)]
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+def generate_arrow_shard(engine, target_date, shard_index, num_events, seed, hour=None, profile=None, anomalies=None):
+    """
+    Generate one shard of events as a typed Arrow table.
+
+    Returns:
+        tuple: (number of rows, pyarrow.Table)
+    """
+    rng_seed = shard_seed(seed, target_date, shard_index)
+    if engine == 'numpy':
+        _require_numpy()
+        columns = generate_event_columns(target_date, num_events, rng=np.random.default_rng(rng_seed), hour=hour,
+                                         profile=profile, anomalies=anomalies, typed=True)
+    else:
+        rows = generate_event_data(target_date, num_events, rng=random.Random(rng_seed), hour=hour, profile=profile,
+                                   anomalies=anomalies)
+        columns = list(zip(*rows))
+    return num_events, events_to_arrow(columns, num_events)
+
+def generate_parquet_shard(output_dir, engine, target_date, shard_index, num_events, seed, hour, profile=None,
+                           anomalies=None):
+    """
+    Generate one shard of events and write it as a Parquet file in its date/hour partition.
+
+    Runs inside a worker process so compression scales with the workers too.
+
+    Returns:
+        tuple: (number of rows, path of the written file)
+    """
+    _, table = generate_arrow_shard(engine, target_date, shard_index, num_events, seed, hour, profile, anomalies)
+    
+    partition_dir = os.path.join(output_dir, f"date={target_date.isoformat()}", f"hour={hour:02d}")
+    os.makedirs(partition_dir, exist_ok=True)
+    path = os.path.join(partition_dir, f"part-{shard_index:05d}.parquet")
+    pq.write_table(table, path, compression=PARQUET_COMPRESSION)
+    return num_events, path
+
+def write_parquet_shards(output_dir, tasks, executor=None, window=2):
+    """
+    Generate shards straight into a partitioned Parquet dataset directory.
+
+    Returns:
+        int: Number of rows written
+    """
+    worker = partial(generate_parquet_shard, output_dir)
+    return sum(rows for rows, _ in iter_shards(tasks, executor, window=window, worker=worker))
+
+def link_dataset(source_dir, target_dir):
+    """Hardlink every file of a dataset directory into another one, copying when links are not possible."""
+    for root, _, files in os.walk(source_dir):
+        target_root = os.path.join(target_dir, os.path.relpath(root, source_dir))
+        os.makedirs(target_root, exist_ok=True)
+        for name in files:
+            try:
+                os.link(os.path.join(root, name), os.path.join(target_root, name))
+            except OSError:
+                shutil.copy2(os.path.join(root, name), os.path.join(target_root, name))
+
+def add_workload_arguments(parser):
+    """Add the profile overrides and the late, duplicate and bot event knobs to an argument parser."""
+    parser.add_argument('--users', type=int, default=None, help='Size of the user pool of the profile (web: 100000)')
+    parser.add_argument('--pages', type=int, default=None, help='Number of distinct pages of the profile (web: 1000)')
+    parser.add_argument('--user-skew', type=float, default=None, help='Zipf exponent of sessions per user (web: 1.1)')
+    parser.add_argument('--page-skew', type=float, default=None, help='Zipf exponent of views per page (web: 1.2)')
+    parser.add_argument('--events-per-session', type=float, default=None,
+                        help='Mean of the geometric events-per-session distribution (web: 8)')
+    parser.add_argument('--heartbeat', type=int, default=None,
+                        help='Seconds between page pings, keep it equal to snowplow__heartbeat (web: 10)')
+    parser.add_argument('--late-share', type=float, default=0.0,
+                        help='Share of late events, created on the device --late-lag-hours before collection (default: 0)')
+    parser.add_argument('--delayed-share', type=float, default=0.0,
+                        help='Share of delayed events, collected --late-lag-hours earlier but only in this batch (default: 0)')
+    parser.add_argument('--late-lag', choices=sorted(LAG_DISTRIBUTIONS), default='exponential',
+                        help='Distribution of the lag of late and delayed events (default: exponential)')
+    parser.add_argument('--late-lag-hours', type=float, default=24.0,
+                        help='Mean lag of late and delayed events in hours (default: 24)')
+    parser.add_argument('--duplicate-share', type=float, default=0.0,
+                        help='Share of events that reuse the event_id of another event (default: 0)')
+    parser.add_argument('--bot-share', type=float, default=0.0,
+                        help='Share of sessions from spiders and robots (default: 0)')
+
+def parse_args(argv=None):
+    """Parse command line arguments."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Generate Snowplow events CSV files for yesterday and today')
+    parser.add_argument('num_rows', nargs='?', default='1000', help='Number of rows to generate per day (default: 1000)')
+    parser.add_argument('--engine', choices=['python', 'numpy'], default='python',
+                        help='Row-by-row python engine or columnar numpy batch engine (default: python)')
+    parser.add_argument('--workers', type=int, default=1, help='Worker processes generating shards in parallel (default: 1)')
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv',
+                        help='CSV files, or Parquet datasets partitioned by collector_tstamp date and hour (default: csv)')
+    parser.add_argument('--append-only', action='store_true',
+                        help="Write only today's events to events_today instead of yesterday's + today's")
+    parser.add_argument('--seed', type=int, default=None,
+                        help='Seed for reproducible output; the same seed gives the same files for any --workers')
+    parser.add_argument('--window-start', default=None, metavar='YYYY-MM-DDTHH',
+                        help='Instead of yesterday and today, write one batch of num_rows events starting at this hour')
+    parser.add_argument('--window-hours', type=int, default=1, help='Hours the --window-start batch covers (default: 1)')
+    parser.add_argument('--output', default=None,
+                        help='Output of the --window-start batch (default: events_batch.csv, or events_batch/ for parquet)')
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='flat',
+                        help="Workload profile: 'flat' makes every event its own user and session, 'web' generates "
+                             "multi-event sessions of Zipf-distributed returning users (default: flat)")
+    add_workload_arguments(parser)
+    parser.add_argument('--cache', action='store_true',
+                        help='Reuse identical earlier output from the dataset cache, hardlinked into place (needs --seed)')
+    parser.add_argument('--cache-dir', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), '.dataset_cache'),
+                        help='Dataset cache directory (default: .dataset_cache next to this script)')
+    parser.add_argument('--cache-max-gb', type=float, default=20.0,
+                        help='Evict least recently used datasets beyond this size (default: 20)')
+    args = parser.parse_args(argv)
+
+    try:
+        args.num_rows = int(args.num_rows)
+    except ValueError:
+        print(f"Error: '{args.num_rows}' is not a valid number. Using default 1000 rows.")
+        args.num_rows = 1000
+    return args
+
+def profile_from_args(args, seed):
+    """Resolve the --profile of parsed arguments and its overrides (see add_workload_arguments)."""
+    return workload_profile(args.profile, seed, users=args.users, pages=args.pages, user_skew=args.user_skew,
+                            page_skew=args.page_skew, events_per_session=args.events_per_session,
+                            heartbeat=args.heartbeat)
+
+def anomalies_from_args(args):
+    """Collect the late, duplicate and bot event knobs of parsed arguments."""
+    return anomaly_settings(late_share=args.late_share, delayed_share=args.delayed_share, late_lag=args.late_lag,
+                            late_lag_hours=args.late_lag_hours, duplicate_share=args.duplicate_share,
+                            bot_share=args.bot_share)
+
+def cache_lookup(args, seed, window, outputs):
+    """
+    Look up this generation in the dataset cache when --cache is given.
+
+    On a hit the cached files are hardlinked into the outputs.
+
+    Args:
+        args (argparse.Namespace): Parsed arguments
+        seed (int): Run seed
+        window (list): Dates or window start and hours the events cover
+        outputs (list): Output files and directories
+
+    Returns:
+        tuple: (key to store the outputs under, parameters); the key is None on a
+            hit, and both are None when the cache is not used
+    """
+    if not args.cache:
+        return None, None
+    if args.seed is None:
+        print("⚠ --cache needs a fixed --seed, generating without the dataset cache")
+        return None, None
+    
+    import dataset_cache
+    params = {
+        'rows': args.num_rows,
+        'seed': seed,
+        'window': window,
+        'append_only': args.append_only,
+        'format': args.format,
+        'engine': args.engine,
+        'shard_rows': SHARD_ROWS,
+        'profile': profile_from_args(args, seed),
+        'anomalies': anomalies_from_args(args),
+    }
+    key = dataset_cache.cache_key(params)
+    if dataset_cache.restore(key, outputs, args.cache_dir):
+        print(f"✓ Reused cached dataset {key[:12]} for {', '.join(map(str, outputs))}")
+        return None, params
+    return key, params
+
+def cache_store(args, key, params, outputs):
+    """Publish freshly generated outputs under the key from cache_lookup and trim the cache."""
+    if key is None:
+        return
+    
+    import dataset_cache
+    if dataset_cache.publish(key, outputs, params, args.cache_dir):
+        print(f"✓ Cached dataset {key[:12]} in {args.cache_dir}")
+    evicted = dataset_cache.evict(int(args.cache_max_gb * 1e9), keep=key, cache_dir=args.cache_dir)
+    if evicted:
+        print(f"  Evicted {len(evicted)} least recently used dataset(s) over {args.cache_max_gb:g} GB")
+
+def generate_window(args, seed):
+    """Generate one time-sliced batch of events, e.g. one cycle of a soak run."""
+    
+    start = datetime.strptime(args.window_start, '%Y-%m-%dT%H')
+    end = start + timedelta(hours=args.window_hours)
+    output = args.output or ('events_batch' if args.format == 'parquet' else 'events_batch.csv')
+    print(f"Generating {args.num_rows} events from {start} to {end} into {output}")
+    print(f"  Seed: {seed} ({args.engine} engine, {args.workers} worker(s), {args.profile} profile)")
+    
+    cache_key, params = cache_lookup(args, seed, [args.window_start, args.window_hours], [output])
+    if cache_key is None and params is not None:
+        return
+    
+    executor = None
+    if args.workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        executor = ProcessPoolExecutor(max_workers=args.workers)
+    
+    tasks = window_tasks(args.engine, start, args.window_hours, args.num_rows, seed, profile=profile_from_args(args, seed),
+                         anomalies=anomalies_from_args(args))
+    try:
+        if args.format == 'parquet':
+            shutil.rmtree(output, ignore_errors=True)
+            rows = write_parquet_shards(output, tasks, executor, 2 * args.workers)
+        else:
+            with open_event_csv(output) as batch_file:
+                rows = write_shards(iter_shards(tasks, executor, 2 * args.workers), batch_file)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    print(f"Generated {rows} events in {output}")
+    cache_store(args, cache_key, params, [output])
+
 def main():
     """Generate events for yesterday and today."""
     
-    # Get number of rows from command line argument, default to 1000
-    import sys
-    num_events = 1000
-    if len(sys.argv) > 1:
-        try:
-            num_events = int(sys.argv[1])
-        except ValueError:
-            print(f"Error: '{sys.argv[1]}' is not a valid number. Using default 1000 rows.")
-            num_events = 1000
+    args = parse_args()
+    num_events = args.num_rows
+    seed = args.seed if args.seed is not None else random.SystemRandom().randrange(2 ** 63)
+    
+    if args.window_start:
+        generate_window(args, seed)
+        return
     
     # Calculate dates
     today = datetime.now().date()
@@ -277,21 +1256,63 @@ def main():
     print(f"Generating events for:")
     print(f"  Yesterday: {yesterday} ({num_events} rows)")
     print(f"  Today: {today} ({num_events} rows)")
+    print(f"  Seed: {seed} ({args.engine} engine, {args.workers} worker(s), {args.profile} profile)")
+    profile = profile_from_args(args, seed)
+    anomalies = anomalies_from_args(args)
+    
+    if args.format == 'parquet':
+        outputs = ('events_yesterday', 'events_today')
+    else:
+        outputs = ('events_yesterday.csv', 'events_today.csv')
+    cache_key, params = cache_lookup(args, seed, [yesterday.isoformat(), today.isoformat()], outputs)
+    if cache_key is None and params is not None:
+        return
+    
+    executor = None
+    if args.workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        executor = ProcessPoolExecutor(max_workers=args.workers)
     
-    # Generate events for yesterday
-    yesterday_events = generate_event_data(yesterday, num_events=num_events)
-    write_events_csv('events_yesterday.csv', yesterday_events)
+    window = 2 * args.workers
+    try:
+        if args.format == 'parquet':
+            for output_dir in ('events_yesterday', 'events_today'):
+                shutil.rmtree(output_dir, ignore_errors=True)
+            tasks = shard_tasks(args.engine, yesterday, num_events, seed, by_hour=True, profile=profile, anomalies=anomalies)
+            yesterday_rows = write_parquet_shards('events_yesterday', tasks, executor, window)
+            if not args.append_only:
+                # events_today holds yesterday's partitions too, linked rather than rewritten
+                link_dataset('events_yesterday', 'events_today')
+            
+            tasks = shard_tasks(args.engine, today, num_events, seed, by_hour=True, profile=profile, anomalies=anomalies)
+            today_rows = write_parquet_shards('events_today', tasks, executor, window)
+        else:
+            with open_event_csv('events_yesterday.csv') as yesterday_file, open_event_csv('events_today.csv') as today_file:
+                # Stream yesterday's events into both files, then today's events after them
+                yesterday_files = (yesterday_file,) if args.append_only else (yesterday_file, today_file)
+                tasks = shard_tasks(args.engine, yesterday, num_events, seed, profile=profile, anomalies=anomalies)
+                yesterday_rows = write_shards(iter_shards(tasks, executor, window), *yesterday_files)
+                
+                tasks = shard_tasks(args.engine, today, num_events, seed, profile=profile, anomalies=anomalies)
+                today_rows = write_shards(iter_shards(tasks, executor, window), today_file)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    cache_store(args, cache_key, params, outputs)
     
-    # Generate events for today
-    today_events = generate_event_data(today, num_events=num_events)
+    if args.format == 'parquet':
+        outputs = tuple(output + '/' for output in outputs)
     
-    # Combine yesterday's and today's events for events_today.csv
-    combined_events = yesterday_events + today_events
-    write_events_csv('events_today.csv', combined_events)
+    today_total = today_rows if args.append_only else yesterday_rows + today_rows
+    print(f"Generated {yesterday_rows} events in {outputs[0]}")
+    print(f"Generated {today_total} events in {outputs[1]}")
     
     print("\nFiles generated:")
-    print("  - events_yesterday.csv (yesterday's events only)")
-    print("  - events_today.csv (yesterday's + today's events combined)")
+    print(f"  - {outputs[0]} (yesterday's events only)")
+    if args.append_only:
+        print(f"  - {outputs[1]} (today's events only, append to the previous batch)")
+    else:
+        print(f"  - {outputs[1]} (yesterday's + today's events combined)")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
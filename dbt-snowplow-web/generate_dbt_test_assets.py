@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
 import os
 import argparse
-import pandas as pd
-import plotly.graph_objects as go
 import re
+import json
+import math
+from xml.sax.saxutils import escape
 
 def parse_top_errors(file_path='assets/top_errors.txt'):
     """
@@ -30,6 +31,64 @@ def parse_top_errors(file_path='assets/top_errors.txt'):
         print(f"Error parsing {file_path}: {str(e)}")
         return None
 
+def load_run_stats(file_path='assets/run_stats.json'):
+    """
+    Read the run summary from run_stats.json written by analyze_log.py.
+
+    Args:
+        file_path (str): Path to run_stats.json
+
+    Returns:
+        dict: Dictionary with PASS, ERROR, SKIP, TOTAL, WARN values
+    """
+    try:
+        with open(file_path, 'r') as f:
+            summary = json.load(f)['summary']
+        return {key: summary[key] for key in ['PASS', 'ERROR', 'SKIP', 'TOTAL', 'WARN']}
+    except Exception as e:
+        print(f"Error parsing {file_path}: {str(e)}")
+        return None
+
+def badge_svg(label_text, value_text, color, opacity=1.0):
+    """
+    Render a flat two-part badge, a grey label next to a colored value.
+
+    Args:
+        label_text (str): Text on the left
+        value_text (str): Text on the colored right part
+        color (str): Fill color of the value part
+        opacity (float): Fill opacity of the value part
+
+    Returns:
+        str: The badge SVG
+    """
+    # Calculate widths
+    label_width = len(label_text) * 7 + 10  # Width based on text length plus padding
+    value_width = max(len(value_text) * 8, 40)  # Width based on value text length
+    total_width = label_width + value_width
+
+    # Create SVG badge
+    return f'''<svg xmlns="http://www.w3.org/2000/svg" width="{total_width}" height="20">
+  <linearGradient id="b" x2="0" y2="100%">
+    <stop offset="0" stop-color="#bbb" stop-opacity=".1"/>
+    <stop offset="1" stop-opacity=".1"/>
+  </linearGradient>
+  <mask id="a">
+    <rect width="{total_width}" height="20" rx="3" fill="#fff"/>
+  </mask>
+  <g mask="url(#a)">
+    <path fill="#555" d="M0 0h{label_width}v20H0z"/>
+    <path fill="{color}" fill-opacity="{opacity:.2f}" d="M{label_width} 0h{value_width}v20H{label_width}z"/>
+    <path fill="url(#b)" d="M0 0h{total_width}v20H0z"/>
+  </g>
+  <g fill="#fff" text-anchor="middle" font-family="DejaVu Sans,Verdana,Geneva,sans-serif" font-size="11">
+    <text x="{label_width / 2}" y="15" fill="#010101" fill-opacity=".3">{label_text}</text>
+    <text x="{label_width / 2}" y="14">{label_text}</text>
+    <text x="{label_width + value_width / 2}" y="15" fill="#010101" fill-opacity=".3">{value_text}</text>
+    <text x="{label_width + value_width / 2}" y="14">{value_text}</text>
+  </g>
+</svg>'''
+
 def generate_badge(success_rate, output_dir='assets'):
     """
     Generate SVG badge showing DBT success rate percentage.
@@ -61,35 +120,7 @@ def generate_badge(success_rate, output_dir='assets'):
     # Format percentage to one decimal place
     pct_text = f"{success_rate:.1f}%"
 
-    # Label text for the badge
-    label_text = "DBT Snowplow Web Success Rate"
-
-    # Calculate widths
-    label_width = len(label_text) * 7 + 10  # Width based on text length plus padding
-    pct_width = max(len(pct_text) * 8, 40)  # Width based on percentage text length
-    total_width = label_width + pct_width
-
-    # Create SVG badge
-    svg = f'''<svg xmlns="http://www.w3.org/2000/svg" width="{total_width}" height="20">
-  <linearGradient id="b" x2="0" y2="100%">
-    <stop offset="0" stop-color="#bbb" stop-opacity=".1"/>
-    <stop offset="1" stop-opacity=".1"/>
-  </linearGradient>
-  <mask id="a">
-    <rect width="{total_width}" height="20" rx="3" fill="#fff"/>
-  </mask>
-  <g mask="url(#a)">
-    <path fill="#555" d="M0 0h{label_width}v20H0z"/>
-    <path fill="{color}" fill-opacity="{opacity:.2f}" d="M{label_width} 0h{pct_width}v20H{label_width}z"/>
-    <path fill="url(#b)" d="M0 0h{total_width}v20H0z"/>
-  </g>
-  <g fill="#fff" text-anchor="middle" font-family="DejaVu Sans,Verdana,Geneva,sans-serif" font-size="11">
-    <text x="{label_width / 2}" y="15" fill="#010101" fill-opacity=".3">{label_text}</text>
-    <text x="{label_width / 2}" y="14">{label_text}</text>
-    <text x="{label_width + pct_width / 2}" y="15" fill="#010101" fill-opacity=".3">{pct_text}</text>
-    <text x="{label_width + pct_width / 2}" y="14">{pct_text}</text>
-  </g>
-</svg>'''
+    svg = badge_svg("DBT Snowplow Web Success Rate", pct_text, color, opacity)
 
     try:
         # Write SVG to file
@@ -107,26 +138,161 @@ def generate_badge(success_rate, output_dir='assets'):
         print(f"Error generating badge: {str(e)}")
         return None
 
-def generate_dbt_chart(output_dir='assets', errors_file='assets/top_errors.txt'):
+def svg_to_png(svg_file, png_file):
+    """
+    Convert an SVG chart to PNG with cairosvg, imported only when a PNG is requested.
+
+    Args:
+        svg_file (str): Path to the SVG file
+        png_file (str): Path to write the PNG to
+
+    Returns:
+        str: Path to the PNG file
+    """
+    try:
+        import cairosvg
+    except (ImportError, OSError):
+        # OSError: cairosvg is installed but the cairo library is missing
+        raise RuntimeError("PNG output requires cairosvg and cairo. Install them with: pip install cairosvg")
+    cairosvg.svg2png(url=svg_file, write_to=png_file)
+    return png_file
+
+def svg_document(width, height, shapes):
+    """Wrap SVG elements into a document with a white background and the badge's font."""
+    body = '\n'.join(f"    {shape}" for shape in shapes)
+    return f'''<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" viewBox="0 0 {width} {height}">
+  <rect width="{width}" height="{height}" fill="#fff"/>
+  <g font-family="DejaVu Sans,Verdana,Geneva,sans-serif">
+{body}
+  </g>
+</svg>'''
+
+def write_chart(svg, output_dir, name, png=False):
+    """
+    Write an SVG chart, and a PNG copy of it when requested.
+
+    Returns:
+        str: Path to the PNG file when png is set, otherwise to the SVG file
+    """
+    svg_file = os.path.join(output_dir, f"{name}.svg")
+    with open(svg_file, 'w') as f:
+        f.write(svg)
+    print(f"Chart saved to {svg_file}")
+    if not png:
+        return svg_file
+    png_file = svg_to_png(svg_file, os.path.join(output_dir, f"{name}.png"))
+    print(f"Chart saved to {png_file}")
+    return png_file
+
+# Line colors of multi-series charts, in plotly's default order
+SERIES_COLORS = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b', '#e377c2', '#7f7f7f']
+
+def _axis_ticks(low, high, log):
+    """Tick values of an axis: powers of ten on a log axis, five even steps otherwise."""
+    if not log:
+        return [low + (high - low) * step / 4 for step in range(5)]
+    ticks = [10 ** exponent for exponent in range(math.floor(math.log10(low)), math.ceil(math.log10(high)) + 1)]
+    return [tick for tick in ticks if low <= tick <= high] or [low, high]
+
+def line_chart_svg(title, x_title, y_title, series, log_x=False, log_y=False, styles=None, width=900, height=450):
+    """
+    Draw a line chart of numeric (x, y) series, optionally with logarithmic axes.
+
+    Args:
+        title (str): Chart title
+        x_title (str): X axis title
+        y_title (str): Y axis title
+        series (dict): Series name -> list of (x, y); points with a None y are skipped
+        log_x (bool): Logarithmic x axis
+        log_y (bool): Logarithmic y axis
+        styles (dict): Series name -> dict with color, width and dash overrides
+
+    Returns:
+        str: The chart SVG
+    """
+    styles = styles or {}
+    left, right, top, bottom = 70, 220, 40, 50
+    plot_width, plot_height = width - left - right, height - top - bottom
+    points = {name: [(x, y) for x, y in values if y is not None and (not log_x or x > 0) and (not log_y or y > 0)]
+              for name, values in series.items()}
+    xs = [x for values in points.values() for x, _ in values] or [1]
+    ys = [y for values in points.values() for _, y in values] or [1]
+    x_low, x_high = min(xs), max(xs)
+    if log_y:
+        y_low, y_high = min(ys), max(ys)
+    else:
+        y_low, y_high = 0.0, max(ys + [0.0]) * 1.1 or 1.0
+    if x_high == x_low:
+        x_high = x_low * 10 if log_x else x_low + 1
+    if y_high == y_low:
+        y_high = y_low * 10
+
+    def scaled(value, low, high, log):
+        if log:
+            return (math.log10(value) - math.log10(low)) / (math.log10(high) - math.log10(low))
+        return (value - low) / (high - low)
+
+    def x_of(value):
+        return left + scaled(value, x_low, x_high, log_x) * plot_width
+
+    def y_of(value):
+        return top + plot_height - scaled(value, y_low, y_high, log_y) * plot_height
+
+    shapes = [f'<text x="{left + plot_width / 2}" y="22" fill="#000" font-size="12" text-anchor="middle">{escape(title)}</text>',
+              f'<line x1="{left}" y1="{top + plot_height}" x2="{left + plot_width}" y2="{top + plot_height}" stroke="#999"/>',
+              f'<line x1="{left}" y1="{top}" x2="{left}" y2="{top + plot_height}" stroke="#999"/>',
+              f'<text x="{left + plot_width / 2}" y="{height - 10}" fill="#444" font-size="10" text-anchor="middle">{escape(x_title)}</text>',
+              f'<text x="14" y="{top + plot_height / 2}" fill="#444" font-size="10" text-anchor="middle" '
+              f'transform="rotate(-90 14 {top + plot_height / 2})">{escape(y_title)}</text>']
+    for value in _axis_ticks(y_low, y_high, log_y):
+        shapes.append(f'<text x="{left - 6}" y="{y_of(value) + 3:.1f}" fill="#444" font-size="9" text-anchor="end">{value:.4g}</text>')
+        shapes.append(f'<line x1="{left}" y1="{y_of(value):.1f}" x2="{left + plot_width}" y2="{y_of(value):.1f}" stroke="#eee"/>')
+    for value in _axis_ticks(x_low, x_high, log_x):
+        shapes.append(f'<text x="{x_of(value):.1f}" y="{top + plot_height + 14}" fill="#444" font-size="9" '
+                      f'text-anchor="middle">{value:.4g}</text>')
+
+    for index, (name, values) in enumerate(points.items()):
+        style = styles.get(name, {})
+        color = style.get('color', SERIES_COLORS[index % len(SERIES_COLORS)])
+        dash = f' stroke-dasharray="{style["dash"]}"' if style.get('dash') else ''
+        coordinates = [(x_of(x), y_of(y)) for x, y in values]
+        if len(coordinates) > 1:
+            path = ' '.join(f"{x:.1f},{y:.1f}" for x, y in coordinates)
+            shapes.append(f'<polyline points="{path}" fill="none" stroke="{color}" stroke-width="{style.get("width", 2)}"{dash}/>')
+        if not dash:
+            shapes.extend(f'<circle cx="{x:.1f}" cy="{y:.1f}" r="2.5" fill="{color}"/>' for x, y in coordinates)
+        legend_y = top + 14 * index
+        shapes.append(f'<rect x="{width - right + 15}" y="{legend_y}" width="10" height="10" fill="{color}"/>')
+        shapes.append(f'<text x="{width - right + 30}" y="{legend_y + 9}" fill="#444" font-size="9">{escape(name)}</text>')
+    return svg_document(width, height, shapes)
+
+def generate_dbt_chart(output_dir='assets', errors_file='assets/top_errors.txt', stats_file=None, png=False):
     """
     Generate a horizontal stacked bar chart for DBT run status with custom colors and labels,
     and a badge for DBT success rate.
 
+    The chart is written as plain SVG like the badge, so no plotting library or
+    headless browser is started; pass png to also convert it to PNG.
+
     Args:
         output_dir (str): Directory to save the chart and badge
-        errors_file (str): Path to top_errors.txt
+        errors_file (str): Path to top_errors.txt, used when there is no stats_file
+        stats_file (str): Path to run_stats.json written by analyze_log.py
+        png (bool): Also write dbt_run_status.png
 
     Returns:
         tuple: (Path to chart, Path to badge) or (None, None) if failed
     """
     os.makedirs(output_dir, exist_ok=True)
-    chart_output_file = os.path.join(output_dir, 'dbt_run_status.png')
 
     try:
-        # Parse data from top_errors.txt
-        data = parse_top_errors(errors_file)
+        # Read the run summary, from run_stats.json when analyze_log.py wrote one
+        if stats_file and os.path.exists(stats_file):
+            data = load_run_stats(stats_file)
+        else:
+            data = parse_top_errors(errors_file)
         if not data:
-            raise ValueError("Failed to parse top_errors.txt")
+            raise ValueError("Failed to read the run summary")
 
         # Calculate success rate (PASS / TOTAL * 100)
         success_rate = (data['PASS'] / data['TOTAL'] * 100) if data['TOTAL'] > 0 else 0
@@ -136,70 +302,127 @@ def generate_dbt_chart(output_dir='assets', errors_file='assets/top_errors.txt')
 
         # Exclude WARN if 0
         statuses = ['PASS', 'ERROR', 'SKIP']
-        counts = [data['PASS'], data['ERROR'], data['SKIP']]
-
-        df = pd.DataFrame({
-            'Status': statuses,
-            'Count': counts
-        })
-
-        fig = go.Figure(data=[
-            go.Bar(
-                y=['DBT Run'],
-                x=[df.loc[df['Status'] == status, 'Count'].iloc[0]],
-                name=status,
-                marker_color=color,
-                orientation='h',
-                text=[df.loc[df['Status'] == status, 'Count'].iloc[0]],
-                textposition='inside',
-                textfont=dict(size=14, color='white')
-            ) for status, color in zip(
-                statuses,
-                ['#008000', '#FF0000', '#FFA500']  # Dark Green, Red, Orange
-            )
-        ])
-
-        fig.update_layout(
-            barmode='stack',
-            title=dict(
-                text=f"",
-                font=dict(size=12, color='black'),
-                y=0.9,
-                x=0.5,
-                xanchor='center'
-            ),
-            xaxis_title='',
-            xaxis=dict(range=[0, data['TOTAL']]),
-            legend=dict(
-                orientation='h',
-                yanchor='bottom',
-                y=-0.7,
-                xanchor='center',
-                x=0.5,
-                font=dict(size=8)
-            ),
-            margin=dict(l=30, r=30, t=30, b=30),
-            width=900,
-            height=150,
-            plot_bgcolor='white',
-            paper_bgcolor='white',
-            showlegend=True
-        )
-        fig.write_image(chart_output_file)
-        print(f"Chart saved to {chart_output_file}")
-        return chart_output_file, badge_path
+        colors = ['#008000', '#FF0000', '#FFA500']  # Dark Green, Red, Orange
+
+        # Same layout as before: one bar across the width, the legend centered below it
+        width, height, margin = 900, 150, 30
+        scale = (width - 2 * margin) / data['TOTAL'] if data['TOTAL'] > 0 else 0
+        bar_y, bar_height = 25, 60
+
+        shapes = []
+        x = margin
+        for status, color in zip(statuses, colors):
+            bar_width = data[status] * scale
+            if bar_width <= 0:
+                continue
+            shapes.append(f'<rect x="{x:.1f}" y="{bar_y}" width="{bar_width:.1f}" height="{bar_height}" fill="{color}"/>')
+            # Like textposition='inside', the count is only drawn when it fits into its segment
+            if bar_width >= 9 * len(str(data[status])) + 4:
+                shapes.append(f'<text x="{x + bar_width / 2:.1f}" y="{bar_y + bar_height / 2 + 5}" fill="#fff" '
+                              f'font-size="14" text-anchor="middle">{data[status]}</text>')
+            x += bar_width
+
+        legend_item = 60
+        legend_x = width / 2 - legend_item * len(statuses) / 2
+        for index, (status, color) in enumerate(zip(statuses, colors)):
+            item_x = legend_x + index * legend_item
+            shapes.append(f'<rect x="{item_x:.1f}" y="{height - 22}" width="10" height="10" fill="{color}"/>')
+            shapes.append(f'<text x="{item_x + 14:.1f}" y="{height - 13}" fill="#444" font-size="8">{status}</text>')
+
+        chart_path = write_chart(svg_document(width, height, shapes), output_dir, 'dbt_run_status', png)
+        return chart_path, badge_path
 
     except Exception as e:
         print(f"Error generating chart or badge: {str(e)}")
         return None, None
 
+def generate_model_latency_chart(output_dir='assets', timings_file='assets/model_timings_full.json', top=25, png=False):
+    """
+    Generate a horizontal bar chart of per-model dbt execution time, marking regressed models.
+
+    The chart is named after the label of the timings, dbt_model_latency_{label}.svg,
+    so the full and the incremental run each keep their own.
+
+    Args:
+        output_dir (str): Directory to save the chart
+        timings_file (str): Path to model_timings_{label}.json written by model_timings.py
+        top (int): Number of slowest models to show
+        png (bool): Also write dbt_model_latency_{label}.png
+
+    Returns:
+        str: Path to the chart or None if failed
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    try:
+        with open(timings_file, 'r') as f:
+            timings = json.load(f)
+
+        # Slowest model on top
+        models = timings['models'][:top]
+        label = timings.get('label', 'run')
+
+        row_height, top_margin, bottom_margin = 24, 40, 40
+        label_width = min(400, max([len(model['name']) for model in models] + [10]) * 7 + 10)
+        width = 900
+        height = top_margin + row_height * len(models) + bottom_margin
+        bar_x, bar_area = label_width + 10, width - label_width - 90
+        longest = max([model['execution_time'] for model in models] +
+                      [model.get('baseline_time') or 0 for model in models] + [0.001])
+        scale = bar_area / longest
+
+        shapes = [f'<text x="{width / 2}" y="22" fill="#000" font-size="12" text-anchor="middle">'
+                  f'dbt model execution time ({escape(label)})</text>']
+        for index, model in enumerate(models):
+            y = top_margin + index * row_height
+            color = '#FF0000' if model.get('regressed') else '#1f77b4'
+            bar_width = model['execution_time'] * scale
+            shapes.append(f'<text x="{label_width}" y="{y + 16}" fill="#444" font-size="11" text-anchor="end">'
+                          f'{escape(model["name"])}</text>')
+            shapes.append(f'<rect x="{bar_x}" y="{y + 4}" width="{bar_width:.1f}" height="{row_height - 8}" fill="{color}"/>')
+            shapes.append(f'<text x="{bar_x + bar_width + 4:.1f}" y="{y + 16}" fill="#444" font-size="11">'
+                          f'{model["execution_time"]:.2f}s</text>')
+            if model.get('baseline_time') is not None:
+                baseline_x = bar_x + model['baseline_time'] * scale
+                shapes.append(f'<line x1="{baseline_x:.1f}" y1="{y + 1}" x2="{baseline_x:.1f}" y2="{y + row_height - 1}" '
+                              f'stroke="#000" stroke-width="2"/>')
+
+        legend_y = height - 18
+        shapes.append(f'<rect x="{width / 2 - 120}" y="{legend_y - 9}" width="10" height="10" fill="#1f77b4"/>')
+        shapes.append(f'<text x="{width / 2 - 106}" y="{legend_y}" fill="#444" font-size="9">{escape(label)}</text>')
+        shapes.append(f'<rect x="{width / 2 - 40}" y="{legend_y - 9}" width="10" height="10" fill="#FF0000"/>')
+        shapes.append(f'<text x="{width / 2 - 26}" y="{legend_y}" fill="#444" font-size="9">regressed</text>')
+        shapes.append(f'<line x1="{width / 2 + 50}" y1="{legend_y - 10}" x2="{width / 2 + 50}" y2="{legend_y + 1}" '
+                      f'stroke="#000" stroke-width="2"/>')
+        shapes.append(f'<text x="{width / 2 + 56}" y="{legend_y}" fill="#444" font-size="9">baseline</text>')
+
+        return write_chart(svg_document(width, height, shapes), output_dir, f'dbt_model_latency_{label}', png)
+
+    except Exception as e:
+        print(f"Error generating model latency chart: {str(e)}")
+        return None
+
 def main():
     parser = argparse.ArgumentParser(description='Generate DBT run status chart and badge')
     parser.add_argument('--output-dir', default='assets', help='Directory to output the chart and badge')
     parser.add_argument('--errors-file', default='assets/top_errors.txt', help='Path to top_errors.txt')
+    parser.add_argument('--stats-file', default=None,
+                        help='Path to run_stats.json from analyze_log.py (default: OUTPUT_DIR/run_stats.json, else --errors-file)')
+    parser.add_argument('--label', default='full',
+                        help='Run label whose model timings are charted, e.g. full or incremental (default: full)')
+    parser.add_argument('--timings-file', default=None,
+                        help='Path to the model timings for the per-model latency chart '
+                             '(default: OUTPUT_DIR/model_timings_LABEL.json)')
+    parser.add_argument('--png', action='store_true', help='Also write the charts as PNG (requires cairosvg)')
     args = parser.parse_args()
 
-    chart_path, badge_path = generate_dbt_chart(output_dir=args.output_dir, errors_file=args.errors_file)
+    stats_file = args.stats_file or os.path.join(args.output_dir, 'run_stats.json')
+    chart_path, badge_path = generate_dbt_chart(output_dir=args.output_dir, errors_file=args.errors_file,
+                                                stats_file=stats_file, png=args.png)
+
+    timings_file = args.timings_file or os.path.join(args.output_dir, f'model_timings_{args.label}.json')
+    if os.path.exists(timings_file):
+        generate_model_latency_chart(output_dir=args.output_dir, timings_file=timings_file, png=args.png)
 
     if chart_path and badge_path:
         print(f"Chart and badge generated successfully in {args.output_dir}")
@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Keep the history of every benchmark run in SQLite and chart its trends.
+
+Every run is appended with its timestamp, the git revision of this repository,
+the Embucket build, the row count and whether it was the incremental run, along
+with the generation, load and dbt timings, the PASS/WARN/ERROR/SKIP counts and
+the execution time of every model. Trend charts and badges are redrawn from the
+store after every run; they only read the latest runs of every series, so the
+cost stays the same however long the history grows.
+"""
+
+import os
+import sys
+import json
+import sqlite3
+import argparse
+import subprocess
+from datetime import datetime, timezone
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from generate_dbt_test_assets import (SERIES_COLORS, badge_svg, load_run_stats, parse_top_errors, svg_document,
+                                      write_chart)
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+
+# Outside the dbt-snowplow-web clone, so a fresh clone keeps the history and its charts
+HISTORY_DB = SCRIPT_DIR / 'history.sqlite'
+HISTORY_CHARTS_DIR = SCRIPT_DIR / 'history_charts'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    recorded_at TEXT NOT NULL,
+    git_revision TEXT,
+    embucket_build TEXT,
+    target TEXT,
+    label TEXT NOT NULL,
+    rows INTEGER,
+    incremental INTEGER NOT NULL,
+    generate_seconds REAL,
+    load_seconds REAL,
+    run_seconds REAL,
+    rows_loaded INTEGER,
+    load_rows_per_sec REAL,
+    pass INTEGER,
+    warn INTEGER,
+    error INTEGER,
+    skip INTEGER,
+    total INTEGER
+);
+CREATE INDEX IF NOT EXISTS runs_series ON runs (label, rows, id);
+CREATE TABLE IF NOT EXISTS model_timings (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    model TEXT NOT NULL,
+    status TEXT,
+    execution_time REAL,
+    PRIMARY KEY (run_id, model)
+);
+"""
+
+# Metrics charted per series, with their axis titles
+TREND_METRICS = [
+    ('run_seconds', 'dbt run seconds'),
+    ('load_seconds', 'load seconds'),
+    ('generate_seconds', 'generate seconds'),
+    ('pass_rate', 'PASS rate %'),
+]
+
+def open_history(db_file=HISTORY_DB):
+    """Open the history database, creating the tables on first use."""
+    conn = sqlite3.connect(str(db_file))
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA)
+    return conn
+
+def git_revision():
+    """Short git revision of this repository, with a + when the tree has local changes."""
+    try:
+        revision = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=SCRIPT_DIR,
+                                  capture_output=True, text=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=SCRIPT_DIR,
+                               capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+    return (revision + '+' if dirty else revision) or None
+
+def last_load_summary(metrics_file):
+    """
+    The final 'run' record of load_events.py's NDJSON metrics.
+
+    Returns:
+        dict: The record, or None when there is none
+    """
+    summary = None
+    try:
+        with open(metrics_file) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(record, dict) and record.get('phase') == 'run':
+                    summary = record
+    except OSError:
+        return None
+    return summary
+
+def record_run(conn, run, models=()):
+    """
+    Append one run and its model timings.
+
+    Args:
+        conn: Connection from open_history
+        run (dict): Column values of the runs table
+        models (list): Dicts with name, status and execution_time
+
+    Returns:
+        int: ID of the new run
+    """
+    columns = [column for column in run if column != 'id']
+    with conn:
+        cursor = conn.execute(f"INSERT INTO runs ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                              [run[column] for column in columns])
+        run_id = cursor.lastrowid
+        conn.executemany("INSERT INTO model_timings (run_id, model, status, execution_time) VALUES (?, ?, ?, ?)",
+                         [(run_id, model['name'], model['status'], model['execution_time']) for model in models])
+    return run_id
+
+def recent_runs(conn, last=50):
+    """
+    The latest `last` runs of every (label, rows) series, oldest first.
+
+    Returns:
+        dict: (label, rows) -> list of run rows
+    """
+    series = {}
+    for key in conn.execute("SELECT DISTINCT label, rows FROM runs ORDER BY label, rows").fetchall():
+        runs = conn.execute("SELECT * FROM runs WHERE label = ? AND rows IS ? ORDER BY id DESC LIMIT ?",
+                            (key['label'], key['rows'], last)).fetchall()
+        series[(key['label'], key['rows'])] = runs[::-1]
+    return series
+
+def metric_value(run, metric):
+    """Value of a trend metric for one run, None when it was not recorded."""
+    if metric == 'pass_rate':
+        return run['pass'] / run['total'] * 100 if run['total'] else None
+    return run[metric]
+
+def trend_chart_svg(title, y_title, series):
+    """
+    Draw a line chart with one line per series over the run sequence.
+
+    Args:
+        title (str): Chart title
+        y_title (str): Y axis title
+        series (dict): Series name -> list of (recorded_at, value)
+
+    Returns:
+        str: The chart SVG
+    """
+    width, height = 900, 360
+    left, right, top, bottom = 60, 200, 40, 50
+    plot_width, plot_height = width - left - right, height - top - bottom
+    values = [value for points in series.values() for _, value in points if value is not None]
+    y_max = max(values + [0.0]) * 1.1 or 1.0
+    length = max([len(points) for points in series.values()] + [2])
+
+    def x_of(index):
+        return left + index * plot_width / (length - 1)
+
+    def y_of(value):
+        return top + plot_height - value / y_max * plot_height
+
+    shapes = [f'<text x="{left + plot_width / 2}" y="22" fill="#000" font-size="12" text-anchor="middle">{escape(title)}</text>',
+              f'<line x1="{left}" y1="{top + plot_height}" x2="{left + plot_width}" y2="{top + plot_height}" stroke="#999"/>',
+              f'<line x1="{left}" y1="{top}" x2="{left}" y2="{top + plot_height}" stroke="#999"/>',
+              f'<text x="14" y="{top + plot_height / 2}" fill="#444" font-size="10" text-anchor="middle" '
+              f'transform="rotate(-90 14 {top + plot_height / 2})">{escape(y_title)}</text>']
+    for step in range(5):
+        value = y_max * step / 4
+        shapes.append(f'<text x="{left - 6}" y="{y_of(value) + 3:.1f}" fill="#444" font-size="9" text-anchor="end">{value:.4g}</text>')
+        shapes.append(f'<line x1="{left}" y1="{y_of(value):.1f}" x2="{left + plot_width}" y2="{y_of(value):.1f}" stroke="#eee"/>')
+
+    for index, (name, points) in enumerate(series.items()):
+        color = SERIES_COLORS[index % len(SERIES_COLORS)]
+        # Align every series to the right, so the latest runs share the last x position
+        offset = length - len(points)
+        coordinates = [(x_of(offset + position), y_of(value)) for position, (_, value) in enumerate(points) if value is not None]
+        if len(coordinates) > 1:
+            path = ' '.join(f"{x:.1f},{y:.1f}" for x, y in coordinates)
+            shapes.append(f'<polyline points="{path}" fill="none" stroke="{color}" stroke-width="2"/>')
+        shapes.extend(f'<circle cx="{x:.1f}" cy="{y:.1f}" r="2.5" fill="{color}"/>' for x, y in coordinates)
+        legend_y = top + 14 * index
+        shapes.append(f'<rect x="{width - right + 15}" y="{legend_y}" width="10" height="10" fill="{color}"/>')
+        shapes.append(f'<text x="{width - right + 30}" y="{legend_y + 9}" fill="#444" font-size="9">{escape(name)}</text>')
+
+    stamps = sorted(stamp for points in series.values() for stamp, _ in points)
+    if stamps:
+        shapes.append(f'<text x="{left}" y="{height - 18}" fill="#444" font-size="9">{escape(stamps[0][:10])}</text>')
+        shapes.append(f'<text x="{left + plot_width}" y="{height - 18}" fill="#444" font-size="9" '
+                      f'text-anchor="end">{escape(stamps[-1][:16])}</text>')
+    return svg_document(width, height, shapes)
+
+def trend_badge(runs, label, tolerance=0.1):
+    """
+    Badge with the latest dbt run time of a series and its change against the median of the earlier runs.
+
+    Returns:
+        str: The badge SVG
+    """
+    times = [run['run_seconds'] for run in runs if run['run_seconds'] is not None]
+    if not times:
+        return badge_svg(f"dbt run time ({label})", "n/a", "#9f9f9f")
+    latest, earlier = times[-1], sorted(times[:-1])
+    if not earlier:
+        return badge_svg(f"dbt run time ({label})", f"{latest:.1f}s", "#4c1")
+    median = earlier[len(earlier) // 2]
+    change = latest / median - 1 if median > 0 else 0.0
+    color = '#e05d44' if change > tolerance else '#4c1'
+    return badge_svg(f"dbt run time ({label})", f"{latest:.1f}s {change * 100:+.0f}%", color)
+
+def generate_trend_assets(conn, output_dir, last=50):
+    """
+    Redraw the trend charts and badges from the latest runs in the store.
+
+    Returns:
+        list: Paths of the written files
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    series = recent_runs(conn, last)
+    if not series:
+        print("⚠ No runs recorded yet")
+        return []
+
+    paths = []
+    for metric, title in TREND_METRICS:
+        points = {f"{label} {rows:,} rows" if rows is not None else label:
+                  [(run['recorded_at'], metric_value(run, metric)) for run in runs]
+                  for (label, rows), runs in series.items()}
+        paths.append(write_chart(trend_chart_svg(f"{title} over the last {last} runs", title, points),
+                                 output_dir, f"trend_{metric}"))
+
+    # One badge per label, for its most recent row count
+    latest = {}
+    for (label, _), runs in series.items():
+        if runs and (label not in latest or runs[-1]['id'] > latest[label][-1]['id']):
+            latest[label] = runs
+    for label, runs in latest.items():
+        path = os.path.join(output_dir, f"trend_badge_{label}.svg")
+        with open(path, 'w') as f:
+            f.write(trend_badge(runs, label))
+        paths.append(path)
+    return paths
+
+def print_history(conn, last=20):
+    """Print the latest runs."""
+    runs = conn.execute("SELECT * FROM runs ORDER BY id DESC LIMIT ?", (last,)).fetchall()[::-1]
+    print(f"\n{'id':>5} {'recorded at':<20} {'revision':<10} {'build':<12} {'label':<12} {'rows':>10} "
+          f"{'gen s':>8} {'load s':>8} {'run s':>8} {'pass':>5} {'error':>5} {'skip':>5}")
+    for run in runs:
+        cells = [f"{run[column]:>8.1f}" if run[column] is not None else f"{'-':>8}"
+                 for column in ('generate_seconds', 'load_seconds', 'run_seconds')]
+        counts = [f"{run[column]:>5}" if run[column] is not None else f"{'-':>5}" for column in ('pass', 'error', 'skip')]
+        rows = f"{run['rows']:>10,}" if run['rows'] is not None else f"{'-':>10}"
+        print(f"{run['id']:>5} {run['recorded_at'][:19]:<20} {run['git_revision'] or '-':<10} "
+              f"{run['embucket_build'] or '-':<12} {run['label']:<12} {rows} {' '.join(cells)} {' '.join(counts)}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark run history with trend charts')
+    parser.add_argument('--db', default=str(HISTORY_DB), help=f"SQLite history file (default: {HISTORY_DB.name})")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    record_parser = subparsers.add_parser('record', help='Append one run to the history and redraw the trends')
+    record_parser.add_argument('--label', default='full', help='Run label, e.g. full or incremental (default: full)')
+    record_parser.add_argument('--rows', type=int, default=None, help='Rows generated per day')
+    record_parser.add_argument('--incremental', action='store_true', help='This was an incremental run')
+    record_parser.add_argument('--target', default=os.getenv('DBT_TARGET', 'embucket'), help='dbt target (default: $DBT_TARGET)')
+    record_parser.add_argument('--embucket-build', default=os.getenv('EMBUCKET_BUILD', ''),
+                               help='Embucket build or version (default: $EMBUCKET_BUILD)')
+    record_parser.add_argument('--generate-seconds', type=float, default=None, help='Wall time of the event generation')
+    record_parser.add_argument('--load-seconds', type=float, default=None,
+                               help='Wall time of the load; the load throughput is only recorded with it')
+    record_parser.add_argument('--run-seconds', type=float, default=None, help='Wall time of the dbt run')
+    record_parser.add_argument('--assets-dir', default='dbt-snowplow-web/assets',
+                               help='Where run_stats.json, top_errors.txt, model_timings_LABEL.json and load_metrics.ndjson '
+                                    'are read from (default: dbt-snowplow-web/assets)')
+    record_parser.add_argument('--load-metrics', default=None,
+                               help='load_events.py metrics file (default: ASSETS_DIR/load_metrics.ndjson)')
+    record_parser.add_argument('--charts-dir', default=str(HISTORY_CHARTS_DIR),
+                               help=f"Directory for the trend charts and badges (default: {HISTORY_CHARTS_DIR.name})")
+    record_parser.add_argument('--last', type=int, default=50, help='Runs per series in the trend charts (default: 50)')
+
+    charts_parser = subparsers.add_parser('charts', help='Redraw the trend charts and badges')
+    charts_parser.add_argument('--output-dir', default=str(HISTORY_CHARTS_DIR),
+                               help=f"Directory for the charts (default: {HISTORY_CHARTS_DIR.name})")
+    charts_parser.add_argument('--last', type=int, default=50, help='Runs per series in the trend charts (default: 50)')
+
+    show_parser = subparsers.add_parser('show', help='Print the latest runs')
+    show_parser.add_argument('--last', type=int, default=20, help='Number of runs to print (default: 20)')
+    args = parser.parse_args()
+
+    conn = open_history(args.db)
+    if args.command == 'show':
+        print_history(conn, args.last)
+        return 0
+    if args.command == 'charts':
+        generate_trend_assets(conn, args.output_dir, args.last)
+        return 0
+
+    assets = Path(args.assets_dir)
+    stats = load_run_stats(assets / 'run_stats.json') if (assets / 'run_stats.json').exists() else None
+    if stats is None and (assets / 'top_errors.txt').exists():
+        stats = parse_top_errors(assets / 'top_errors.txt')
+    stats = stats or {}
+    # The metrics only describe this run when its load actually ran
+    load = (last_load_summary(args.load_metrics or assets / 'load_metrics.ndjson') if args.load_seconds is not None else None) or {}
+    models = []
+    timings_file = assets / f'model_timings_{args.label}.json'
+    if timings_file.exists():
+        with open(timings_file) as f:
+            models = json.load(f)['models']
+
+    run = {
+        'recorded_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'git_revision': git_revision(),
+        'embucket_build': args.embucket_build or None,
+        'target': args.target,
+        'label': args.label,
+        'rows': args.rows,
+        'incremental': int(args.incremental),
+        'generate_seconds': args.generate_seconds,
+        'load_seconds': args.load_seconds,
+        'run_seconds': args.run_seconds,
+        'rows_loaded': load.get('rows_loaded'),
+        'load_rows_per_sec': load.get('rows_per_sec'),
+        'pass': stats.get('PASS'),
+        'warn': stats.get('WARN'),
+        'error': stats.get('ERROR'),
+        'skip': stats.get('SKIP'),
+        'total': stats.get('TOTAL'),
+    }
+    run_id = record_run(conn, run, models)
+    print(f"✓ Recorded run {run_id} ({args.label}, {len(models)} model timings) in {args.db}")
+    generate_trend_assets(conn, args.charts_dir, args.last)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -39,78 +39,42 @@ echo ""
 is_incremental=${1:-false}
 # Set number of rows to generate, default to 1000
 num_rows=${2:-10000}
+# Set format of the generated events (csv or parquet), default to csv
+file_format=${3:-csv}
+# Keep a running container and only reset its schemas (true/false), default false
+warm=${4:-false}
+# Profile the dbt queries of every run with query_profile.py (true/false), default $QUERY_PROFILE or false
+query_profile=${5:-${QUERY_PROFILE:-false}}
+profile_args=()
+if [ "$query_profile" == true ]; then
+    profile_args=(--query-profile)
+fi
+if [ "$file_format" == parquet ]; then
+    yesterday_input=events_yesterday
+    today_input=events_today
+else
+    yesterday_input=events_yesterday.csv
+    today_input=events_today.csv
+fi
 
-echo "Setting up Docker container"
 # Get the directory where this script is located
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
-# Execute setup_docker.sh from the same directory
-"$SCRIPT_DIR/setup_docker.sh"
-
-# Function to check if Docker container is running
-check_docker_container() {
-    # Check if Docker is available
-    if ! command -v docker &> /dev/null; then
-        echo "⚠ Docker is not available, checking if Embucket is accessible..."
-        # Check if Embucket is accessible via HTTP
-        if curl -s http://localhost:3000/health >/dev/null 2>&1; then
-            echo "✓ Embucket is accessible at localhost:3000"
-            return 0
-        else
-            echo "⚠ Embucket is not accessible at localhost:3000"
-            return 1
-        fi
-    fi
-    
-    echo "Checking if Docker container 'em' is running..."
-    if docker ps --format "table {{.Names}}" | grep -q "^em$"; then
-        echo "✓ Docker container 'em' is running"
-        return 0
-    else
-        echo "⚠ Docker container 'em' is not running"
-        return 1
-    fi
-}
-
-# Function to wait for container to be running
-wait_for_container() {
-    local max_attempts=30  # Wait up to 5 minutes (30 * 10 seconds)
-    local attempt=1
-    
-    # Check if Docker is available
-    if ! command -v docker &> /dev/null; then
-        echo "Docker is not available, checking if Embucket is accessible..."
-        if check_docker_container; then
-            echo "✓ Embucket is accessible"
-            return 0
-        else
-            echo "❌ Error: Embucket is not accessible at localhost:3000"
-            echo "Please ensure Embucket is running and accessible"
-            return 1
-        fi
-    fi
-    
-    echo "Waiting for Docker container 'em' to be in running state..."
-    
-    while [ $attempt -le $max_attempts ]; do
-        if check_docker_container; then
-            echo "✓ Docker container 'em' is now running (attempt $attempt/$max_attempts)"
-            return 0
-        else
-            echo "⏳ Container not ready yet, waiting 10 seconds... (attempt $attempt/$max_attempts)"
-            sleep 10
-            attempt=$((attempt + 1))
-        fi
-    done
-    
-    echo "❌ Error: Docker container 'em' failed to start within 5 minutes"
-    return 1
-}
-
-# Wait for container to be running
-if wait_for_container; then
-    echo "✓ Docker container setup completed successfully"
+
+# In warm mode a running Embucket is kept and only the schemas of the previous run are reset
+if [ "$warm" == true ] && $PYTHON_CMD warehouse.py wait --timeout 1 >/dev/null 2>&1; then
+    echo "Reusing the running Embucket container"
+    $PYTHON_CMD warehouse.py reset
+else
+    echo "Setting up Docker container"
+    # Execute setup_docker.sh from the same directory
+    "$SCRIPT_DIR/setup_docker.sh"
+fi
+
+# Wait until Embucket actually runs SQL, probing with exponential backoff
+if $PYTHON_CMD warehouse.py wait --timeout 300; then
+    echo "✓ Embucket setup completed successfully"
 else
-    echo "❌ Error: Docker container failed to start after waiting"
+    echo "❌ Error: Embucket did not answer SELECT 1 within 5 minutes"
     exit 1
 fi
 echo ""
@@ -118,20 +82,30 @@ echo "###############################"
 echo ""
 
 
+# Wall-clock timestamps for the run history
+now() { date +%s.%N; }
+elapsed() { awk -v start="$1" -v end="$2" 'BEGIN { printf "%.3f", end - start }'; }
+
 # FIRST RUN
 echo "Generating events"
-$PYTHON_CMD gen_events.py $num_rows
+t0=$(now)
+# A fixed seed makes the output cacheable: identical runs hardlink it from .dataset_cache
+$PYTHON_CMD gen_events.py $num_rows --format $file_format --append-only --seed ${GEN_SEED:-0} --cache
 
 echo "Loading events"
-$PYTHON_CMD load_events.py events_yesterday.csv
+t1=$(now)
+$PYTHON_CMD load_events.py $yesterday_input
 
 echo "Running dbt"
-"$SCRIPT_DIR/run_snowplow_web.sh"
+t2=$(now)
+"$SCRIPT_DIR/run_snowplow_web.sh" "${profile_args[@]}" --label full
+t3=$(now)
 
 # Update the errors log and run results
 echo "###############################"
 echo ""
 echo "Updating the errors log and total results"
+$PYTHON_CMD model_timings.py --run-results dbt-snowplow-web/target/run_results.json --output-dir dbt-snowplow-web/assets --label full
 if [ "$DBT_TARGET" = "embucket" ]; then
    "$SCRIPT_DIR/statistics.sh"
 fi
@@ -142,26 +116,35 @@ echo "###############################"
 echo ""
 echo "Updating the chart result"
 if [ "$DBT_TARGET" = "embucket" ]; then
-   $PYTHON_CMD generate_dbt_test_assets.py --output-dir dbt-snowplow-web/assets --errors-file dbt-snowplow-web/assets/top_errors.txt
+   $PYTHON_CMD generate_dbt_test_assets.py --output-dir dbt-snowplow-web/assets --errors-file dbt-snowplow-web/assets/top_errors.txt --label full
 fi
 echo ""
 echo "###############################"
 echo ""
 
+# Append the run to the history and redraw the trend charts
+$PYTHON_CMD history.py record --label full --rows $num_rows \
+   --generate-seconds $(elapsed $t0 $t1) --load-seconds $(elapsed $t1 $t2) --run-seconds $(elapsed $t2 $t3)
+
 if [ "$is_incremental" == true ]; then
 
 # SECOND RUN INCEREMENTAL
 
+# events_today only holds today's events, append them to yesterday's load
 echo "Loading events"
-$PYTHON_CMD load_events.py events_today.csv
+t1=$(now)
+$PYTHON_CMD load_events.py $today_input --append
 
 echo "Running dbt"
-"$SCRIPT_DIR/run_snowplow_web.sh"
+t2=$(now)
+"$SCRIPT_DIR/run_snowplow_web.sh" "${profile_args[@]}" --label incremental
+t3=$(now)
 
 # Update the errors log and run results
 echo "###############################"
 echo ""
 echo "Updating the errors log and total results"
+$PYTHON_CMD model_timings.py --run-results dbt-snowplow-web/target/run_results.json --output-dir dbt-snowplow-web/assets --label incremental
 if [ "$DBT_TARGET" = "embucket" ]; then
    "$SCRIPT_DIR/statistics.sh"
 fi
@@ -172,10 +155,13 @@ echo "###############################"
 echo ""
 echo "Updating the chart result"
 if [ "$DBT_TARGET" = "embucket" ]; then
-   $PYTHON_CMD generate_dbt_test_assets.py --output-dir dbt-snowplow-web/assets --errors-file dbt-snowplow-web/assets/top_errors.txt
+   $PYTHON_CMD generate_dbt_test_assets.py --output-dir dbt-snowplow-web/assets --errors-file dbt-snowplow-web/assets/top_errors.txt --label incremental
 fi
 echo ""
 echo "###############################"
 echo ""
 
+$PYTHON_CMD history.py record --label incremental --incremental --rows $num_rows \
+   --load-seconds $(elapsed $t1 $t2) --run-seconds $(elapsed $t2 $t3)
+
 fi
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Database backends for load_events.py.
+
+Embucket is the real target. DuckDB is an embedded stand-in that runs the same
+load_events_data.sql script, CSV/Parquet loads and verification queries without
+Docker, so the client-side pipeline can be profiled and compared on its own.
+"""
+
+import os
+import re
+
+class EmbucketBackend:
+    """Embucket through the Snowflake connector; statements are sent unchanged."""
+
+    name = 'embucket'
+    label = 'Embucket'
+    supports_async = True
+
+    def __init__(self, config):
+        self.config = config
+
+    def connect(self):
+        import snowflake.connector
+        return snowflake.connector.connect(**self.config)
+
+    def write_table(self, conn, table, table_name='events'):
+        """
+        Append an Arrow table with the connector's write_pandas.
+
+        The table is converted to a pandas DataFrame first, which copies it.
+
+        Returns:
+            int: Number of rows written
+        """
+        from snowflake.connector.pandas_tools import write_pandas
+
+        success, _, rows, _ = write_pandas(conn, table.to_pandas(), table_name, auto_create_table=False,
+                                           quote_identifiers=False, use_logical_type=True)
+        if not success:
+            raise RuntimeError("write_pandas reported failure")
+        return rows
+
+class DuckDBBackend:
+    """
+    A local DuckDB database standing in for Embucket.
+
+    Snowflake statements are translated on the fly: the external volume and
+    USE DATABASE are no-ops, TIMESTAMP_NTZ becomes TIMESTAMP and COPY INTO
+    becomes one DuckDB COPY per file, read from the local data directory the
+    container path maps to.
+    """
+
+    name = 'duckdb'
+    supports_async = False
+
+    def __init__(self, database, data_dir='./datasets', container_dir='/app/data', schema='public_snowplow_manifest'):
+        self.database = database
+        self.data_dir = data_dir
+        self.container_dir = container_dir
+        self.schema = schema
+        self.label = f"DuckDB ({database})"
+        self._db = None
+
+    def connect(self):
+        """Open a connection to the database, starting in the configured schema like the Snowflake connector does."""
+        try:
+            import duckdb
+        except ImportError:
+            raise RuntimeError("The duckdb backend requires duckdb. Install it with: pip install duckdb")
+
+        if self._db is None:
+            if self.database != ':memory:':
+                os.makedirs(os.path.dirname(os.path.abspath(self.database)), exist_ok=True)
+            self._db = duckdb.connect(self.database)
+            conn = self._db
+        else:
+            # Further connections share the database, e.g. for parallel loads
+            conn = self._db.cursor()
+        conn.execute(f"CREATE SCHEMA IF NOT EXISTS {self.schema}")
+        conn.execute(f"USE {self.schema}")
+        return DuckDBConnection(conn, self)
+
+    def write_table(self, conn, table, table_name='events'):
+        """
+        Append an Arrow table by scanning it in place.
+
+        Returns:
+            int: Number of rows written
+        """
+        conn.duckdb.register('_arrow_batch', table)
+        try:
+            conn.duckdb.execute(f"INSERT INTO {table_name} BY NAME SELECT * FROM _arrow_batch")
+        finally:
+            conn.duckdb.unregister('_arrow_batch')
+        return table.num_rows
+
+    def local_path(self, url):
+        """Map a file:// URL under the container data directory to the local data directory."""
+        path = url[len('file://'):] if url.startswith('file://') else url
+        if path == self.container_dir or path.startswith(self.container_dir.rstrip('/') + '/'):
+            path = os.path.join(self.data_dir, path[len(self.container_dir):].lstrip('/'))
+        return path
+
+    def translate(self, statement):
+        """
+        Translate one Snowflake statement into DuckDB statements.
+
+        Returns:
+            list: DuckDB statements, empty when the statement has no DuckDB equivalent
+        """
+        upper = ' '.join(statement.split()).upper()
+        if upper.startswith('CREATE EXTERNAL VOLUME') or upper.startswith('USE DATABASE'):
+            return []
+        if upper.startswith('USE SCHEMA '):
+            return [f"USE {statement.split()[2].rstrip(';')}"]
+        if upper.startswith('COPY INTO'):
+            return [sql for _, sql in self.translate_copy(statement)]
+        return [re.sub(r'\bTIMESTAMP_NTZ\b', 'TIMESTAMP', statement, flags=re.I)]
+
+    def translate_copy(self, statement):
+        """
+        Translate a COPY INTO statement into one DuckDB COPY per file.
+
+        Returns:
+            list: (local path, DuckDB statement) tuples
+        """
+        match = re.search(r"COPY\s+INTO\s+(\S+)\s+FROM\s+'([^']*)'(?:\s+FILES\s*=\s*\(([^)]*)\))?", statement, re.I | re.S)
+        if match is None:
+            raise ValueError(f"Unsupported COPY INTO statement: {' '.join(statement.split())[:80]}")
+        table, url, files = match.groups()
+        file_type = re.search(r"TYPE\s*=\s*'?(\w+)", statement, re.I)
+        skip_header = re.search(r"SKIP_HEADER\s*=\s*(\d+)", statement, re.I)
+        on_error = re.search(r"ON_ERROR\s*=\s*'?(\w+)", statement, re.I)
+
+        if file_type and file_type.group(1).upper() == 'PARQUET':
+            options = "FORMAT PARQUET"
+        else:
+            options = f"FORMAT CSV, HEADER {'true' if skip_header and int(skip_header.group(1)) > 0 else 'false'}"
+            if on_error and on_error.group(1).upper() == 'CONTINUE':
+                options += ", IGNORE_ERRORS true"
+
+        base = self.local_path(url)
+        paths = [os.path.join(base, name) for name in re.findall(r"'([^']*)'", files)] if files else [base]
+        return [(path, f"COPY {table} FROM '{path}' ({options})") for path in paths]
+
+class DuckDBConnection:
+    """The part of the Snowflake connection API that load_events.py uses, on top of DuckDB."""
+
+    def __init__(self, conn, backend):
+        self.duckdb = conn
+        self.backend = backend
+
+    def cursor(self):
+        return DuckDBCursor(self)
+
+    def close(self):
+        self.duckdb.close()
+
+class DuckDBCursor:
+    """
+    A Snowflake-like cursor over a DuckDB connection.
+
+    Statements run synchronously; there is no execute_async, so load_events.py
+    runs waves one statement at a time. COPY INTO returns one
+    (file, rows_loaded) row per file like Snowflake does.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.sfqid = None
+        self.rowcount = -1
+        self.description = None
+        self._rows = []
+
+    def execute(self, statement):
+        backend = self.connection.backend
+        conn = self.connection.duckdb
+
+        if ' '.join(statement.split()[:2]).upper() == 'COPY INTO':
+            self._rows = [(path, conn.execute(sql).fetchone()[0]) for path, sql in backend.translate_copy(statement)]
+            self.description = [('file',), ('rows_loaded',)]
+            self.rowcount = sum(rows for _, rows in self._rows)
+            return self
+
+        self._rows, self.description, self.rowcount = [], None, -1
+        for sql in backend.translate(statement):
+            result = conn.execute(sql)
+            self.description = result.description
+            self._rows = result.fetchall() if result.description else []
+            self.rowcount = len(self._rows) if result.description else -1
+        return self
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+    def close(self):
+        pass
@@ -1,12 +1,18 @@
 #!/usr/bin/env python3
 """
-Script to load Snowplow events data into Embucket database using Snowflake connector.
+Script to load Snowplow events data into Embucket database using Snowflake connector,
+or into a local DuckDB database standing in for it.
 """
 
 import os
 import sys
-import snowflake.connector
+import argparse
 from pathlib import Path
+from load_backends import EmbucketBackend, DuckDBBackend
+from sql_statements import LOAD, split_sql_statements, classify_statement, plan_waves
+
+# Path the Embucket container sees the local ./datasets directory under
+CONTAINER_DATA_DIR = '/app/data'
 
 def get_connection_config():
     """Get connection configuration for Embucket."""
@@ -22,72 +28,865 @@ def get_connection_config():
         'schema': os.getenv('EMBUCKET_SCHEMA', 'public_snowplow_manifest'),
     }
 
-def copy_file_to_data_dir(source_file, data_dir="./datasets"):
-    """Copy the events.csv file to the data directory."""
+# Manifest in the data directory recording what was staged from where
+STAGING_MANIFEST = '.staging_manifest.json'
+
+# Linux ioctl that clones a file's extents (reflink) on btrfs, XFS and similar
+FICLONE = 0x40049409
+
+def _load_manifest(data_dir):
+    """Read the staging manifest of the data directory, empty when there is none."""
+    import json
+    
+    try:
+        with open(os.path.join(data_dir, STAGING_MANIFEST), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_manifest(data_dir, manifest):
+    """Atomically replace the staging manifest of the data directory."""
+    import json
+    
+    manifest_path = os.path.join(data_dir, STAGING_MANIFEST)
+    try:
+        with open(manifest_path + '.tmp', 'w') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(manifest_path + '.tmp', manifest_path)
+    except OSError as e:
+        print(f"⚠ Warning: could not write {manifest_path}: {e}")
+
+def _file_signature(path):
+    """Cheap identity of a file's current version: size, modification time and inode."""
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns, st.st_ino]
+
+def _file_sha256(path, block_size=8 << 20):
+    """Content hash of a file, read in blocks."""
+    import hashlib
+    
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _source_unchanged(entry, source_file, staged_paths):
+    """
+    Decide whether a staged entry still matches its source file.
+
+    The size/mtime/inode signature is checked first, which takes microseconds.
+    Only when it differs, e.g. because the file was regenerated, and the entry
+    recorded a hash is the content hashed and compared with it. Entries of
+    copies and splits record one, since reading the file is cheaper than
+    staging it again; linked files are simply linked again.
+
+    Returns:
+        tuple: (unchanged, signature, sha256 or None when it was not needed)
+    """
+    signature = _file_signature(source_file)
+    if not entry or entry.get('source') != os.path.abspath(source_file):
+        return False, signature, None
+    if not all(os.path.exists(path) for path in staged_paths):
+        return False, signature, None
+    if entry.get('signature') == signature:
+        return True, signature, entry.get('sha256')
+    if not entry.get('sha256'):
+        return False, signature, None
+    
+    sha256 = _file_sha256(source_file)
+    return sha256 == entry.get('sha256'), signature, sha256
+
+def _reflink(source_file, target_file):
+    """Clone a file copy-on-write; raises OSError where the filesystem cannot."""
+    import fcntl
+    
+    try:
+        with open(source_file, 'rb') as src, open(target_file, 'wb') as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+    except OSError:
+        if os.path.exists(target_file):
+            os.remove(target_file)
+        raise
+
+def _link_or_copy(source_file, target_file, data_dir):
+    """
+    Place source_file at target_file as cheaply as possible.
+
+    Tries a hardlink, then a reflink, then a relative symlink - the latter only
+    when the source lives inside the data directory, since a link pointing
+    outside of it would not resolve inside the container's bind mount - and
+    finally falls back to a full copy.
+
+    Returns:
+        str: The method used
+    """
     import shutil
     import subprocess
     
-    # Create data directory if it doesn't exist
-    os.makedirs(data_dir, exist_ok=True)
+    if os.path.lexists(target_file):
+        os.remove(target_file)
+    
+    try:
+        os.link(source_file, target_file)
+        return 'hardlink'
+    except OSError:
+        pass
+    
+    try:
+        _reflink(source_file, target_file)
+        return 'reflink'
+    except (OSError, ImportError):
+        pass
+    
+    real_source = os.path.realpath(source_file)
+    if os.path.commonpath([real_source, os.path.realpath(data_dir)]) == os.path.realpath(data_dir):
+        os.symlink(os.path.relpath(real_source, os.path.dirname(os.path.realpath(target_file))), target_file)
+        return 'symlink'
     
-    # Copy file to app data directory
-    target_file = os.path.join(data_dir, "events.csv")
     try:
         shutil.copy2(source_file, target_file)
-        print(f"✓ Copied {source_file} to {target_file}")
+        return 'copy'
     except PermissionError:
         # Use sudo if permission denied
-        import subprocess
         subprocess.run(['sudo', 'cp', source_file, target_file], check=True)
         subprocess.run(['sudo', 'chmod', '644', target_file], check=True)
-        print(f"✓ Copied {source_file} to {target_file} (with sudo)")
+        return 'copy (with sudo)'
 
-def execute_sql_script(conn, script_path):
-    """Execute SQL script against the database."""
-    with open(script_path, 'r') as f:
-        sql_content = f.read()
+def stage_file(source_file, target_name, data_dir, manifest):
+    """
+    Stage one file into the data directory unless it is already there.
+
+    Updates the manifest entry for target_name; the caller saves the manifest.
+    Only a copied file gets its content hash recorded, see _source_unchanged.
+
+    Returns:
+        bool: True when the file was staged, False when the staged copy was reused
+    """
+    target_file = os.path.join(data_dir, target_name)
+    unchanged, signature, sha256 = _source_unchanged(manifest.get(target_name), source_file, [target_file])
+    if unchanged:
+        manifest[target_name]['signature'] = signature
+        return False
     
-    # Split by semicolon and execute each statement
-    statements = []
-    current_statement = ""
+    os.makedirs(os.path.dirname(target_file) or '.', exist_ok=True)
+    method = _link_or_copy(source_file, target_file, data_dir)
+    manifest[target_name] = {
+        'source': os.path.abspath(source_file),
+        'signature': signature,
+        'method': method,
+    }
+    if method.startswith('copy'):
+        manifest[target_name]['sha256'] = sha256 or _file_sha256(source_file)
+    return True
+
+def copy_dataset_to_data_dir(source_dir, data_dir="./datasets", patterns=('*.parquet',)):
+    """
+    Stage a dataset directory, e.g. a partitioned Parquet dataset, into the data directory.
+
+    Files matching patterns are staged one by one with stage_file; staged
+    files that are no longer part of the dataset are removed.
+
+    Returns:
+        list: Paths of the staged files, relative to the data directory
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    
+    dataset_name = os.path.basename(os.path.normpath(source_dir))
+    target_dir = os.path.join(data_dir, dataset_name)
+    manifest = _load_manifest(data_dir)
+    
+    staged_files = []
+    staged_count = 0
+    source_files = sorted({path for pattern in patterns for path in Path(source_dir).rglob(pattern)})
+    for source_file in source_files:
+        target_name = os.path.join(dataset_name, str(source_file.relative_to(source_dir)))
+        staged_count += stage_file(str(source_file), target_name, data_dir, manifest)
+        staged_files.append(target_name)
+    
+    # Drop files of an earlier version of the dataset
+    old_files = [path for pattern in patterns for path in Path(target_dir).rglob(pattern)] if os.path.isdir(target_dir) else []
+    for old_file in old_files:
+        target_name = str(old_file.relative_to(data_dir))
+        if target_name not in staged_files:
+            old_file.unlink()
+            manifest.pop(target_name, None)
+    _save_manifest(data_dir, manifest)
+    
+    print(f"✓ Staged {source_dir} to {target_dir} ({staged_count} of {len(staged_files)} files changed)")
+    return staged_files
+
+def copy_files_to_data_dir(source_files, data_dir="./datasets"):
+    """
+    Stage individual files into the data directory, each under its own name.
+
+    Args:
+        source_files (list): (source path, name relative to the data directory) tuples
+
+    Returns:
+        list: Paths of the staged files, relative to the data directory
+    """
+    import time
+    
+    os.makedirs(data_dir, exist_ok=True)
+    manifest = _load_manifest(data_dir)
+    
+    start = time.perf_counter()
+    staged_count = 0
+    for source_file, target_name in source_files:
+        staged_count += stage_file(source_file, target_name, data_dir, manifest)
+    _save_manifest(data_dir, manifest)
+    
+    print(f"✓ Staged {len(source_files)} files to {data_dir} ({staged_count} changed, "
+          f"{time.perf_counter() - start:.3f}s)")
+    return [target_name for _, target_name in source_files]
+
+def _glob_root(pattern):
+    """The leading directories of a glob pattern that contain no wildcards."""
+    import glob
+    
+    parts = []
+    for part in Path(pattern).parts[:-1]:
+        if glob.has_magic(part):
+            break
+        parts.append(part)
+    return os.path.join(*parts) if parts else '.'
+
+def resolve_input_files(inputs, file_format=None):
+    """
+    Expand the loader's inputs into the files to load.
+
+    An input can be a file, a directory (searched recursively) or a glob
+    pattern such as 'drops/*/events-*.csv'. Files are staged under their own
+    name: a plain file by its basename, the files of a directory or glob by
+    their path below it, prefixed with the directory's name.
+
+    Args:
+        inputs (list): Files, directories or glob patterns
+        file_format (str): 'csv' or 'parquet', or None to accept both
+
+    Returns:
+        tuple: (directories, [(source path, staged name), ...]) where the
+        directories are staged as whole datasets by copy_dataset_to_data_dir
+    """
+    import glob
+    
+    extensions = (f'.{file_format}',) if file_format else ('.csv', '.parquet')
+    directories = []
+    files = []
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            directories.append(pattern)
+        elif glob.has_magic(pattern):
+            root = _glob_root(pattern)
+            prefix = '' if root == '.' else os.path.basename(os.path.normpath(root))
+            for path in sorted(glob.glob(pattern, recursive=True)):
+                if os.path.isfile(path) and path.endswith(extensions):
+                    files.append((path, os.path.join(prefix, os.path.relpath(path, root))))
+        else:
+            files.append((pattern, os.path.basename(pattern)))
+    return directories, files
+
+def file_format_of(path, default='csv'):
+    """Infer 'csv' or 'parquet' from a file name."""
+    return 'parquet' if str(path).endswith('.parquet') else default
+
+def split_file_to_data_dir(source_file, num_chunks, data_dir="./datasets"):
+    """
+    Split a CSV file on row boundaries into num_chunks files in the data directory.
+
+    Every chunk starts with the header line, so it loads with the same
+    SKIP_HEADER = 1 file format. The generator never writes newlines inside
+    fields, so every newline ends a row. Chunks of an unchanged source file
+    are reused from the previous split.
+
+    Returns:
+        list: (path relative to the data directory, number of rows) per chunk
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    
+    stem = Path(source_file).stem
+    manifest_key = f"{stem}.part-*.csv"
+    manifest = _load_manifest(data_dir)
+    entry = manifest.get(manifest_key)
+    staged_paths = [os.path.join(data_dir, name) for name, _ in entry['chunks']] if entry else []
+    unchanged, signature, sha256 = _source_unchanged(entry, source_file, staged_paths)
+    if unchanged and entry.get('num_chunks') == num_chunks:
+        entry['signature'] = signature
+        _save_manifest(data_dir, manifest)
+        print(f"✓ {len(entry['chunks'])} chunks of {source_file} in {data_dir} are already up to date")
+        return [tuple(chunk) for chunk in entry['chunks']]
     
-    for line in sql_content.split('\n'):
-        line = line.strip()
-        if line.startswith('--') or not line:  # Skip comments and empty lines
+    for old_chunk in Path(data_dir).glob(f"{stem}.part-*.csv"):
+        old_chunk.unlink()
+    
+    size = os.path.getsize(source_file)
+    chunks = []
+    with open(source_file, 'rb') as src:
+        header = src.readline()
+        data_start = src.tell()
+        
+        # Move every byte boundary forward to the start of the next row
+        boundaries = [data_start]
+        for k in range(1, num_chunks):
+            src.seek(max(data_start + (size - data_start) * k // num_chunks - 1, boundaries[-1]))
+            src.readline()
+            boundaries.append(max(src.tell(), boundaries[-1]))
+        boundaries.append(size)
+        
+        for index, (start, end) in enumerate(zip(boundaries, boundaries[1:])):
+            if end <= start:
+                continue
+            chunk_name = f"{stem}.part-{index:03d}.csv"
+            src.seek(start)
+            with open(os.path.join(data_dir, chunk_name), 'wb') as dst:
+                dst.write(header)
+                rows = _copy_rows(src, dst, end - start)
+            chunks.append((chunk_name, rows))
+    
+    manifest[manifest_key] = {
+        'source': os.path.abspath(source_file),
+        'signature': signature,
+        'sha256': sha256 or _file_sha256(source_file),
+        'num_chunks': num_chunks,
+        'chunks': chunks,
+    }
+    _save_manifest(data_dir, manifest)
+    
+    print(f"✓ Split {source_file} into {len(chunks)} chunks in {data_dir}")
+    return chunks
+
+def _copy_rows(src, dst, length, block_size=8 << 20):
+    """Copy length bytes between open files and return the number of rows copied."""
+    rows = 0
+    last_byte = b'\n'
+    while length > 0:
+        block = src.read(min(block_size, length))
+        if not block:
+            break
+        dst.write(block)
+        rows += block.count(b'\n')
+        last_byte = block[-1:]
+        length -= len(block)
+    return rows if last_byte == b'\n' else rows + 1
+
+def count_file_rows(path, block_size=8 << 20):
+    """
+    Count the events in a staged CSV or Parquet file.
+
+    CSV rows are counted by newlines, less the header line; the generator never
+    writes newlines inside fields. Parquet files report their rows in the footer.
+    """
+    if file_format_of(path) == 'parquet':
+        import pyarrow.parquet as pq
+        return pq.ParquetFile(path).metadata.num_rows
+    
+    rows = 0
+    last_byte = b'\n'
+    with open(path, 'rb') as f:
+        while block := f.read(block_size):
+            rows += block.count(b'\n')
+            last_byte = block[-1:]
+    if last_byte != b'\n':
+        rows += 1
+    return max(rows - 1, 0)
+
+def copy_into_statement(file_url, file_format='csv', files=None):
+    """
+    Build the COPY INTO events statement for one staged file.
+
+    With files, file_url is a directory and one statement loads all the listed
+    files below it.
+    """
+    if file_format == 'parquet':
+        format_clause = "FILE_FORMAT = (TYPE = PARQUET)"
+    else:
+        format_clause = "FILE_FORMAT = (TYPE = CSV, SKIP_HEADER = 1)"
+    files_clause = ""
+    if files:
+        files_clause = " FILES = (" + ", ".join(f"'{name}'" for name in files) + ")"
+    return f"COPY INTO events FROM '{file_url}'{files_clause} STORAGE_INTEGRATION = local {format_clause} ON_ERROR = 'CONTINUE';"
+
+def build_copy_statements(staged_files, file_format=None, files_per_copy=1):
+    """
+    Build the COPY INTO statements for staged files.
+
+    With files_per_copy > 1 files of the same format are batched into
+    multi-file COPY INTO statements with a FILES list.
+
+    Args:
+        staged_files (list): Paths relative to the data directory
+        file_format (str): 'csv' or 'parquet', or None to infer it per file
+        files_per_copy (int): Files loaded by one statement
+
+    Returns:
+        list: COPY INTO statements
+    """
+    by_format = {}
+    for name in staged_files:
+        by_format.setdefault(file_format or file_format_of(name), []).append(name)
+    
+    statements = []
+    for fmt, names in by_format.items():
+        if files_per_copy <= 1:
+            statements.extend(copy_into_statement(f"file://{CONTAINER_DATA_DIR}/{name}", fmt) for name in names)
             continue
-        current_statement += line + " "
-        if line.endswith(';'):
-            statements.append(current_statement.strip())
-            current_statement = ""
+        for start in range(0, len(names), files_per_copy):
+            statements.append(copy_into_statement(f"file://{CONTAINER_DATA_DIR}/", fmt, names[start:start + files_per_copy]))
+    return statements
+
+def stream_events_to_table(conn, batches, write_table, queue_size=4, table_name='events', metrics=None):
+    """
+    Load generated Arrow batches straight into a table with the backend's bulk write.
+
+    A producer thread pulls batches from the generator into a bounded queue, so
+    generation runs at most queue_size batches ahead of the loader and blocks
+    while the loader catches up. Nothing is written to or parsed from CSV files.
+
+    Args:
+        conn: Open connection to load through
+        batches (iterable): (rows, pyarrow.Table) tuples, e.g. from gen_events.iter_shards
+        write_table (callable): Appends one table, e.g. EmbucketBackend.write_table
+        queue_size (int): Batches that may wait for the loader
+        table_name (str): Table to append the rows to
+        metrics (list): Collects one timing record per batch when given
+
+    Returns:
+        int: Number of rows loaded
+    """
+    import time
+    import queue
+    import threading
     
-    if current_statement.strip():
-        statements.append(current_statement.strip())
+    pending = queue.Queue(maxsize=max(1, queue_size))
+    stop = threading.Event()
+    done = object()
     
-    cursor = conn.cursor()
+    def produce():
+        try:
+            for batch in batches:
+                if stop.is_set():
+                    return
+                pending.put(batch)
+        except Exception as e:
+            pending.put(e)
+            return
+        pending.put(done)
     
-    for i, statement in enumerate(statements, 1):
-        if statement and not statement.startswith('--'):
-            print(f"Executing statement {i}/{len(statements)}: {statement[:50]}...")
+    producer = threading.Thread(target=produce, daemon=True)
+    total_rows = 0
+    waited = 0.0
+    start = time.perf_counter()
+    producer.start()
+    try:
+        batch_index = 0
+        while True:
+            wait_start = time.perf_counter()
+            item = pending.get()
+            waited += time.perf_counter() - wait_start
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                raise item
+            
+            batch_index += 1
+            rows, table = item
+            batch_start = time.perf_counter()
             try:
-                cursor.execute(statement)
-                print("✓ Statement executed successfully")
+                loaded = write_table(conn, table, table_name)
             except Exception as e:
-                print(f"⚠ Warning executing statement {i}: {e}")
-                # Continue with next statement
+                _record_metric(metrics, 'write_table', f"write_table {table_name}", time.perf_counter() - batch_start,
+                               kind=LOAD, position=batch_index, error=e)
+                print(f"⚠ Warning loading batch {batch_index}: {e}")
+                continue
+            seconds = time.perf_counter() - batch_start
+            _record_metric(metrics, 'write_table', f"write_table {table_name}", seconds, kind=LOAD,
+                           position=batch_index, rows=loaded)
+            total_rows += loaded
+            print(f"✓ Batch {batch_index}: {loaded} rows in {seconds:.2f}s ({loaded / max(seconds, 1e-9):,.0f} rows/sec)")
+    finally:
+        # Unblock the producer if the loader stopped early
+        stop.set()
+        while producer.is_alive():
+            try:
+                pending.get(timeout=0.1)
+            except queue.Empty:
+                pass
+    
+    elapsed = time.perf_counter() - start
+    print(f"✓ Loaded {total_rows} generated rows in {elapsed:.2f}s ({total_rows / max(elapsed, 1e-9):,.0f} rows/sec), "
+          f"loader waited {waited:.2f}s for the generator")
+    return total_rows
+
+def load_generated_events(conn, write_table, num_events, engine='python', workers=1, seed=0, append=False,
+                          queue_size=4, metrics=None, profile=None, anomalies=None):
+    """
+    Generate events like gen_events.py and stream them into the events table.
+
+    Loads yesterday's and today's events, the same rows as events_today.csv;
+    with append only today's events, the same rows as gen_events.py --append-only.
+    profile (from gen_events.workload_profile, None for flat) and anomalies (from
+    gen_events.anomaly_settings) shape the events as gen_events.py's options do.
+
+    Returns:
+        int: Number of rows loaded
+    """
+    from datetime import datetime, timedelta
+    import gen_events
+    
+    today = datetime.now().date()
+    days = [today] if append else [today - timedelta(days=1), today]
+    tasks = [task for day in days
+             for task in gen_events.shard_tasks(engine, day, num_events, seed, profile=profile, anomalies=anomalies)]
+    
+    executor = None
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        batches = gen_events.iter_shards(tasks, executor, window=2 * workers, worker=gen_events.generate_arrow_shard)
+        return stream_events_to_table(conn, batches, write_table, queue_size, metrics=metrics)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+def _is_copy(statement):
+    """Whether a statement is a COPY INTO."""
+    return ' '.join(statement.split()[:2]).upper() == 'COPY INTO'
+
+def _preview(statement, width=50):
+    """First characters of a statement on a single line, for progress output."""
+    return ' '.join(statement.split())[:width]
+
+def _record_metric(metrics, phase, statement, seconds, cursor=None, rows=None, error=None, position=None, kind=None,
+                   query_id=None):
+    """
+    Append one timing record for a statement to metrics, unless metrics is None.
+
+    The query ID and row count come from the cursor when one is given; loads
+    also get rows per second.
+    """
+    if metrics is None:
+        return
+    
+    kind = kind or classify_statement(statement)
+    rowcount = getattr(cursor, 'rowcount', None)
+    if rows is None and kind == LOAD and rowcount is not None and rowcount >= 0:
+        rows = rowcount
+    record = {
+        'phase': phase,
+        'position': position,
+        'kind': kind,
+        'statement': _preview(statement, 200),
+        'query_id': query_id or getattr(cursor, 'sfqid', None),
+        'rowcount': rowcount,
+        'rows': rows,
+        'seconds': round(seconds, 6),
+        'rows_per_sec': round(rows / max(seconds, 1e-9), 1) if kind == LOAD and rows is not None else None,
+        'status': 'ok' if error is None else 'error',
+        'error': None if error is None else str(error),
+    }
+    metrics.append(record)
+
+def write_load_metrics(metrics_file, metrics, run):
+    """
+    Append metric records to an NDJSON file, one JSON object per line.
+
+    Every record is tagged with the run fields (run ID, start time, label,
+    mode), followed by one 'run' summary record with the totals.
+    """
+    import json
+    
+    loads = [m for m in metrics if m['kind'] == LOAD and m['status'] == 'ok']
+    rows = sum(m['rows'] or 0 for m in loads)
+    summary = {
+        'phase': 'run',
+        'statements': len(metrics),
+        'errors': sum(1 for m in metrics if m['status'] == 'error'),
+        'rows_loaded': rows,
+        'seconds': run['seconds'],
+        'rows_per_sec': round(rows / max(run['seconds'], 1e-9), 1),
+    }
+    tags = {key: value for key, value in run.items() if key != 'seconds'}
+    
+    os.makedirs(os.path.dirname(os.path.abspath(metrics_file)), exist_ok=True)
+    with open(metrics_file, 'a') as f:
+        for record in metrics + [summary]:
+            f.write(json.dumps({**tags, **record}) + '\n')
+    print(f"✓ Wrote {len(metrics) + 1} metric records to {metrics_file}")
+
+def append_statements(statements):
+    """
+    Keep only the statements an append load needs from the load script.
+
+    The DROP TABLE and the verification SELECTs are skipped, the latter because
+    they scan the whole table and so cost as much as the total history. The
+    session context and the idempotent CREATE ... IF NOT EXISTS statements stay,
+    so appending also works against an empty schema.
+    """
+    kept = []
+    for statement in statements:
+        upper = ' '.join(statement.split()).upper()
+        if upper.startswith('USE ') or _is_copy(statement):
+            kept.append(statement)
+        elif upper.startswith('CREATE ') and 'IF NOT EXISTS' in upper:
+            kept.append(statement)
+    return kept
+
+def load_copies_in_parallel(backend, copy_statements, workers, expected_rows=None, metrics=None):
+    """
+    Run COPY INTO statements concurrently over a small pool of connections.
+
+    Prints rows/sec for every statement and for the whole set.
+
+    Args:
+        backend: Backend from load_backends to open the connections with
+        copy_statements (list): COPY INTO statements, one per chunk or file
+        workers (int): Number of connections and concurrent statements
+        expected_rows (dict): Statement -> rows it loads, when known up front
+        metrics (list): Collects one timing record per statement when given
+    """
+    import time
+    import queue
+    from concurrent.futures import ThreadPoolExecutor
+    
+    expected_rows = expected_rows or {}
+    pool = queue.Queue()
+    for _ in range(max(1, min(workers, len(copy_statements)))):
+        pool.put(backend.connect())
+    pool_size = pool.qsize()
+    
+    def run_copy(position, statement):
+        conn = pool.get()
+        cursor = conn.cursor()
+        error = None
+        start = time.perf_counter()
+        try:
+            cursor.execute(statement)
+            rows = expected_rows.get(statement)
+            if rows is None:
+                rows = _copy_rows_loaded(cursor)
+        except Exception as e:
+            rows, error = None, e
+        seconds = time.perf_counter() - start
+        _record_metric(metrics, 'parallel_copy', statement, seconds, cursor, rows, error, position)
+        cursor.close()
+        pool.put(conn)
+        return rows, seconds, error
+    
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=pool_size) as executor:
+        results = list(executor.map(run_copy, range(1, len(copy_statements) + 1), copy_statements))
+    elapsed = time.perf_counter() - start
+    
+    while not pool.empty():
+        pool.get().close()
+    
+    total_rows = 0
+    for i, (statement, (rows, seconds, error)) in enumerate(zip(copy_statements, results), 1):
+        if error is not None:
+            print(f"⚠ Warning loading chunk {i}/{len(copy_statements)}: {error}")
+        elif rows is None:
+            print(f"✓ Chunk {i}/{len(copy_statements)} loaded in {seconds:.2f}s")
+        else:
+            total_rows += rows
+            print(f"✓ Chunk {i}/{len(copy_statements)}: {rows} rows in {seconds:.2f}s ({rows / max(seconds, 1e-9):,.0f} rows/sec)")
+    print(f"✓ Loaded {total_rows} rows from {len(copy_statements)} chunks over {pool_size} connections "
+          f"in {elapsed:.2f}s ({total_rows / max(elapsed, 1e-9):,.0f} rows/sec)")
+
+def _copy_rows_loaded(cursor):
+    """Sum the rows_loaded column of a COPY INTO result, or None when the server does not report it."""
+    try:
+        result = cursor.fetchall()
+        columns = [column[0].lower() for column in cursor.description or []]
+    except Exception:
+        return None
+    if 'rows_loaded' not in columns:
+        return None
+    index = columns.index('rows_loaded')
+    return sum(int(row[index] or 0) for row in result)
+
+def _execute_statement(cursor, position, statement, total, metrics=None):
+    """Run one statement synchronously, reporting failures as warnings."""
+    import time
+    
+    print(f"Executing statement {position}/{total}: {_preview(statement)}...")
+    rows = error = None
+    start = time.perf_counter()
+    try:
+        cursor.execute(statement)
+        if _is_copy(statement):
+            rows = _copy_rows_loaded(cursor)
+        print("✓ Statement executed successfully")
+    except Exception as e:
+        error = e
+        print(f"⚠ Warning executing statement {position}: {e}")
+        # Continue with next statement
+    _record_metric(metrics, 'script', statement, time.perf_counter() - start, cursor, rows, error, position)
+
+def _execute_wave_async(conn, cursor, wave, total, metrics=None):
+    """
+    Submit every statement of a wave through the async query API, then wait for all of them.
+
+    Running queries are polled together with exponential backoff, so every
+    statement is timed from its submission until it is seen to finish. When a
+    poll fails, the remaining statements are awaited with the blocking
+    get_results_from_sfqid instead, so the next wave never starts while a
+    statement of this one may still be running.
+
+    Returns:
+        bool: False when the server rejected the first submission, so nothing
+        ran and the caller should fall back to synchronous execution
+
+    Raises:
+        RuntimeError: A statement of the wave failed, raised once all of them have finished
+    """
+    import time
+    
+    running = {}
+    failed = []
+    for position, statement in wave:
+        print(f"Submitting statement {position}/{total}: {_preview(statement)}...")
+        start = time.perf_counter()
+        try:
+            cursor.execute_async(statement)
+        except Exception as e:
+            if not running and not failed:
+                print(f"⚠ Asynchronous execution not available ({e}), running statements one at a time")
+                return False
+            print(f"❌ Statement {position} failed: {e}")
+            failed.append(position)
+            _record_metric(metrics, 'script', statement, time.perf_counter() - start, error=e, position=position)
+            continue
+        running[cursor.sfqid] = (position, statement, start)
+    
+    delay = 0.005
+    blocking = False
+    while running:
+        for query_id in list(running):
+            position, statement, start = running[query_id]
+            rows = error = None
+            try:
+                if not blocking:
+                    try:
+                        finished = not conn.is_still_running(conn.get_query_status_throw_if_error(query_id))
+                    except Exception as e:
+                        # The status is unknown, so wait for the result instead of moving on
+                        print(f"⚠ Could not poll statement {position} ({e}), waiting for the wave to finish")
+                        blocking = True
+                        finished = True
+                    if not finished:
+                        continue
+                # Blocks until the query has finished and raises when it failed
+                cursor.get_results_from_sfqid(query_id)
+                if _is_copy(statement):
+                    rows = _copy_rows_loaded(cursor)
+                print(f"✓ Statement {position} executed successfully")
+            except Exception as e:
+                error = e
+                failed.append(position)
+                print(f"❌ Statement {position} failed: {e}")
+            seconds = time.perf_counter() - start
+            del running[query_id]
+            _record_metric(metrics, 'script', statement, seconds, cursor, rows, error, position, query_id=query_id)
+        if running and not blocking:
+            time.sleep(delay)
+            delay = min(delay * 2, 0.5)
+    if failed:
+        raise RuntimeError(f"Statement(s) {', '.join(map(str, sorted(failed)))} of the concurrent wave failed")
+    return True
+
+def execute_sql_script(conn, script_path, copy_statements=None, append=False, copy_runner=None, use_async=True,
+                       metrics=None):
+    """
+    Execute SQL script against the database.
+
+    Statements are grouped into waves by sql_statements.plan_waves: DDL runs on
+    its own as a barrier, while consecutive loads or consecutive queries are
+    independent and are submitted together through the connector's async query
+    API. Without use_async, or when the server does not support it, every
+    statement runs one at a time.
+
+    When copy_statements is given, the COPY INTO statements of the script are
+    replaced by those, e.g. to load Parquet files instead of the CSV files.
+    With append, the existing table is kept and only the new batch is copied in.
+    A copy_runner callable, when given, receives the COPY INTO statements of a
+    wave at once in place of running them here, e.g. to load them in parallel.
+    When metrics is a list, one timing record per statement is appended to it.
+    """
+    with open(script_path, 'r') as f:
+        sql_content = f.read()
+    
+    statements = split_sql_statements(sql_content)
+    if append:
+        statements = append_statements(statements)
+    if copy_statements is not None:
+        first_copy = next((i for i, s in enumerate(statements) if _is_copy(s)), len(statements))
+        other_statements = [s for s in statements if not _is_copy(s)]
+        statements = other_statements[:first_copy] + list(copy_statements) + other_statements[first_copy:]
+    
+    cursor = conn.cursor()
+    total = len(statements)
+    
+    for kind, wave in plan_waves(statements):
+        first, last = wave[0][0], wave[-1][0]
+        if copy_runner is not None and kind == LOAD and all(_is_copy(s) for _, s in wave):
+            print(f"Executing statements {first}-{last}/{total}: {len(wave)} COPY INTO statements...")
+            copy_runner([statement for _, statement in wave])
+            continue
+        if use_async and len(wave) > 1:
+            print(f"Running statements {first}-{last}/{total} ({kind}) concurrently...")
+            if _execute_wave_async(conn, cursor, wave, total, metrics):
+                continue
+            use_async = False
+        for position, statement in wave:
+            _execute_statement(cursor, position, statement, total, metrics)
     
     cursor.close()
 
-def verify_data_load(conn):
-    """Verify that data was loaded successfully."""
+def count_events(conn):
+    """Rows in the events table, 0 when it does not exist yet."""
     cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT COUNT(*) FROM events")
+        result = cursor.fetchone()
+        return result[0] if result and result[0] is not None else 0
+    except Exception:
+        return 0
+    finally:
+        cursor.close()
+
+def verify_data_load(conn, metrics=None, expected_rows=None):
+    """
+    Verify that data was loaded successfully.
+
+    COPY INTO runs with ON_ERROR = 'CONTINUE', so rows that fail to parse or
+    cast are dropped without an error. When expected_rows is given, the table
+    must hold exactly that many rows, otherwise the drop is reported.
+
+    Returns:
+        int: Rows in the events table, or None when they could not be counted
+    """
+    import time
+    
+    cursor = conn.cursor()
+    total_rows = None
     
     try:
         # Check total rows
-        cursor.execute("SELECT COUNT(*) as total_rows FROM events")
+        count_query = "SELECT COUNT(*) as total_rows FROM events"
+        start = time.perf_counter()
+        cursor.execute(count_query)
         result = cursor.fetchone()
+        _record_metric(metrics, 'verify', count_query, time.perf_counter() - start, cursor,
+                       rows=result[0] if result else None)
         if result and result[0] is not None:
             total_rows = result[0]
-            print(f"✓ Data verification: {total_rows} rows loaded")
+            if expected_rows is not None and total_rows != expected_rows:
+                print(f"❌ Data verification: {total_rows} rows in events, expected {expected_rows} "
+                      f"from the input files")
+            else:
+                print(f"✓ Data verification: {total_rows} rows loaded")
             
             if total_rows > 0:
                 # Show sample data
@@ -109,66 +908,178 @@ def verify_data_load(conn):
         print(f"⚠ Warning during verification: {e}")
     
     cursor.close()
+    return total_rows
 
 def main():
     """Main function to load events data."""
+    import gen_events
+    
     print("=== Loading Snowplow Events Data into Embucket Database ===")
     
     # Configuration
     script_dir = Path(__file__).parent
     
-    # Check if a file argument was provided
-    if len(sys.argv) > 1:
-        input_file = sys.argv[1]
-        events_file = Path(input_file)
-        
-        # Check if the input file exists
-        if not events_file.exists():
-            print(f"Error: {events_file} not found")
-            sys.exit(1)
-    else:
-        # Default behavior - use events.csv in script directory
-        events_file = script_dir / "events.csv"
+    parser = argparse.ArgumentParser(description='Load Snowplow events into Embucket')
+    parser.add_argument('inputs', nargs='*', default=[str(script_dir / "events.csv")],
+                        help='Events files, directories (e.g. a Parquet dataset from gen_events.py --format parquet) '
+                             'or quoted glob patterns such as "drops/*.csv" (default: events.csv)')
+    parser.add_argument('--format', choices=['csv', 'parquet'], default=None,
+                        help='Input format (default: inferred from the file extension)')
+    parser.add_argument('--files-per-copy', type=int, default=1,
+                        help='Batch up to N files into one multi-file COPY INTO with a FILES list (default: 1)')
+    parser.add_argument('--append', action='store_true',
+                        help='Append the file to the existing events table instead of recreating it')
+    parser.add_argument('--generate', type=int, default=None, metavar='ROWS',
+                        help='Generate ROWS events per day and load them directly, without writing CSV files')
+    parser.add_argument('--engine', choices=['python', 'numpy'], default='python',
+                        help='Generator engine for --generate (default: python)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Worker processes generating shards for --generate (default: 1)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for --generate (default: 0)')
+    parser.add_argument('--profile', choices=sorted(gen_events.PROFILES), default='flat',
+                        help='Workload profile for --generate, see gen_events.py --profile (default: flat)')
+    gen_events.add_workload_arguments(parser)
+    parser.add_argument('--queue-size', type=int, default=4,
+                        help='Generated batches that may wait for the loader with --generate (default: 4)')
+    parser.add_argument('--sync', action='store_true',
+                        help='Run every statement one at a time instead of submitting independent ones asynchronously')
+    parser.add_argument('--parallel', type=int, default=1,
+                        help='Run the COPY INTO statements over N connections; a CSV file is first split into N chunks (default: 1)')
+    parser.add_argument('--backend', choices=['embucket', 'duckdb'], default='embucket',
+                        help='Database to load into; duckdb is a local stand-in that needs no Embucket (default: embucket)')
+    parser.add_argument('--duckdb-path', default='datasets/events.duckdb',
+                        help='Database file for --backend duckdb, or :memory: (default: datasets/events.duckdb)')
+    parser.add_argument('--metrics-file', default=str(script_dir / "dbt-snowplow-web" / "assets" / "load_metrics.ndjson"),
+                        help='NDJSON file to append per-statement timings to, empty to disable '
+                             '(default: dbt-snowplow-web/assets/load_metrics.ndjson)')
+    parser.add_argument('--metrics-label', default=os.getenv('EMBUCKET_BUILD', ''),
+                        help='Label stored with every metric record, e.g. the Embucket build (default: $EMBUCKET_BUILD)')
+    args = parser.parse_args()
     
     sql_script = script_dir / "load_events_data.sql"
     
     # Check if required files exist
-    if not events_file.exists():
-        print(f"Error: {events_file} not found")
+    directories, files = resolve_input_files(args.inputs, args.format) if args.generate is None else ([], [])
+    missing = [source for source, _ in files if not os.path.exists(source)]
+    if missing:
+        print(f"Error: {missing[0]} not found")
+        sys.exit(1)
+    if args.generate is None and not directories and not files:
+        print(f"Error: no {args.format or 'CSV or Parquet'} files match {' '.join(args.inputs)}")
+        sys.exit(1)
+    staged_names = [name for _, name in files]
+    if len(set(staged_names)) != len(staged_names):
+        print("Error: several input files would be staged under the same name; pass their directory instead")
         sys.exit(1)
     
     if not sql_script.exists():
         print(f"Error: {sql_script} not found")
         sys.exit(1)
     
-    # Copy file to data directory
-    print(f"Copying {events_file} to data directory...")
-    copy_file_to_data_dir(str(events_file))
+    import event_schema
+    for stale in event_schema.stale_files():
+        print(f"⚠ Warning: {stale.name} differs from event_schema.py; run: python3 event_schema.py sync")
+    
+    # The DDL runs once and every file is loaded over the same session
+    # Generated batches are loaded straight into the table, so then the script's COPY INTO statements are dropped
+    expected_rows = None
+    input_rows = None
+    copy_statements = []
+    single_csv = not directories and len(files) == 1 and (args.format or file_format_of(files[0][0])) == 'csv'
+    if args.generate is not None:
+        print("Loading generated events directly, nothing to stage")
+        input_rows = args.generate * (1 if args.append else 2)
+    elif args.parallel > 1 and single_csv:
+        source_file = files[0][0]
+        print(f"Copying {source_file} to data directory...")
+        chunks = split_file_to_data_dir(source_file, args.parallel)
+        copy_statements = [copy_into_statement(f"file://{CONTAINER_DATA_DIR}/{path}") for path, _ in chunks]
+        expected_rows = {statement: rows for statement, (_, rows) in zip(copy_statements, chunks)}
+        input_rows = sum(rows for _, rows in chunks)
+    else:
+        print(f"Copying {len(directories) + len(files)} input(s) to data directory...")
+        staged_files = []
+        for directory in directories:
+            patterns = (f'*.{args.format}',) if args.format else ('*.csv', '*.parquet')
+            staged_files.extend(copy_dataset_to_data_dir(directory, patterns=patterns))
+        if files:
+            # Load exactly the given files, so an append never re-copies an earlier batch
+            staged_files.extend(copy_files_to_data_dir(files))
+        copy_statements = build_copy_statements(staged_files, args.format, args.files_per_copy)
+        input_rows = sum(count_file_rows(os.path.join("./datasets", name)) for name in staged_files)
+    
+    # Connect to the database
+    if args.backend == 'duckdb':
+        backend = DuckDBBackend(args.duckdb_path, container_dir=CONTAINER_DATA_DIR,
+                                schema=get_connection_config()['schema'])
+    else:
+        backend = EmbucketBackend(get_connection_config())
+    print(f"Connecting to {backend.label}...")
+    copy_runner = None
+    if args.parallel > 1:
+        def copy_runner(statements):
+            load_copies_in_parallel(backend, statements, args.parallel, expected_rows, metrics)
     
-    # Connect to Embucket
-    print("Connecting to Embucket...")
-    config = get_connection_config()
+    import time
+    import uuid
+    from datetime import datetime, timezone
     
+    metrics = [] if args.metrics_file else None
+    run = {
+        'run_id': uuid.uuid4().hex,
+        'started_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'label': args.metrics_label,
+        'backend': backend.name,
+        'mode': 'generate' if args.generate is not None else args.format or 'auto',
+        'inputs': len(directories) + len(files),
+        'append': args.append,
+        'parallel': args.parallel,
+    }
+    start = time.perf_counter()
     try:
-        conn = snowflake.connector.connect(**config)
-        print("✓ Connected to Embucket successfully")
+        conn = backend.connect()
+        print(f"✓ Connected to {backend.label} successfully")
+        
+        # Rows already in the table stay there on an append
+        rows_before = count_events(conn) if args.append else 0
         
         # Execute SQL script
         print("Executing SQL script...")
-        execute_sql_script(conn, sql_script)
+        execute_sql_script(conn, sql_script, copy_statements=copy_statements, append=args.append,
+                           copy_runner=copy_runner, use_async=backend.supports_async and not args.sync,
+                           metrics=metrics)
+        
+        if args.generate is not None:
+            print(f"Generating and loading {args.generate} events per day...")
+            load_generated_events(conn, backend.write_table, args.generate, args.engine, args.workers, args.seed,
+                                  append=args.append, queue_size=args.queue_size, metrics=metrics,
+                                  profile=gen_events.profile_from_args(args, args.seed),
+                                  anomalies=gen_events.anomalies_from_args(args))
         
         # Verify data load
         print("Verifying data load...")
-        verify_data_load(conn)
+        expected_total = rows_before + input_rows
+        total_rows = verify_data_load(conn, metrics, expected_total)
         
         conn.close()
+        if total_rows is not None and total_rows != expected_total:
+            raise RuntimeError(f"events holds {total_rows} rows instead of {expected_total}; "
+                               "check the input against event_schema.py")
         print("✓ Data load completed successfully!")
         
     except Exception as e:
         print(f"Error: {e}")
         sys.exit(1)
+    finally:
+        if metrics is not None:
+            run['seconds'] = round(time.perf_counter() - start, 6)
+            write_load_metrics(args.metrics_file, metrics, run)
     
     print("\n=== Data Load Process Complete ===")
+    if args.backend == 'duckdb':
+        print("\nTo query the loaded data:")
+        print(f"python3 -c \"import duckdb; conn = duckdb.connect('{args.duckdb_path}'); print(conn.execute('SELECT COUNT(*) FROM {backend.schema}.events').fetchone()[0])\"")
+        return
     print("\nTo verify the data was loaded correctly, you can run:")
     print("python3 -c \"import snowflake.connector; conn = snowflake.connector.connect(host='localhost', port=3000, protocol='http', user='embucket', password='embucket', account='acc', database='embucket', schema='public_snowplow_manifest'); cursor = conn.cursor(); cursor.execute('SELECT COUNT(*) as total_rows FROM events'); print(cursor.fetchone()[0]); conn.close()\"")
     
@@ -16,6 +16,7 @@ USE SCHEMA public_snowplow_manifest;
 DROP TABLE IF EXISTS events;
 
 -- Step 3: Create the events table with appropriate data types
+-- The column list is generated from event_schema.py: edit COLUMNS there and run `python3 event_schema.py sync`
 CREATE TABLE IF NOT EXISTS events (
     app_id STRING,
     platform STRING,
@@ -24,7 +25,7 @@ CREATE TABLE IF NOT EXISTS events (
     dvce_created_tstamp TIMESTAMP_NTZ,
     event STRING,
     event_id STRING,
-    txn_id STRING,
+    txn_id INTEGER,
     name_tracker STRING,
     v_tracker STRING,
     v_collector STRING,
@@ -73,12 +74,12 @@ CREATE TABLE IF NOT EXISTS events (
     se_action STRING,
     se_label STRING,
     se_property STRING,
-    se_value STRING,
+    se_value DOUBLE,
     tr_orderid STRING,
     tr_affiliation STRING,
-    tr_total DOUBLE,
-    tr_tax DOUBLE,
-    tr_shipping DOUBLE,
+    tr_total DECIMAL(18,2),
+    tr_tax DECIMAL(18,2),
+    tr_shipping DECIMAL(18,2),
     tr_city STRING,
     tr_state STRING,
     tr_country STRING,
@@ -86,7 +87,7 @@ CREATE TABLE IF NOT EXISTS events (
     ti_sku STRING,
     ti_name STRING,
     ti_category STRING,
-    ti_price DOUBLE,
+    ti_price DECIMAL(18,2),
     ti_quantity INTEGER,
     pp_xoffset_min INTEGER,
     pp_xoffset_max INTEGER,
@@ -109,7 +110,7 @@ CREATE TABLE IF NOT EXISTS events (
     br_features_gears BOOLEAN,
     br_features_silverlight BOOLEAN,
     br_cookies BOOLEAN,
-    br_colordepth INTEGER,
+    br_colordepth STRING,
     br_viewwidth INTEGER,
     br_viewheight INTEGER,
     os_name STRING,
@@ -124,11 +125,11 @@ CREATE TABLE IF NOT EXISTS events (
     doc_width INTEGER,
     doc_height INTEGER,
     tr_currency STRING,
-    tr_total_base DOUBLE,
-    tr_tax_base DOUBLE,
-    tr_shipping_base DOUBLE,
+    tr_total_base DECIMAL(18,2),
+    tr_tax_base DECIMAL(18,2),
+    tr_shipping_base DECIMAL(18,2),
     ti_currency STRING,
-    ti_price_base DOUBLE,
+    ti_price_base DECIMAL(18,2),
     base_currency STRING,
     geo_timezone STRING,
     mkt_clickid STRING,
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Extract per-model dbt execution times from run_results.json and detect regressions.
+
+Every model's execution_time is stored in model_timings_{label}.json and
+compared against that label's saved baseline (full or incremental), so a model that
+slows down past the threshold is flagged, or fails the run with --fail-on-regression.
+"""
+
+import os
+import sys
+import json
+import argparse
+
+def parse_run_results(file_path='dbt-snowplow-web/target/run_results.json'):
+    """
+    Read the model results of a dbt run.
+
+    Args:
+        file_path (str): Path to dbt's target/run_results.json
+
+    Returns:
+        list: Dicts with name, unique_id, status, execution_time and rows_affected, slowest first
+    """
+    with open(file_path, 'r') as f:
+        run_results = json.load(f)
+
+    models = []
+    for result in run_results.get('results', []):
+        unique_id = result.get('unique_id', '')
+        if not unique_id.startswith('model.'):
+            continue
+        models.append({
+            'name': unique_id.split('.')[-1],
+            'unique_id': unique_id,
+            'status': result.get('status'),
+            'execution_time': round(float(result.get('execution_time') or 0.0), 3),
+            'rows_affected': (result.get('adapter_response') or {}).get('rows_affected'),
+        })
+    return sorted(models, key=lambda model: model['execution_time'], reverse=True)
+
+def load_baseline(file_path):
+    """Read a baseline file, {model name: seconds}, or an empty one."""
+    try:
+        with open(file_path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def compare_to_baseline(models, baseline, threshold=0.25, min_seconds=0.5):
+    """
+    Mark every model with its baseline time and whether it regressed.
+
+    A model regressed when it is more than `threshold` (a fraction) slower than
+    its baseline and also at least `min_seconds` slower, so sub-second jitter
+    on tiny models is not reported.
+
+    Returns:
+        list: The regressed models
+    """
+    regressions = []
+    for model in models:
+        baseline_time = baseline.get(model['name'])
+        model['baseline_time'] = baseline_time
+        model['regressed'] = False
+        if baseline_time is None or model['status'] != 'success':
+            continue
+        slowdown = model['execution_time'] - baseline_time
+        if model['execution_time'] > baseline_time * (1 + threshold) and slowdown >= min_seconds:
+            model['regressed'] = True
+            regressions.append(model)
+    return regressions
+
+def print_timings(models, top=20):
+    """Print the slowest models with their change against the baseline."""
+    print(f"\n{'model':<60} {'status':<8} {'seconds':>9} {'baseline':>9} {'change':>8}")
+    for model in models[:top]:
+        baseline_time = model.get('baseline_time')
+        if baseline_time:
+            change = f"{(model['execution_time'] / baseline_time - 1) * 100:+.0f}%"
+        else:
+            change = '-'
+        baseline_text = f"{baseline_time:.2f}" if baseline_time is not None else '-'
+        flag = '  ⚠' if model.get('regressed') else ''
+        print(f"{model['name']:<60} {str(model['status']):<8} {model['execution_time']:>9.2f} "
+              f"{baseline_text:>9} {change:>8}{flag}")
+    total = sum(model['execution_time'] for model in models)
+    print(f"{len(models)} models, {total:.2f}s total execution time")
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-model dbt timings from run_results.json with regression detection')
+    parser.add_argument('--run-results', default='dbt-snowplow-web/target/run_results.json',
+                        help='Path to run_results.json (default: dbt-snowplow-web/target/run_results.json)')
+    parser.add_argument('--output-dir', default='dbt-snowplow-web/assets',
+                        help='Directory for the timings and the baseline (default: dbt-snowplow-web/assets)')
+    parser.add_argument('--baseline', default=None,
+                        help='Baseline file (default: OUTPUT_DIR/model_timings_baseline_LABEL.json)')
+    parser.add_argument('--label', default='full',
+                        help='Run label, e.g. full or incremental; names the timings and the baseline files (default: full)')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Relative slowdown that counts as a regression (default: 0.25 = 25%%)')
+    parser.add_argument('--min-seconds', type=float, default=0.5,
+                        help='Absolute slowdown a regression must also exceed (default: 0.5)')
+    parser.add_argument('--update-baseline', action='store_true', help='Save this run as the new baseline for the label')
+    parser.add_argument('--fail-on-regression', action='store_true', help='Exit with status 1 when any model regressed')
+    args = parser.parse_args()
+
+    try:
+        models = parse_run_results(args.run_results)
+    except (OSError, ValueError) as e:
+        print(f"Error reading {args.run_results}: {e}")
+        return 1
+
+    baseline_file = args.baseline or os.path.join(args.output_dir, f'model_timings_baseline_{args.label}.json')
+    baseline = load_baseline(baseline_file)
+    regressions = compare_to_baseline(models, baseline, args.threshold, args.min_seconds)
+    print_timings(models)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    timings_file = os.path.join(args.output_dir, f'model_timings_{args.label}.json')
+    with open(timings_file, 'w') as f:
+        json.dump({'label': args.label, 'threshold': args.threshold, 'models': models}, f, indent=2)
+    print(f"Model timings saved to {timings_file}")
+
+    if args.update_baseline or not baseline:
+        baseline = {model['name']: model['execution_time'] for model in models if model['status'] == 'success'}
+        with open(baseline_file, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Baseline for {args.label} saved to {baseline_file}")
+
+    for model in regressions:
+        print(f"⚠ {model['name']} regressed: {model['execution_time']:.2f}s vs {model['baseline_time']:.2f}s baseline")
+    if regressions and args.fail_on_regression:
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
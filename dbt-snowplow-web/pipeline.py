@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+"""
+Run the dbt-snowplow-web benchmark pipeline with cached setup stages.
+
+The stages env, clone, deps, seed, generate and load are keyed by a content
+hash of their inputs, kept in .pipeline_cache.json, and skipped when nothing
+changed since their last successful run. run and report always execute, so a
+repeat run spends its time on the dbt workload instead of on setup.
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import subprocess
+from datetime import date
+from pathlib import Path
+
+from query_profile import run_query_tag
+
+SCRIPT_DIR = Path(__file__).parent.resolve()
+CLONE_DIR = SCRIPT_DIR / 'dbt-snowplow-web'
+CLONE_URL = 'https://github.com/snowplow/dbt-snowplow-web.git'
+CACHE_FILE = SCRIPT_DIR / '.pipeline_cache.json'
+VENV_DIR = SCRIPT_DIR / 'env'
+
+# dbt versions run_snowplow_web.sh installs
+DBT_PACKAGES = ['dbt-core==1.9.8', 'dbt-snowflake==1.9.1']
+
+STAGES = ['env', 'container', 'clone', 'deps', 'seed', 'generate', 'load', 'run', 'report']
+
+def content_hash(*inputs):
+    """
+    Hash files, directories and plain values into one cache key.
+
+    Directories are hashed recursively by relative path and content; a missing
+    path hashes as missing, so creating it changes the key.
+    """
+    digest = hashlib.sha256()
+    for item in inputs:
+        path = item if isinstance(item, Path) else None
+        if path is None:
+            digest.update(f"value:{item}\0".encode())
+        elif path.is_dir():
+            for file in sorted(p for p in path.rglob('*') if p.is_file()):
+                digest.update(f"file:{file.relative_to(path)}\0".encode())
+                digest.update(file.read_bytes())
+        elif path.is_file():
+            digest.update(f"file:{path.name}\0".encode())
+            digest.update(path.read_bytes())
+        else:
+            digest.update(f"missing:{path}\0".encode())
+    return digest.hexdigest()
+
+def load_cache():
+    """Read the stage cache, or an empty one."""
+    try:
+        with open(CACHE_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_cache(cache):
+    """Write the stage cache atomically."""
+    tmp_file = CACHE_FILE.with_suffix('.tmp')
+    with open(tmp_file, 'w') as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+    os.replace(tmp_file, CACHE_FILE)
+
+def run_command(command, cwd=SCRIPT_DIR, env=None, log_file=None):
+    """
+    Run a command, failing the pipeline when it fails.
+
+    With log_file the output is also written to that file, like `| tee`.
+    """
+    print(f"$ {' '.join(str(part) for part in command)}")
+    if log_file is None:
+        subprocess.run([str(part) for part in command], cwd=cwd, env=env, check=True)
+        return
+
+    os.makedirs(os.path.dirname(log_file), exist_ok=True)
+    with open(log_file, 'w') as log:
+        process = subprocess.Popen([str(part) for part in command], cwd=cwd, env=env,
+                                   stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        for line in process.stdout:
+            sys.stdout.write(line)
+            log.write(line)
+        # dbt exits non-zero when a model fails, which is a result to report, not a pipeline failure
+        process.wait()
+
+def dbt_env(target):
+    """Environment for dbt commands, as run_snowplow_web.sh exports it."""
+    env = dict(os.environ)
+    env.update({
+        'DBT_TARGET': target,
+        'EMBUCKET_HOST': 'localhost',
+        'EMBUCKET_PORT': '3000',
+        'EMBUCKET_PROTOCOL': 'http',
+        'EMBUCKET_ACCOUNT': 'test',
+        'EMBUCKET_USER': os.getenv('EMBUCKET_USER', 'embucket'),
+        'EMBUCKET_PASSWORD': os.getenv('EMBUCKET_PASSWORD', 'embucket'),
+        'EMBUCKET_ROLE': 'SYSADMIN',
+        'EMBUCKET_DATABASE': 'EMBUCKET',
+        'EMBUCKET_WAREHOUSE': 'COMPUTE_WH',
+        'EMBUCKET_SCHEMA': 'public',
+    })
+    return env
+
+def container_identity():
+    """
+    Identify the running Embucket instance, so warehouse state cached against
+    an older container is not reused after it was recreated.
+    """
+    try:
+        result = subprocess.run(['docker', 'inspect', '-f', '{{.Id}} {{.State.StartedAt}}', 'em'],
+                                capture_output=True, text=True)
+    except OSError:
+        return 'external'
+    return result.stdout.strip() if result.returncode == 0 else 'external'
+
+# Workload shares passed on to gen_events.py, with their short names in report labels
+WORKLOAD_SHARES = [('late_share', 'late'), ('delayed_share', 'delayed'), ('duplicate_share', 'dup'), ('bot_share', 'bot')]
+
+def generator_options(args):
+    """gen_events.py options of the workload: profile and late, duplicate and bot events."""
+    options = ['--profile', args.profile, '--late-lag', args.late_lag, '--late-lag-hours', args.late_lag_hours]
+    for name, _ in WORKLOAD_SHARES:
+        options += [f"--{name.replace('_', '-')}", getattr(args, name)]
+    return options
+
+def workload_label(phase, args):
+    """
+    Report label of a phase, e.g. 'full-web-bot0.1'.
+
+    Runs of another workload get their own model timing baseline and history
+    series, so the effect of every knob shows up next to the default workload.
+    """
+    parts = [phase] + ([args.profile] if args.profile != 'flat' else [])
+    parts += [f"{short}{getattr(args, name):g}" for name, short in WORKLOAD_SHARES if getattr(args, name)]
+    return '-'.join(parts)
+
+class Pipeline:
+    """Stage runner sharing the cache, options and the tools of the env stage."""
+
+    def __init__(self, args):
+        self.args = args
+        self.cache = load_cache()
+        self.force = set(STAGES if 'all' in args.force else args.force)
+        self.timings = []
+        self.phase = 'setup'
+        if args.no_venv:
+            self.python = Path(sys.executable)
+            self.dbt = 'dbt'
+        else:
+            self.python = VENV_DIR / 'bin' / 'python'
+            self.dbt = VENV_DIR / 'bin' / 'dbt'
+        if args.format == 'parquet':
+            self.yesterday_input, self.today_input = 'events_yesterday', 'events_today'
+        else:
+            self.yesterday_input, self.today_input = 'events_yesterday.csv', 'events_today.csv'
+        self.container = 'external'
+
+    def stage(self, name, key=None, outputs=(), action=None):
+        """
+        Run one stage unless its key and outputs match the last successful run.
+
+        A stage without a key always runs.
+        """
+        print("###############################")
+        print("")
+        start = time.perf_counter()
+        cached = (key is not None and name not in self.force and self.cache.get(name) == key
+                  and all(Path(output).exists() for output in outputs))
+        if cached:
+            print(f"✓ {name}: up to date, skipped")
+        else:
+            print(f"Running stage {name}...")
+            action()
+            if key is not None:
+                self.cache[name] = key
+                save_cache(self.cache)
+        seconds = time.perf_counter() - start
+        self.timings.append({'stage': name, 'phase': self.phase, 'seconds': seconds, 'cached': cached})
+        print(f"✓ {name} finished in {seconds:.1f}s")
+        print("")
+
+    def invalidate(self, *names):
+        """Forget stages whose result no longer matches what is in the warehouse."""
+        for name in names:
+            self.cache.pop(name, None)
+        save_cache(self.cache)
+
+    def env(self):
+        if self.args.no_venv:
+            return
+
+        def action():
+            if not self.python.exists():
+                run_command([sys.executable, '-m', 'venv', VENV_DIR])
+            run_command([self.python, '-m', 'pip', 'install', '--quiet', '--upgrade', 'pip'])
+            run_command([self.python, '-m', 'pip', 'install', '--quiet', '-r', SCRIPT_DIR / 'requirements.txt',
+                         *DBT_PACKAGES])
+        self.stage('env', content_hash(SCRIPT_DIR / 'requirements.txt', *DBT_PACKAGES, sys.version),
+                   [self.python], action)
+
+    def warehouse(self, *args, check=True):
+        """Run warehouse.py with the env stage's interpreter; returns whether it succeeded."""
+        command = [self.python, 'warehouse.py', *args]
+        if check:
+            run_command(command)
+            return True
+        return subprocess.run([str(part) for part in command], cwd=SCRIPT_DIR, capture_output=True).returncode == 0
+
+    def container_stage(self):
+        # Cheap to check, so it is never cached. A running Embucket is kept warm: only the
+        # schemas of the previous run are reset, instead of rebuilding the container
+        def action():
+            if self.args.target != 'embucket':
+                print(f"✓ Target {self.args.target} does not use the Embucket container")
+                return
+            if not self.args.clean and self.warehouse('wait', '--timeout', '1', check=False):
+                print("✓ Reusing the running Embucket container")
+                self.warehouse('reset')
+                # The reset dropped the events table, so the load has to run again
+                self.invalidate('load')
+            else:
+                run_command([SCRIPT_DIR / 'setup_docker.sh'])
+                self.warehouse('wait', '--timeout', '300')
+            self.container = container_identity()
+        self.stage('container', action=action)
+
+    def clone(self):
+        def action():
+            if not (CLONE_DIR / '.git').exists():
+                run_command(['git', 'clone', CLONE_URL, CLONE_DIR])
+            else:
+                print(f"✓ {CLONE_DIR.name} already cloned")
+        self.stage('clone', content_hash(CLONE_URL), [CLONE_DIR / '.git'], action)
+
+        # Our dbt_project.yml and profiles.yml replace the upstream ones
+        for name in ('dbt_project.yml', 'profiles.yml'):
+            source, target = SCRIPT_DIR / name, CLONE_DIR / name
+            if not target.exists() or target.read_bytes() != source.read_bytes():
+                target.write_bytes(source.read_bytes())
+
+    def deps(self):
+        key = content_hash(CLONE_DIR / 'packages.yml', CLONE_DIR / 'dependencies.yml', CLONE_DIR / 'dbt_project.yml',
+                           *DBT_PACKAGES)
+        action = lambda: run_command([self.dbt, 'deps'], cwd=CLONE_DIR, env=dbt_env(self.args.target))
+        self.stage('deps', key, [CLONE_DIR / 'dbt_packages'], action)
+
+    def seed(self):
+        key = content_hash(CLONE_DIR / 'seeds', CLONE_DIR / 'dbt_project.yml', CLONE_DIR / 'profiles.yml',
+                           self.cache.get('deps'), self.args.target, self.container)
+        action = lambda: run_command([self.dbt, 'seed', '--full-refresh'], cwd=CLONE_DIR, env=dbt_env(self.args.target))
+        self.stage('seed', key, action=action)
+
+    def generate(self):
+        args = self.args
+        # gen_events.py writes yesterday's and today's events, so the files only hold for the day they were made
+        self.generate_key = content_hash(SCRIPT_DIR / 'gen_events.py', SCRIPT_DIR / 'event_schema.py',
+                                         SCRIPT_DIR / 'dataset_cache.py', SCRIPT_DIR / 'load_events_data.sql',
+                                         date.today().isoformat(), args.rows, args.format, args.engine, args.seed,
+                                         *generator_options(args))
+        command = [self.python, 'gen_events.py', args.rows, '--format', args.format, '--engine', args.engine,
+                   '--workers', args.workers, '--seed', args.seed, *generator_options(args), '--append-only']
+        # A forced generation is meant to be timed, so it is never restored from the dataset cache
+        if not args.no_cache and 'generate' not in self.force:
+            command.append('--cache')
+        action = lambda: run_command(command)
+        self.stage('generate', self.generate_key,
+                   [SCRIPT_DIR / self.yesterday_input, SCRIPT_DIR / self.today_input], action)
+
+    def load(self, append=False):
+        command = [self.python, 'load_events.py', self.today_input if append else self.yesterday_input,
+                   '--metrics-file', CLONE_DIR / 'assets' / 'load_metrics.ndjson']
+        if append:
+            # Appending is never repeatable, so it always runs and the cached full load no longer holds
+            self.stage('load', action=lambda: run_command(command + ['--append']))
+            self.invalidate('load')
+            return
+        key = content_hash(self.generate_key, SCRIPT_DIR / 'load_events.py', SCRIPT_DIR / 'load_backends.py',
+                           SCRIPT_DIR / 'sql_statements.py', SCRIPT_DIR / 'event_schema.py',
+                           SCRIPT_DIR / 'load_events_data.sql', self.container)
+        self.stage('load', key, action=lambda: run_command(command))
+
+    def run(self, dbt_vars=None):
+        command = [self.dbt, 'run']
+        if self.args.model:
+            command += ['--select', f"+{self.args.model}"]
+        if self.args.query_profile:
+            # Tag this run's queries and log every statement as JSON for query_profile.py
+            self.query_tag = run_query_tag()
+            dbt_vars = dict(dbt_vars or {}, snowplow__query_tag=self.query_tag)
+            command += ['--log-format-file', 'json']
+        if dbt_vars:
+            command += ['--vars', json.dumps(dbt_vars)]
+        self.stage('run', action=lambda: run_command(command, cwd=CLONE_DIR, env=dbt_env(self.args.target),
+                                                     log_file=CLONE_DIR / 'assets' / 'run.log'))
+
+    def report(self):
+        def action():
+            run_results = CLONE_DIR / 'target' / 'run_results.json'
+            label = workload_label(self.phase, self.args)
+            command = [self.python, 'model_timings.py', '--run-results', run_results,
+                       '--output-dir', 'dbt-snowplow-web/assets', '--label', label,
+                       '--threshold', self.args.regression_threshold]
+            if self.args.fail_on_regression:
+                command.append('--fail-on-regression')
+            if run_results.exists():
+                run_command(command)
+            else:
+                print(f"⚠ {run_results} not found, skipping model timings")
+            if self.args.target == 'embucket':
+                run_command([self.python, 'analyze_log.py', '--log', 'dbt-snowplow-web/assets/run.log',
+                             '--output-dir', 'dbt-snowplow-web/assets'])
+                run_command([self.python, 'generate_dbt_test_assets.py', '--output-dir', 'dbt-snowplow-web/assets',
+                             '--errors-file', 'dbt-snowplow-web/assets/top_errors.txt', '--label', label])
+            else:
+                print("✓ Run status charts are only generated for the embucket target")
+            if self.args.query_profile:
+                run_command([self.python, 'query_profile.py', '--query-tag', self.query_tag,
+                             '--log-file', CLONE_DIR / 'logs' / 'dbt.log', '--run-results', run_results,
+                             '--output-dir', 'dbt-snowplow-web/assets', '--label', label])
+            run_command([self.python, 'history.py', 'record', '--label', label, '--rows', self.args.rows,
+                         '--target', self.args.target, *self.history_timings()])
+        self.stage('report', action=action)
+
+    def history_timings(self):
+        """
+        history.py options with the wall time of the stages that ran for this phase.
+
+        Generation runs once before the full run, so it belongs to the full run;
+        cached stages did no work and are left out.
+        """
+        options = []
+        if self.phase == 'incremental':
+            options.append('--incremental')
+        for stage in ('generate', 'load', 'run'):
+            phases = ('setup', 'full') if stage == 'generate' and self.phase == 'full' else (self.phase,)
+            seconds = [t['seconds'] for t in self.timings if t['stage'] == stage and t['phase'] in phases and not t['cached']]
+            if seconds:
+                options += [f"--{stage}-seconds", f"{sum(seconds):.3f}"]
+        return options
+
+    def run_all(self):
+        """Run every stage in order, skipping the cached ones."""
+        self.env()
+        self.container_stage()
+        self.clone()
+        self.deps()
+        self.seed()
+        self.generate()
+
+        # FIRST RUN
+        self.phase = 'full'
+        self.load()
+        self.run()
+        self.report()
+
+        if self.args.incremental:
+            # SECOND RUN INCREMENTAL, events_today only holds today's events
+            self.phase = 'incremental'
+            self.load(append=True)
+            self.run()
+            self.report()
+
+    def print_timings(self):
+        print("=== Stage timings ===")
+        for timing in self.timings:
+            print(f"  {timing['phase']:<12} {timing['stage']:<10} {timing['seconds']:>8.1f}s"
+                  f"{'  (cached)' if timing['cached'] else ''}")
+        print(f"  {'total':<23} {sum(timing['seconds'] for timing in self.timings):>8.1f}s")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Run the dbt-snowplow-web benchmark with cached setup stages')
+    parser.add_argument('--incremental', action='store_true',
+                        help="After the first run, append today's events and run dbt again")
+    parser.add_argument('--rows', type=int, default=10000, help='Events to generate per day (default: 10000)')
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv', help='Generated file format (default: csv)')
+    parser.add_argument('--engine', choices=['python', 'numpy'], default='python', help='Generator engine (default: python)')
+    parser.add_argument('--workers', type=int, default=1, help='Generator worker processes (default: 1)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Generator seed; fixed so unchanged inputs reuse the generated files (default: 0)')
+    parser.add_argument('--profile', choices=['flat', 'web'], default='flat',
+                        help='Generator workload profile, see gen_events.py --profile (default: flat)')
+    parser.add_argument('--late-share', type=float, default=0.0, help='Share of late events, see gen_events.py (default: 0)')
+    parser.add_argument('--delayed-share', type=float, default=0.0,
+                        help='Share of delayed events, see gen_events.py (default: 0)')
+    parser.add_argument('--late-lag', choices=['exponential', 'pareto', 'uniform'], default='exponential',
+                        help='Lag distribution of late and delayed events (default: exponential)')
+    parser.add_argument('--late-lag-hours', type=float, default=24.0,
+                        help='Mean lag of late and delayed events in hours (default: 24)')
+    parser.add_argument('--duplicate-share', type=float, default=0.0,
+                        help='Share of events with a duplicate event_id (default: 0)')
+    parser.add_argument('--bot-share', type=float, default=0.0, help='Share of bot sessions (default: 0)')
+    parser.add_argument('--target', default='embucket', help='dbt target (default: embucket)')
+    parser.add_argument('--model', default=None, help='Only run this model and its parents')
+    parser.add_argument('--force', nargs='+', default=[], choices=STAGES + ['all'], metavar='STAGE',
+                        help=f"Run these stages even when cached: {', '.join(STAGES)} or all")
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Always generate the events instead of restoring them from the dataset cache')
+    parser.add_argument('--clean', action='store_true',
+                        help='Rebuild a clean Embucket container instead of resetting the schemas of a running one')
+    parser.add_argument('--regression-threshold', type=float, default=0.25,
+                        help='Relative slowdown of a dbt model that counts as a regression (default: 0.25)')
+    parser.add_argument('--fail-on-regression', action='store_true',
+                        help='Fail the run when a dbt model is slower than its baseline by more than the threshold')
+    parser.add_argument('--query-profile', action='store_true',
+                        help='Tag every dbt query with a per-run query tag and report the slowest statements per model')
+    parser.add_argument('--no-venv', action='store_true',
+                        help='Use the current interpreter and its dbt instead of the env/ virtualenv')
+    return parser.parse_args(argv)
+
+def main():
+    """Run every stage in order, skipping the cached ones."""
+    args = parse_args()
+    pipeline = Pipeline(args)
+
+    print("=== dbt-snowplow-web pipeline ===")
+    try:
+        pipeline.run_all()
+    except (subprocess.CalledProcessError, RuntimeError) as e:
+        print(f"❌ Error: {e}")
+        pipeline.print_timings()
+        sys.exit(1)
+
+    pipeline.print_timings()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Query-level profile of a dbt-snowplow-web run with a hotspot report per model.
+
+The snowplow_web models set the session query tag from snowplow__query_tag, and
+dbt prefixes every statement with a query comment naming the node that sent it.
+A profiled run sets a query tag unique to that run. Afterwards its statements
+are read from the warehouse's query history by that tag, with elapsed time,
+rows produced and bytes scanned. When the warehouse has no queryable history,
+they are read from dbt's JSON log file instead, which has the client-side
+elapsed time and the rows of every statement. Statements are attributed to
+models by the node_id of their query comment, and the slowest ones of each
+model are ranked in the hotspot report.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+
+# The query tag snowplow__query_tag sets in dbt_project.yml
+DEFAULT_QUERY_TAG = 'snowplow_dbt'
+
+# Statements of these dbt nodes are reported
+MODEL_PREFIX = 'model.snowplow_web.'
+
+# The query history of the tagged statements; {tag} is replaced by the run's query tag.
+# Elapsed times are in milliseconds, as Snowflake's INFORMATION_SCHEMA.QUERY_HISTORY reports them
+HISTORY_SQL = """
+SELECT query_id, query_text, total_elapsed_time, rows_produced, bytes_scanned, execution_status
+FROM TABLE(information_schema.query_history(RESULT_LIMIT => 10000))
+WHERE query_tag = '{tag}'
+"""
+
+# dbt's default query comment: /* {"app": "dbt", ..., "node_id": "model.snowplow_web.x"} */
+QUERY_COMMENT = re.compile(r'/\*\s*(\{.*?\})\s*\*/', re.S)
+
+# Rows in a dbt adapter response such as 'SUCCESS 1200'
+STATUS_ROWS = re.compile(r'(\d+)\s*$')
+
+def run_query_tag(base=DEFAULT_QUERY_TAG):
+    """A query tag unique to one run, e.g. snowplow_dbt_20240101T120000_4f2a."""
+    return f"{base}_{time.strftime('%Y%m%dT%H%M%S')}_{os.getpid() & 0xffff:04x}"
+
+def node_of(sql):
+    """The node_id of dbt's query comment in a statement, or None."""
+    match = QUERY_COMMENT.search(sql or '')
+    if not match:
+        return None
+    try:
+        return json.loads(match.group(1)).get('node_id')
+    except ValueError:
+        return None
+
+def statement_text(sql, width=None):
+    """A statement without its query comment, on a single line."""
+    text = ' '.join(QUERY_COMMENT.sub(' ', sql or '', count=1).split())
+    return text[:width] if width else text
+
+def statement_kind(sql):
+    """The leading keywords of a statement, e.g. 'create or replace' or 'merge'."""
+    words = statement_text(sql, 80).lower().split()
+    if words[:3] == ['create', 'or', 'replace']:
+        return 'create or replace'
+    return ' '.join(words[:2] if words[:1] in (['alter'], ['drop'], ['create']) else words[:1])
+
+def read_dbt_log(log_file, invocation_id=None):
+    """
+    Read the statements of one dbt invocation from a JSON log file.
+
+    dbt writes one SQLQuery event when it sends a statement and one
+    SQLQueryStatus event when the statement returns, both on the connection of
+    the node. The file is appended to by every invocation, so only the given
+    invocation, or else the last one, is read.
+
+    Args:
+        log_file (str): dbt's logs/dbt.log written with --log-format-file json
+        invocation_id (str): Invocation to read, e.g. from run_results.json
+
+    Returns:
+        list: Dicts with node_id, query_id, sql, seconds, rows, bytes_scanned and status
+    """
+    statements = []
+    pending = {}
+    current = invocation_id
+    with open(log_file, 'r', errors='replace') as f:
+        for line in f:
+            if not line.startswith('{'):
+                continue
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            info, data = event.get('info', {}), event.get('data', {})
+            if info.get('name') not in ('SQLQuery', 'SQLQueryStatus'):
+                continue
+            if invocation_id is None and info.get('invocation_id') != current:
+                # A later invocation starts, the statements of earlier ones are dropped
+                current = info.get('invocation_id')
+                statements, pending = [], {}
+            if info.get('invocation_id') != current:
+                continue
+
+            connection = data.get('conn_name') or info.get('thread')
+            node_id = (data.get('node_info') or {}).get('unique_id')
+            if info['name'] == 'SQLQuery':
+                pending[connection] = {
+                    'node_id': node_of(data.get('sql')) or node_id,
+                    'query_id': None,
+                    'sql': data.get('sql', ''),
+                    'seconds': None,
+                    'rows': None,
+                    'bytes_scanned': None,
+                    'status': None,
+                }
+                continue
+            statement = pending.pop(connection, None)
+            if statement is None:
+                continue
+            status = str(data.get('status', ''))
+            rows = STATUS_ROWS.search(status)
+            statement.update({
+                'query_id': data.get('query_id'),
+                'seconds': round(float(data.get('elapsed') or 0.0), 3),
+                'rows': int(rows.group(1)) if rows else None,
+                'status': status.split()[0] if status else None,
+            })
+            statements.append(statement)
+    return statements
+
+def read_query_history(conn, query_tag, history_sql=HISTORY_SQL):
+    """
+    Read the statements of a tagged run from the warehouse's query history.
+
+    Returns:
+        list: Dicts with node_id, query_id, sql, seconds, rows, bytes_scanned and status
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(history_sql.format(tag=query_tag))
+        columns = [column[0].lower() for column in cursor.description]
+        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+    statements = []
+    for row in rows:
+        elapsed_ms = row.get('total_elapsed_time')
+        statements.append({
+            'node_id': node_of(row.get('query_text')),
+            'query_id': row.get('query_id'),
+            'sql': row.get('query_text') or '',
+            'seconds': round(float(elapsed_ms) / 1000, 3) if elapsed_ms is not None else None,
+            'rows': row.get('rows_produced'),
+            'bytes_scanned': row.get('bytes_scanned'),
+            'status': row.get('execution_status'),
+        })
+    return statements
+
+def attribute(history, logged):
+    """
+    Fill in the node of history statements whose query comment was stripped, by query_id from the log.
+
+    Returns:
+        list: The history statements
+    """
+    nodes = {statement['query_id']: statement['node_id'] for statement in logged if statement['query_id']}
+    for statement in history:
+        if statement['node_id'] is None:
+            statement['node_id'] = nodes.get(statement['query_id'])
+    return history
+
+def hotspots(statements, top=5, prefix=MODEL_PREFIX):
+    """
+    Group statements by model and rank them, slowest first.
+
+    Args:
+        statements (list): Statements from read_dbt_log or read_query_history
+        top (int): Statements kept per model
+        prefix (str): node_id prefix of the reported models
+
+    Returns:
+        list: One dict per model with its totals and slowest statements, slowest model first
+    """
+    models = {}
+    for statement in statements:
+        node_id = statement['node_id'] or ''
+        if not node_id.startswith(prefix):
+            continue
+        models.setdefault(node_id, []).append(statement)
+
+    report = []
+    for node_id, model_statements in models.items():
+        ranked = sorted(model_statements, key=lambda s: s['seconds'] or 0.0, reverse=True)
+        report.append({
+            'model': node_id[len(prefix):],
+            'unique_id': node_id,
+            'statements': len(model_statements),
+            'seconds': round(sum(s['seconds'] or 0.0 for s in model_statements), 3),
+            'rows': sum(s['rows'] or 0 for s in model_statements),
+            'bytes_scanned': (sum(s['bytes_scanned'] for s in model_statements if s['bytes_scanned'] is not None)
+                              if any(s['bytes_scanned'] is not None for s in model_statements) else None),
+            'slowest': [dict(s, kind=statement_kind(s['sql']), sql=statement_text(s['sql'])) for s in ranked[:top]],
+        })
+    return sorted(report, key=lambda model: model['seconds'], reverse=True)
+
+def _bytes_text(value):
+    return '-' if value is None else f"{value / 1e6:,.1f} MB"
+
+def write_markdown(report, file_path, query_tag, source):
+    """Write the hotspot report as Markdown, one table of slowest statements per model."""
+    total = sum(model['seconds'] for model in report)
+    lines = [
+        '# Query hotspots',
+        '',
+        f"Query tag `{query_tag}`, statements from the {source}, {len(report)} models, {total:.2f}s total.",
+        '',
+        '| model | statements | seconds | share | rows | scanned |',
+        '| --- | ---: | ---: | ---: | ---: | ---: |',
+    ]
+    for model in report:
+        lines.append(f"| {model['model']} | {model['statements']} | {model['seconds']:.2f} | "
+                     f"{model['seconds'] / max(total, 1e-9):.0%} | {model['rows']:,} | {_bytes_text(model['bytes_scanned'])} |")
+    for model in report:
+        lines += ['', f"## {model['model']}", '', '| # | seconds | kind | rows | scanned | query_id | statement |',
+                  '| ---: | ---: | --- | ---: | ---: | --- | --- |']
+        for rank, statement in enumerate(model['slowest'], 1):
+            text = statement['sql'][:160].replace('|', '\\|')
+            seconds = f"{statement['seconds']:.2f}" if statement['seconds'] is not None else '-'
+            rows = f"{statement['rows']:,}" if statement['rows'] is not None else '-'
+            lines.append(f"| {rank} | {seconds} | {statement['kind']} | {rows} | "
+                         f"{_bytes_text(statement['bytes_scanned'])} | {statement['query_id'] or '-'} | `{text}` |")
+    with open(file_path, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+
+def print_hotspots(report, top_models=15):
+    """Print the slowest models with their slowest statement."""
+    print(f"\n{'model':<60} {'stmts':>6} {'seconds':>9}  slowest statement")
+    for model in report[:top_models]:
+        slowest = model['slowest'][0] if model['slowest'] else None
+        detail = f"{slowest['seconds'] or 0.0:.2f}s {slowest['kind']}" if slowest else '-'
+        print(f"{model['model']:<60} {model['statements']:>6} {model['seconds']:>9.2f}  {detail}")
+    print(f"{len(report)} models, {sum(model['seconds'] for model in report):.2f}s in their statements")
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-statement profile and hotspot report of a dbt-snowplow-web run')
+    parser.add_argument('--query-tag', default=DEFAULT_QUERY_TAG,
+                        help=f"Query tag the profiled run set through snowplow__query_tag (default: {DEFAULT_QUERY_TAG})")
+    parser.add_argument('--log-file', default='dbt-snowplow-web/logs/dbt.log',
+                        help='dbt log file written with --log-format-file json (default: dbt-snowplow-web/logs/dbt.log)')
+    parser.add_argument('--run-results', default='dbt-snowplow-web/target/run_results.json',
+                        help='run_results.json naming the invocation to read from the log '
+                             '(default: dbt-snowplow-web/target/run_results.json)')
+    parser.add_argument('--source', choices=['auto', 'history', 'log'], default='auto',
+                        help='Read statements from the warehouse query history, the dbt log, or the history '
+                             'with the log as fallback (default: auto)')
+    parser.add_argument('--history-sql', default=HISTORY_SQL,
+                        help='Query history statement, with {tag} for the query tag (default: INFORMATION_SCHEMA.QUERY_HISTORY)')
+    parser.add_argument('--top', type=int, default=5, help='Statements reported per model (default: 5)')
+    parser.add_argument('--output-dir', default='dbt-snowplow-web/assets',
+                        help='Directory for query_profile.json and query_hotspots.md (default: dbt-snowplow-web/assets)')
+    parser.add_argument('--label', default='',
+                        help='Suffix of the report files, e.g. full or incremental, so phases do not overwrite each other')
+    parser.add_argument('--print-tag', action='store_true',
+                        help='Print a new query tag for a profiled run and exit, e.g. for run_snowplow_web.sh')
+    args = parser.parse_args()
+
+    if args.print_tag:
+        print(run_query_tag(args.query_tag))
+        return 0
+
+    invocation_id = None
+    try:
+        with open(args.run_results, 'r') as f:
+            invocation_id = json.load(f).get('metadata', {}).get('invocation_id')
+    except (OSError, ValueError):
+        print(f"⚠ {args.run_results} not found, reading the last invocation in {args.log_file}")
+
+    logged = []
+    if os.path.exists(args.log_file):
+        logged = read_dbt_log(args.log_file, invocation_id)
+    elif args.source == 'log':
+        print(f"Error: {args.log_file} not found")
+        return 1
+
+    statements, source = logged, 'dbt log'
+    if args.source != 'log':
+        try:
+            from load_backends import EmbucketBackend
+            from load_events import get_connection_config
+            conn = EmbucketBackend(get_connection_config()).connect()
+            try:
+                history = read_query_history(conn, args.query_tag, args.history_sql)
+            finally:
+                conn.close()
+            if history:
+                statements, source = attribute(history, logged), 'query history'
+            else:
+                print(f"⚠ No statements tagged {args.query_tag} in the query history")
+        except Exception as e:
+            if args.source == 'history':
+                print(f"Error reading the query history: {e}")
+                return 1
+            print(f"⚠ Query history not available ({e}), using the timings in {args.log_file}")
+
+    if not statements:
+        print("Error: no statements found; run dbt with --log-format-file json or check the query tag")
+        return 1
+
+    report = hotspots(statements, args.top)
+    print_hotspots(report)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    suffix = f"_{args.label}" if args.label else ''
+    profile_file = os.path.join(args.output_dir, f"query_profile{suffix}.json")
+    with open(profile_file, 'w') as f:
+        json.dump({'query_tag': args.query_tag, 'label': args.label, 'invocation_id': invocation_id, 'source': source,
+                   'statements': len(statements), 'models': report}, f, indent=2, default=str)
+    hotspots_file = os.path.join(args.output_dir, f"query_hotspots{suffix}.md")
+    write_markdown(report, hotspots_file, args.query_tag, source)
+    print(f"✓ {len(statements)} statements from the {source}, profile saved to {profile_file} and {hotspots_file}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
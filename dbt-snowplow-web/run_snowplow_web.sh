@@ -34,11 +34,15 @@ echo ""
 echo "Run dbt-snowplow-web"
 
 cd dbt-snowplow-web/
-# Parse --target and --model arguments
+# Parse --target, --model, --query-profile and --label arguments
+QUERY_PROFILE=false
+RUN_LABEL=full
 while [[ "$#" -gt 0 ]]; do
   case $1 in
     --target) DBT_TARGET="$2"; shift ;;
     --model) DBT_MODEL="$2"; shift ;;
+    --query-profile) QUERY_PROFILE=true ;;
+    --label) RUN_LABEL="$2"; shift ;;
     *) echo "Unknown parameter: $1"; exit 1 ;;
   esac
   shift
@@ -83,12 +87,22 @@ echo ""
 # dbt seed
         dbt seed --full-refresh
 #  dbt run
+    # With --query-profile every query is tagged for this run and statements are logged as JSON
+    DBT_RUN_ARGS=()
+    if [ "$QUERY_PROFILE" == true ]; then
+        QUERY_TAG=$($PYTHON_CMD ../query_profile.py --print-tag)
+        DBT_RUN_ARGS=(--log-format-file json --vars "{snowplow__query_tag: $QUERY_TAG}")
+    fi
     if [ -n "$DBT_MODEL" ]; then
-        dbt run --select +"$DBT_MODEL" 2>&1 | tee assets/run.log
+        dbt run "${DBT_RUN_ARGS[@]}" --select +"$DBT_MODEL" 2>&1 | tee assets/run.log
     else
-        dbt run  2>&1 | tee assets/run.log
+        dbt run "${DBT_RUN_ARGS[@]}" 2>&1 | tee assets/run.log
 	#dbt run --full-refresh
     fi 
+    if [ "$QUERY_PROFILE" == true ]; then
+        $PYTHON_CMD ../query_profile.py --query-tag "$QUERY_TAG" --log-file logs/dbt.log \
+            --run-results target/run_results.json --output-dir assets --label "$RUN_LABEL"
+    fi
     # dbt test
 
 cd ..
\ No newline at end of file
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Soak the dbt-snowplow-web incremental models with many consecutive time-sliced batches.
+
+Every cycle generates the next window of events, appends it to the events table
+and runs dbt, recording the latency and rows of every model and the row count of
+every table. The per-cycle trend shows whether incremental runs stay flat or creep
+upwards as the manifests and the derived tables accumulate history.
+"""
+
+import os
+import sys
+import json
+import shutil
+import argparse
+import subprocess
+from datetime import datetime, timedelta
+
+import pipeline
+from pipeline import SCRIPT_DIR, CLONE_DIR, run_command, generator_options
+from model_timings import parse_run_results
+from history import last_load_summary
+from generate_dbt_test_assets import line_chart_svg, write_chart
+
+SOAK_DIR = SCRIPT_DIR / 'soak'
+
+def batch_windows(cycles, batch_hours, end=None):
+    """
+    Start hours of `cycles` consecutive windows ending at the last full hour.
+
+    Returns:
+        list: datetime of the first hour of every window, oldest first
+    """
+    end = (end or datetime.now()).replace(minute=0, second=0, microsecond=0)
+    return [end - timedelta(hours=batch_hours * (cycles - cycle)) for cycle in range(cycles)]
+
+def run_cycle(runner, cycle, start, args, dbt_vars, events=0):
+    """
+    Generate, load and model one window of events.
+
+    Args:
+        events (int): Events in the events table before this cycle
+
+    Returns:
+        dict: Seconds per stage, rows loaded, per-model results and table row counts of the cycle
+    """
+    runner.phase = f"cycle {cycle}"
+    pipeline_args = runner.args
+    os.makedirs(SOAK_DIR, exist_ok=True)
+    batch = SOAK_DIR / (f"batch_{cycle:04d}" + ('' if pipeline_args.format == 'parquet' else '.csv'))
+
+    runner.stage('generate', action=lambda: run_command([
+        runner.python, 'gen_events.py', pipeline_args.rows, '--window-start', start.strftime('%Y-%m-%dT%H'),
+        '--window-hours', args.batch_hours, '--format', pipeline_args.format, '--engine', pipeline_args.engine,
+        '--workers', pipeline_args.workers, '--seed', pipeline_args.seed, *generator_options(pipeline_args),
+        '--output', batch]))
+
+    # The first cycle creates the events table, every later one appends to it
+    metrics_file = CLONE_DIR / 'assets' / 'load_metrics.ndjson'
+    command = [runner.python, 'load_events.py', batch, '--metrics-file', metrics_file,
+               '--metrics-label', f"soak cycle {cycle}"]
+    runner.stage('load', action=lambda: run_command(command + (['--append'] if cycle else [])))
+    summary = last_load_summary(metrics_file)
+    if summary and summary.get('label') == f"soak cycle {cycle}":
+        rows_loaded = summary['rows_loaded']
+    else:
+        print(f"⚠ No load metrics for cycle {cycle} in {metrics_file}, assuming {pipeline_args.rows:,} rows")
+        rows_loaded = pipeline_args.rows
+    runner.run(dbt_vars)
+
+    if not args.keep_batches:
+        if batch.is_dir():
+            shutil.rmtree(batch)
+        else:
+            batch.unlink()
+
+    record = {
+        'cycle': cycle,
+        'window_start': start.isoformat(),
+        'rows_loaded': rows_loaded,
+        'events': events + rows_loaded,
+    }
+    for stage in ('generate', 'load', 'run'):
+        record[stage] = sum(t['seconds'] for t in runner.timings if t['stage'] == stage and t['phase'] == runner.phase)
+
+    run_results = CLONE_DIR / 'target' / 'run_results.json'
+    models = parse_run_results(run_results) if run_results.exists() else []
+    record['models'] = {model['name']: {key: model[key] for key in ('status', 'execution_time', 'rows_affected')}
+                        for model in models}
+
+    record['tables'] = {}
+    if pipeline_args.target == 'embucket' and not args.no_row_counts:
+        counts_file = SOAK_DIR / 'table_counts.json'
+        if runner.warehouse('counts', '--output', counts_file, check=False) and counts_file.exists():
+            with open(counts_file) as f:
+                record['tables'] = json.load(f)
+    return record
+
+def _slope(points):
+    """Least-squares slope of (x, y) points, or None with fewer than two points."""
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    variance = sum((x - mean_x) ** 2 for x, _ in points)
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / variance if variance else None
+
+def latency_trend(results, model=None):
+    """
+    Trend of the dbt run time, or of one model's execution time, over the incremental cycles.
+
+    The first cycle processes the whole initial window and is left out.
+
+    Returns:
+        dict: first and last seconds, slope in seconds per cycle and the ratio of the
+              mean of the last quarter of cycles to the mean of the first quarter
+    """
+    points = []
+    for record in results:
+        if record['cycle'] == 0:
+            continue
+        seconds = record['run'] if model is None else record['models'].get(model, {}).get('execution_time')
+        if seconds is not None:
+            points.append((record['cycle'], seconds))
+    if not points:
+        return None
+
+    quarter = max(1, len(points) // 4)
+    head = sum(seconds for _, seconds in points[:quarter]) / quarter
+    tail = sum(seconds for _, seconds in points[-quarter:]) / quarter
+    return {
+        'first': points[0][1],
+        'last': points[-1][1],
+        'slope': _slope(points),
+        'ratio': tail / head if head > 0 else None,
+    }
+
+def print_results(results, threshold=1.25):
+    """Print the per-cycle run times and the trend of every model, flagging the ones that creep upwards."""
+    print(f"\n{'cycle':>6} {'window start':<20} {'events':>12} {'load s':>9} {'run s':>9}")
+    for record in results:
+        print(f"{record['cycle']:>6} {record['window_start']:<20} {record['events']:>12,} "
+              f"{record['load']:>9.2f} {record['run']:>9.2f}")
+
+    names = sorted({name for record in results for name in record['models']})
+    trends = [('dbt run', latency_trend(results))] + [(name, latency_trend(results, name)) for name in names]
+    print(f"\n{'model':<60} {'first s':>9} {'last s':>9} {'s/cycle':>9} {'ratio':>7}")
+    flagged = []
+    for name, trend in trends:
+        if trend is None:
+            continue
+        slope = f"{trend['slope']:>9.4f}" if trend['slope'] is not None else f"{'-':>9}"
+        ratio = f"{trend['ratio']:>7.2f}" if trend['ratio'] is not None else f"{'-':>7}"
+        flag = ''
+        if trend['ratio'] is not None and trend['ratio'] > threshold:
+            flag = '  ⚠'
+            flagged.append((name, trend))
+        print(f"{name:<60} {trend['first']:>9.2f} {trend['last']:>9.2f} {slope} {ratio}{flag}")
+
+    for name, trend in flagged:
+        print(f"⚠ {name} creeps upwards: the last cycles take {trend['ratio']:.2f}x the first ones")
+    return flagged
+
+def generate_soak_charts(results, output_dir, top=10, png=False):
+    """
+    Draw the latency of the slowest models and the row count of every table per cycle.
+
+    The charts are written as plain SVG; pass png to also convert them to PNG.
+
+    Returns:
+        list: Paths of the saved charts
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    totals = {}
+    for record in results:
+        for name, model in record['models'].items():
+            totals[name] = totals.get(name, 0.0) + (model['execution_time'] or 0.0)
+    slowest = sorted(totals, key=totals.get, reverse=True)[:top]
+
+    latency = {'dbt run': [(record['cycle'], record['run']) for record in results]}
+    for name in slowest:
+        latency[name] = [(record['cycle'], record['models'].get(name, {}).get('execution_time')) for record in results]
+
+    tables = sorted({name for record in results for name in record['tables']})
+    rows = {name.split('.')[-1]: [(record['cycle'], record['tables'].get(name)) for record in results] for name in tables}
+
+    paths = []
+    for series, name, title, y_title in [(latency, 'soak_latency', 'dbt run and model latency per cycle', 'seconds'),
+                                         (rows, 'soak_rows', 'table rows per cycle', 'rows')]:
+        if not results or not series:
+            continue
+        svg = line_chart_svg(title, 'cycle', y_title, series, styles={'dbt run': {'color': '#000', 'width': 3}},
+                             width=1000, height=550)
+        paths.append(write_chart(svg, output_dir, name, png))
+    return paths
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Run N consecutive time-sliced batches through the incremental dbt-snowplow-web models',
+        epilog='Any other arguments are passed on to pipeline.py, e.g. --rows 10000 (events per batch) --engine numpy.'
+    )
+    parser.add_argument('--cycles', type=int, default=24, help='Number of batches and dbt runs (default: 24)')
+    parser.add_argument('--batch-hours', type=int, default=1, help='Hours of events in every batch (default: 1)')
+    parser.add_argument('--output-dir', default='dbt-snowplow-web/assets', help='Directory for the charts and results')
+    parser.add_argument('--results-file', default=None,
+                        help='JSON file with the per-cycle results (default: OUTPUT_DIR/soak_results.json)')
+    parser.add_argument('--charts-only', action='store_true', help='Redraw the charts from an existing results file')
+    parser.add_argument('--no-row-counts', action='store_true', help='Do not count the table rows after every cycle')
+    parser.add_argument('--keep-batches', action='store_true', help='Keep the generated batch files instead of deleting them')
+    parser.add_argument('--png', action='store_true', help='Also write the charts as PNG (requires cairosvg)')
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='Flag models whose last cycles are this many times slower than the first ones (default: 1.25)')
+    args, pipeline_args = parser.parse_known_args()
+
+    results_file = args.results_file or os.path.join(args.output_dir, 'soak_results.json')
+    if args.charts_only:
+        with open(results_file) as f:
+            results = json.load(f)
+    else:
+        runner = pipeline.Pipeline(pipeline.parse_args(pipeline_args))
+        runner.env()
+        # A warm container is reset here, so the soak starts from an empty manifest
+        runner.container_stage()
+        runner.clone()
+        runner.deps()
+        runner.seed()
+        runner.invalidate('load')
+
+        windows = batch_windows(args.cycles, args.batch_hours)
+        # Events before snowplow__start_date are ignored, so start the models at the first window
+        dbt_vars = {'snowplow__start_date': windows[0].date().isoformat()}
+        print(f"Soaking {args.cycles} cycles of {args.batch_hours}h from {windows[0]} ({runner.args.rows:,} events each)")
+
+        results = []
+        os.makedirs(os.path.dirname(os.path.abspath(results_file)), exist_ok=True)
+        for cycle, start in enumerate(windows):
+            print(f"\n=== Soak cycle {cycle + 1}/{args.cycles}: {start} ===")
+            try:
+                results.append(run_cycle(runner, cycle, start, args, dbt_vars, results[-1]['events'] if results else 0))
+            except (subprocess.CalledProcessError, RuntimeError) as e:
+                print(f"❌ Error in cycle {cycle}: {e}")
+                break
+            finally:
+                # Keep the finished cycles, a long soak may not complete
+                with open(results_file, 'w') as f:
+                    json.dump(results, f, indent=2)
+        runner.print_timings()
+        print(f"Results saved to {results_file}")
+
+    print_results(results, args.threshold)
+    try:
+        generate_soak_charts(results, args.output_dir, png=args.png)
+    except Exception as e:
+        print(f"Error generating charts: {str(e)}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Split SQL scripts into statements and classify them for scheduling.
+"""
+
+# Statement kinds. DDL (including session statements like USE) changes what later
+# statements see, loads append data, changes rewrite existing rows and queries only read.
+DDL = 'ddl'
+LOAD = 'load'
+CHANGE = 'change'
+QUERY = 'query'
+
+LOAD_KEYWORDS = ('COPY', 'INSERT')
+CHANGE_KEYWORDS = ('MERGE', 'UPDATE', 'DELETE')
+QUERY_KEYWORDS = ('SELECT', 'WITH', 'SHOW', 'DESCRIBE', 'DESC', 'EXPLAIN', 'LIST')
+
+def split_sql_statements(sql_content):
+    """
+    Split an SQL script into statements.
+
+    Semicolons only end a statement outside of 'string literals', "quoted
+    identifiers", $$dollar-quoted blocks$$, -- line comments and /* block
+    comments */. Comments are dropped, everything else - including line breaks
+    inside multi-line statements - is kept, and every statement ends with ';'.
+
+    Returns:
+        list: Statement strings
+    """
+    statements = []
+    current = []
+    i = 0
+    n = len(sql_content)
+
+    while i < n:
+        ch = sql_content[i]
+        pair = sql_content[i:i + 2]
+
+        if pair == '--':
+            end = sql_content.find('\n', i)
+            i = n if end == -1 else end
+            continue
+        if pair == '/*':
+            end = sql_content.find('*/', i + 2)
+            i = n if end == -1 else end + 2
+            current.append(' ')
+            continue
+        if pair == '$$':
+            end = sql_content.find('$$', i + 2)
+            end = n if end == -1 else end + 2
+            current.append(sql_content[i:end])
+            i = end
+            continue
+        if ch in ("'", '"'):
+            # A doubled quote inside the literal is an escaped quote
+            j = i + 1
+            while j < n:
+                if sql_content[j] == '\\' and ch == "'":
+                    j += 2
+                    continue
+                if sql_content[j] == ch:
+                    if sql_content[j + 1:j + 2] == ch:
+                        j += 2
+                        continue
+                    break
+                j += 1
+            current.append(sql_content[i:j + 1])
+            i = j + 1
+            continue
+        if ch == ';':
+            statement = ''.join(current).strip()
+            if statement:
+                statements.append(statement + ';')
+            current = []
+            i += 1
+            continue
+
+        current.append(ch)
+        i += 1
+
+    statement = ''.join(current).strip()
+    if statement:
+        statements.append(statement + ';')
+    return statements
+
+def classify_statement(statement):
+    """
+    Classify a statement as DDL, LOAD, CHANGE or QUERY by its leading keyword.
+
+    Anything that is not recognisably a load or a query is treated as DDL,
+    which is the safe choice because DDL runs on its own as a barrier.
+    """
+    words = statement.lstrip('( \t\r\n').split(None, 1)
+    keyword = words[0].upper().rstrip(';') if words else ''
+    if keyword in LOAD_KEYWORDS:
+        return LOAD
+    if keyword in CHANGE_KEYWORDS:
+        return CHANGE
+    if keyword in QUERY_KEYWORDS:
+        return QUERY
+    return DDL
+
+def plan_waves(statements):
+    """
+    Group statements into waves that may run concurrently.
+
+    DDL and changes (MERGE, UPDATE, DELETE) always run alone, since they read
+    or rewrite rows that other statements write. Consecutive loads (COPY INTO,
+    INSERT) form one wave, since appending into a table does not depend on other
+    appends, and consecutive queries form another. A change of kind is a barrier,
+    so queries still see every load before them. Wall-clock time is then the sum of the slowest statement of
+    each wave rather than the sum of all statements.
+
+    Returns:
+        list: (kind, [(position, statement), ...]) tuples, positions starting at 1
+    """
+    waves = []
+    for position, statement in enumerate(statements, 1):
+        kind = classify_statement(statement)
+        if waves and kind in (LOAD, QUERY) and waves[-1][0] == kind:
+            waves[-1][1].append((position, statement))
+        else:
+            waves.append((kind, [(position, statement)]))
+    return waves
@@ -0,0 +1,8 @@
+"""
+Make the scripts next to this directory importable from the tests.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,52 @@
+import analyze_log
+from analyze_log import TopK
+
+def test_topk_is_exact_below_capacity():
+    counter = TopK(capacity=10)
+    for key in 'abracadabra':
+        counter.add(key)
+    assert counter.total == 11
+    assert counter.most_common(3) == [('a', 5, 0), ('r', 2, 0), ('b', 2, 0)]
+
+def test_topk_orders_ties_like_sort_nr():
+    counter = TopK()
+    for key in [b'alpha', b'beta', b'Gamma', b'beta', b'alpha', b'Gamma', b'delta']:
+        counter.add(key)
+    # `sort | uniq -c | sort -nr` under LC_ALL=C: equal counts in descending byte order
+    assert [key for key, _, _ in counter.most_common(4)] == [b'beta', b'alpha', b'Gamma', b'delta']
+
+def test_topk_keeps_heavy_hitters_within_its_error_bound():
+    counter = TopK(capacity=5)
+    stream = ['hot'] * 300 + ['warm'] * 100 + [f"cold-{i}" for i in range(400)]
+    stream = [key for pair in zip(stream, reversed(stream)) for key in pair]
+    for key in stream:
+        counter.add(key)
+    true_counts = {'hot': 600, 'warm': 200}
+    top = {key: (count, error) for key, count, error in counter.most_common(2)}
+    assert set(top) == {'hot', 'warm'}
+    for key, (count, error) in top.items():
+        assert count - error <= true_counts[key] <= count
+
+def test_analyze_log_across_chunks(tmp_path):
+    lines = []
+    for i in range(200):
+        lines.append(f"12:00:00  Running model {i}")
+        # Error lines start with two whitespace characters, the message is cut at a second marker
+        lines.append(f"  000200: Invalid function 'f{i % 3}'")
+        lines.append(f"  000200: Missing table t{i % 2} 000200: nested")
+    lines.append("12:00:03  Done. PASS=10 WARN=1 ERROR=2 SKIP=3 NO-OP=0 TOTAL=16")
+    log_file = tmp_path / 'run.log'
+    log_file.write_text('\n'.join(lines))
+
+    result = analyze_log.analyze_log(log_file, chunk_bytes=100)
+    assert result['summary'] == {'PASS': 10, 'WARN': 1, 'ERROR': 2, 'SKIP': 3, 'TOTAL': 16}
+    assert result['lines'] == len(lines)
+    assert result['bytes'] == log_file.stat().st_size
+    assert result['errors'].total == 400
+    assert result['function_errors'].most_common(3) == [
+        (b"Invalid function 'f1'", 67, 0), (b"Invalid function 'f0'", 67, 0), (b"Invalid function 'f2'", 66, 0)]
+    assert result['errors'].most_common(2) == [(b'Missing table t1 ', 100, 0), (b'Missing table t0 ', 100, 0)]
+
+def test_parse_summary():
+    assert analyze_log.parse_summary("Done. PASS=5 WARN=0 ERROR=1 SKIP=2 NO-OP=4 TOTAL=8") == {
+        'PASS': 5, 'WARN': 0, 'ERROR': 1, 'SKIP': 2, 'TOTAL': 8}
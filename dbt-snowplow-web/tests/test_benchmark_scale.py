@@ -0,0 +1,30 @@
+import pytest
+
+from benchmark_scale import generate_scaling_charts, print_results, scaling_exponents
+
+RESULTS = [
+    {'phase': 'full', 'rows': 1000, 'generate': 0.5, 'load': 2.0, 'run': 10.0},
+    {'phase': 'full', 'rows': 10000, 'generate': 5.0, 'load': 2.0, 'run': 1000.0},
+    {'phase': 'full', 'rows': 100000, 'generate': 50.0, 'load': 20.0, 'run': None, 'cached': ['run']},
+    {'phase': 'incremental', 'rows': 1000, 'generate': 0.1, 'load': 1.0, 'run': 4.0},
+]
+
+def test_scaling_exponents_between_consecutive_row_counts():
+    assert scaling_exponents(RESULTS, 'generate', 'full') == pytest.approx({10000: 1.0, 100000: 1.0})
+    assert scaling_exponents(RESULTS, 'load', 'full') == pytest.approx({10000: 0.0, 100000: 1.0})
+    # The cached point has no time, so there is only one step
+    assert scaling_exponents(RESULTS, 'run', 'full') == pytest.approx({10000: 2.0})
+    assert scaling_exponents(RESULTS, 'run', 'incremental') == {}
+
+def test_super_linear_steps_are_flagged(capsys):
+    print_results(RESULTS)
+    output = capsys.readouterr().out
+    assert '⚠ full run scales super-linearly up to 10,000 rows (exponent 2.00)' in output
+    assert 'generate scales' not in output and 'load scales' not in output
+    assert 'cached' in output
+
+def test_one_chart_per_stage_with_a_linear_reference(tmp_path):
+    paths = generate_scaling_charts(RESULTS, str(tmp_path))
+    assert paths == [str(tmp_path / f'scale_{stage}.svg') for stage in ('generate', 'load', 'run')]
+    svg = (tmp_path / 'scale_run.svg').read_text()
+    assert 'run wall time vs rows' in svg and 'linear' in svg and 'stroke-dasharray="3,3"' in svg
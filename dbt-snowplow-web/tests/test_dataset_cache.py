@@ -0,0 +1,75 @@
+import os
+import time
+
+import dataset_cache
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    return path
+
+def test_cache_key_depends_on_params():
+    assert dataset_cache.cache_key({'rows': 10, 'seed': 1}) == dataset_cache.cache_key({'seed': 1, 'rows': 10})
+    assert dataset_cache.cache_key({'rows': 10, 'seed': 1}) != dataset_cache.cache_key({'rows': 10, 'seed': 2})
+
+def test_publish_and_restore(tmp_path):
+    cache_dir = tmp_path / 'cache'
+    csv_file = write(tmp_path / 'work' / 'events_today.csv', 'a,b\n1,2\n')
+    parquet_dir = tmp_path / 'work' / 'events_yesterday'
+    write(parquet_dir / 'date=2024-01-14' / 'part-00000.parquet', 'parquet')
+    outputs = [csv_file, parquet_dir]
+
+    assert dataset_cache.publish('key', outputs, {'rows': 1}, cache_dir)
+    # A second publish of the same key keeps the first entry
+    assert not dataset_cache.publish('key', outputs, {'rows': 1}, cache_dir)
+    assert [(key, params) for key, _, _, params in dataset_cache.entries(cache_dir)] == [('key', {'rows': 1})]
+    assert not list(cache_dir.glob('tmp-*'))
+
+    csv_file.unlink()
+    dataset_cache.remove_path(parquet_dir)
+    assert dataset_cache.restore('key', outputs, cache_dir)
+    assert csv_file.read_text() == 'a,b\n1,2\n'
+    assert (parquet_dir / 'date=2024-01-14' / 'part-00000.parquet').read_text() == 'parquet'
+
+def test_restore_replaces_rather_than_writes_through(tmp_path):
+    cache_dir = tmp_path / 'cache'
+    output = write(tmp_path / 'events_today.csv', 'cached\n')
+    dataset_cache.publish('key', [output], cache_dir=cache_dir)
+    assert dataset_cache.restore('key', [output], cache_dir)
+
+    # The restored file may share its inode with the cache; replacing it must not touch the entry
+    output.unlink()
+    write(output, 'regenerated\n')
+    assert (cache_dir / 'key' / 'files' / 'events_today.csv').read_text() == 'cached\n'
+
+def test_restore_misses(tmp_path):
+    cache_dir = tmp_path / 'cache'
+    output = write(tmp_path / 'events_today.csv', 'x\n')
+    assert not dataset_cache.restore('missing', [output], cache_dir)
+    dataset_cache.publish('key', [output], cache_dir=cache_dir)
+    # The outputs must be the ones the entry was published with
+    assert not dataset_cache.restore('key', [tmp_path / 'events_yesterday.csv'], cache_dir)
+
+def test_evict_least_recently_used(tmp_path):
+    cache_dir = tmp_path / 'cache'
+    for index, key in enumerate(['old', 'middle', 'new']):
+        output = write(tmp_path / key / 'events.csv', 'x' * 100)
+        dataset_cache.publish(key, [output], cache_dir=cache_dir)
+        used = time.time() - 1000 + index
+        os.utime(cache_dir / key / dataset_cache.MANIFEST, (used, used))
+
+    assert dataset_cache.evict(250, keep='old', cache_dir=cache_dir) == ['middle']
+    assert [key for key, _, _, _ in dataset_cache.entries(cache_dir)] == ['old', 'new']
+    assert dataset_cache.evict(100, cache_dir=cache_dir) == ['old']
+    assert dataset_cache.evict(100, cache_dir=cache_dir) == []
+
+def test_evict_removes_stale_temporary_entries(tmp_path):
+    cache_dir = tmp_path / 'cache'
+    stale = write(cache_dir / 'tmp-key-1' / 'files' / 'events.csv', 'partial')
+    fresh = write(cache_dir / 'tmp-key-2' / 'files' / 'events.csv', 'in progress')
+    old = time.time() - dataset_cache.STALE_SECONDS - 60
+    os.utime(cache_dir / 'tmp-key-1', (old, old))
+
+    dataset_cache.evict(0, cache_dir=cache_dir)
+    assert not stale.exists()
+    assert fresh.exists()
@@ -0,0 +1,59 @@
+from datetime import date
+
+import pytest
+
+import event_schema
+import gen_events
+
+def test_repository_files_match_the_schema():
+    assert event_schema.stale_files() == []
+
+def test_check_finds_and_sync_fixes_drift(tmp_path):
+    sql_file = tmp_path / 'load_events_data.sql'
+    seeds_file = tmp_path / 'seeds.yml'
+    sql_file.write_text(event_schema.LOAD_SQL_SCRIPT.read_text().replace('    event_id STRING,\n', ''))
+    seeds_file.write_text(event_schema.SEEDS_FILE.read_text())
+
+    stale = event_schema.stale_files(sql_file, seeds_file)
+    assert [path for path, _ in stale] == [sql_file]
+    sql_file.write_text(stale[0][1])
+    assert event_schema.stale_files(sql_file, seeds_file) == []
+    assert sql_file.read_text() == event_schema.LOAD_SQL_SCRIPT.read_text()
+
+def test_every_column_type_has_a_ddl_and_seed_type():
+    assert event_schema.HEADERS == [name for name, _ in event_schema.COLUMNS]
+    assert len(set(event_schema.HEADERS)) == len(event_schema.HEADERS)
+    for column_type in event_schema.COLUMN_TYPES.values():
+        assert column_type in event_schema.DDL_TYPES
+        assert column_type in event_schema.SEED_TYPES
+
+def test_encode_csv():
+    np = pytest.importorskip('numpy')
+    epoch_us = np.array([1705320000123456, 0], dtype=np.int64)
+    assert event_schema.encode_csv(epoch_us, 'timestamp') == ['2024-01-15 12:00:00.123', '1970-01-01 00:00:00.000']
+    assert event_schema.encode_csv(np.array([1.5, 0.1]), 'double') == ['1.5', '0.1']
+    assert event_schema.encode_csv(np.array([3, -1]), 'integer') == ['3', '-1']
+    assert event_schema.encode_csv(['kept'], 'string') == ['kept']
+
+def test_encode_arrow_truncates_to_the_csv_precision():
+    np = pytest.importorskip('numpy')
+    pa = pytest.importorskip('pyarrow')
+    field = event_schema.arrow_schema().field('collector_tstamp')
+    array = event_schema.encode_arrow(np.array([1705320000123456], dtype=np.int64), field, 1)
+    assert array.type == pa.timestamp('us')
+    assert array.cast(pa.int64()).to_pylist() == [1705320000123000]
+
+    field = event_schema.arrow_schema().field('domain_sessionidx')
+    assert event_schema.encode_arrow(['7', ''], field, 2).to_pylist() == [7, None]
+    assert event_schema.encode_arrow('', field, 2).to_pylist() == [None, None]
+
+def test_typed_columns_encode_to_the_text_columns():
+    np = pytest.importorskip('numpy')
+    profile = gen_events.workload_profile('web', 3)
+    anomalies = gen_events.anomaly_settings(late_share=0.05, duplicate_share=0.01, bot_share=0.05)
+    text = gen_events.generate_event_columns(date(2024, 1, 15), 500, np.random.default_rng(3), profile=profile,
+                                             anomalies=anomalies)
+    typed = gen_events.generate_event_columns(date(2024, 1, 15), 500, np.random.default_rng(3), profile=profile,
+                                              anomalies=anomalies, typed=True)
+    for name, text_column, typed_column in zip(event_schema.HEADERS, text, typed):
+        assert event_schema.encode_csv(typed_column, event_schema.COLUMN_TYPES[name]) == text_column, name
@@ -0,0 +1,144 @@
+import csv
+import hashlib
+import io
+import random
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+
+import pytest
+
+import event_schema
+import gen_events
+
+DAY = date(2024, 1, 15)
+ANOMALIES = gen_events.anomaly_settings(late_share=0.05, delayed_share=0.02, duplicate_share=0.01, bot_share=0.05)
+
+# SHA-256 of 3000 rows in shards of 1000 with seed 7. Any change to the generated bytes
+# of a seed shows up here, so update these only for an intended change of the output.
+CSV_DIGESTS = {
+    ('python', 'flat', False): '4879234ce61eca01e21ab7ac877be3ca2f170b888d69781dc48d8bd9050e3171',
+    ('python', 'flat', True): '941d170b84b429ed9ec0df6b8c5e2ff4dd79fbca1f3bae9213687b17f56ca6bc',
+    ('python', 'web', False): 'a18f021fb04bb9dd07512f3cf98025e4396fd7a9717e13a57b86de228c0065cd',
+    ('python', 'web', True): '87fda2a6d95673ef902b46d5950629020d0b14401f5c90259168931758e2dbf0',
+    ('numpy', 'flat', False): '62704312c9ee011207e38b13531acf03bb2b3cbd3484259128e9b4b7ff107f30',
+    ('numpy', 'flat', True): 'b617884b77c98488fa65e88e017d851d11338d773dbf6841369ea267cf2acfa3',
+    ('numpy', 'web', False): '0c0e42b4db4077c6d919c09672a7be33e9396b4ac5d03e4ba05aca0d20a69267',
+    ('numpy', 'web', True): '47c5fc46f42e67a0ec50dbd97c40b900309eebffe4362673d9144600ed8f4799',
+}
+
+def engine_param(engine):
+    marks = [pytest.mark.skipif(gen_events.np is None, reason='numpy is not installed')] if engine == 'numpy' else []
+    return pytest.param(engine, marks=marks)
+
+ENGINES = [engine_param('python'), engine_param('numpy')]
+
+def generate(engine, num_events=3000, seed=7, profile=None, anomalies=None, shard_rows=1000, executor=None):
+    """CSV bytes of one day, without the header."""
+    tasks = gen_events.shard_tasks(engine, DAY, num_events, seed, shard_rows=shard_rows,
+                                   profile=gen_events.workload_profile(profile, seed) if profile else None,
+                                   anomalies=anomalies)
+    return b''.join(data for _, data in gen_events.iter_shards(tasks, executor, window=4))
+
+def rows(data):
+    return [dict(zip(gen_events.headers, row)) for row in csv.reader(io.StringIO(data.decode('utf-8')))]
+
+@pytest.mark.parametrize('engine,profile,anomalies', sorted(CSV_DIGESTS), ids=lambda value: str(value))
+def test_output_is_pinned(engine, profile, anomalies):
+    if engine == 'numpy' and gen_events.np is None:
+        pytest.skip('numpy is not installed')
+    data = generate(engine, profile=profile if profile != 'flat' else None, anomalies=ANOMALIES if anomalies else None)
+    assert hashlib.sha256(data).hexdigest() == CSV_DIGESTS[(engine, profile, anomalies)]
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_worker_count_does_not_change_the_output(engine):
+    serial = generate(engine, profile='web', anomalies=ANOMALIES, shard_rows=500)
+    with ProcessPoolExecutor(max_workers=3) as executor:
+        parallel = generate(engine, profile='web', anomalies=ANOMALIES, shard_rows=500, executor=executor)
+    assert parallel == serial
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_seed_decides_the_output(engine):
+    assert generate(engine, seed=1) == generate(engine, seed=1)
+    assert generate(engine, seed=1) != generate(engine, seed=2)
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_rows_match_the_schema(engine):
+    events = rows(generate(engine, num_events=200, profile='web'))
+    assert len(events) == 200
+    assert all(len(event) == len(event_schema.HEADERS) for event in events)
+    for event in events:
+        collector = datetime.strptime(event['collector_tstamp'], '%Y-%m-%d %H:%M:%S.%f')
+        assert collector.date() == DAY
+
+def test_shard_boundaries_do_not_depend_on_the_row_split():
+    tasks = gen_events.shard_tasks('python', DAY, 2500, 7, shard_rows=1000)
+    assert [(task[2], task[3]) for task in tasks] == [(0, 1000), (1, 1000), (2, 500)]
+    by_hour = gen_events.shard_tasks('python', DAY, 50, 7, shard_rows=1000, by_hour=True)
+    assert sum(task[3] for task in by_hour) == 50
+    assert [task[5] for task in by_hour] == list(range(24))
+
+def test_windows_never_repeat_a_shard_seed():
+    first = gen_events.window_tasks('python', datetime(2024, 1, 15, 22), 2, 100, 7)
+    second = gen_events.window_tasks('python', datetime(2024, 1, 16, 0), 2, 100, 7)
+    seeds = [gen_events.shard_seed(7, task[1], task[2]) for task in first + second]
+    assert len(set(seeds)) == len(seeds)
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_sessionidx_keeps_counting_across_shards(engine):
+    events = rows(generate(engine, num_events=4000, profile='web', shard_rows=1000))
+    sessions = {}
+    for event in events:
+        session = sessions.setdefault(event['domain_sessionid'], [event['domain_userid'], event['domain_sessionidx'], ''])
+        session[2] = min(session[2] or event['collector_tstamp'], event['collector_tstamp'])
+    # Sessions of one user from different shards get different indexes
+    indexes = {(user, index) for user, index, _ in sessions.values()}
+    assert len(indexes) >= 0.99 * len(sessions)
+    # and a later session gets a higher index
+    by_user = {}
+    for user, index, start in sessions.values():
+        by_user.setdefault(user, []).append((start, int(index)))
+    for user_sessions in by_user.values():
+        user_sessions.sort()
+        assert all(later[1] > earlier[1] for earlier, later in zip(user_sessions, user_sessions[1:])
+                   if later[0][:19] > earlier[0][:19])
+
+def test_anomaly_settings_are_off_by_default():
+    assert gen_events.anomaly_settings() is None
+
+def test_anomaly_edits():
+    num_events = 2000
+    values = {
+        'collector_tstamp': ['2024-01-15 12:00:00.000'] * num_events,
+        'dvce_created_tstamp': ['2024-01-15 11:59:58.000'] * num_events,
+        'dvce_sent_tstamp': ['2024-01-15 11:59:59.000'] * num_events,
+        'derived_tstamp': ['2024-01-15 11:59:58.000'] * num_events,
+        'event_id': [f"event-{i}" for i in range(num_events)],
+        # Ten events per session
+        'domain_sessionid': [f"{i // 10 * 2654435761 % 2 ** 32:08x}-session" for i in range(num_events)],
+    }
+    edits = gen_events.anomaly_edits(ANOMALIES, num_events, lambda column, i: values[column][i], random.Random(1))
+
+    by_column = {}
+    for index, column, value in edits:
+        by_column.setdefault(column, {})[index] = value
+    late_or_delayed = by_column['derived_tstamp']
+    delayed = by_column['collector_tstamp']
+    assert set(delayed) < set(late_or_delayed)
+    assert set(by_column['dvce_created_tstamp']) == set(late_or_delayed)
+    assert all(value < values['collector_tstamp'][i] for i, value in delayed.items())
+    assert 0.03 < len(late_or_delayed) / num_events < 0.11
+
+    duplicates = by_column['event_id']
+    assert duplicates and all(value not in {values['event_id'][i] for i in duplicates} for value in duplicates.values())
+
+    bots = set(by_column['useragent'])
+    assert bots and all(by_column['useragent'][i] == gen_events.bot_columns['useragent'] for i in bots)
+    # Every event of a bot session is a bot event
+    assert bots == {i for i in range(num_events) if i // 10 in {j // 10 for j in bots}}
+
+def test_shift_helpers_agree():
+    text = '2024-01-15 12:00:00.123'
+    epoch_us = (datetime.strptime(text, '%Y-%m-%d %H:%M:%S.%f') - datetime(1970, 1, 1)) // timedelta(microseconds=1)
+    assert gen_events._shift_tstamp(text, 3600.5) == '2024-01-15 10:59:59.623'
+    # The microseconds below the text's millisecond precision are dropped before the shift
+    assert gen_events._shift_epoch_us(epoch_us + 456, 3600.5) == epoch_us - 3_600_500_000
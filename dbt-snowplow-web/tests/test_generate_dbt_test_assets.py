@@ -0,0 +1,76 @@
+import json
+import sys
+import xml.etree.ElementTree as ET
+
+import pytest
+
+import generate_dbt_test_assets as assets
+
+SVG = '{http://www.w3.org/2000/svg}'
+
+def elements(svg, tag):
+    return ET.fromstring(svg).iter(SVG + tag)
+
+def test_line_chart_escapes_text_and_skips_points_off_a_log_axis():
+    svg = assets.line_chart_svg('rows < 10 & more', 'rows', 'seconds',
+                                {'full': [(10, 1.0), (100, None), (1000, 10.0)], 'bad': [(0, 1.0), (10, 0.0)]},
+                                log_x=True, log_y=True, styles={'full': {'dash': '3,3'}})
+    texts = [text.text for text in elements(svg, 'text')]
+    assert 'rows < 10 & more' in texts
+    assert {'full', 'bad'} <= set(texts)
+    polylines = list(elements(svg, 'polyline'))
+    assert len(polylines) == 1
+    assert len(polylines[0].get('points').split()) == 2
+    assert polylines[0].get('stroke-dasharray') == '3,3'
+    # Powers of ten on both log axes
+    assert {'10', '100', '1000', '1'} <= set(texts)
+
+def test_line_chart_of_a_single_point():
+    svg = assets.line_chart_svg('t', 'x', 'y', {'only': [(5, 2.0)]})
+    assert not list(elements(svg, 'polyline'))
+    assert len(list(elements(svg, 'circle'))) == 1
+
+def test_badge_is_valid_svg():
+    svg = assets.badge_svg('Success Rate', '97.5%', '#B2FFB2', 0.5)
+    root = ET.fromstring(svg)
+    assert root.tag == SVG + 'svg'
+    assert [text.text for text in root.iter(SVG + 'text')].count('97.5%') == 2
+
+def write_stats(path, **counts):
+    path.write_text(json.dumps({'summary': dict({'WARN': 0}, **counts)}))
+
+def test_run_status_bar_spans_the_chart(tmp_path):
+    stats_file = tmp_path / 'run_stats.json'
+    write_stats(stats_file, PASS=90, ERROR=1, SKIP=9, TOTAL=100)
+    chart, badge = assets.generate_dbt_chart(str(tmp_path), stats_file=str(stats_file))
+    assert chart == str(tmp_path / 'dbt_run_status.svg') and badge == str(tmp_path / 'dbt_success_badge.svg')
+    root = ET.parse(chart).getroot()
+    bars = [rect for rect in root.iter(SVG + 'rect') if rect.get('height') == '60']
+    assert [bar.get('fill') for bar in bars] == ['#008000', '#FF0000', '#FFA500']
+    assert sum(float(bar.get('width')) for bar in bars) == pytest.approx(840, abs=0.2)
+    counts = [text.text for text in root.iter(SVG + 'text') if text.get('fill') == '#fff']
+    # The single error's 8px segment is too narrow for its count
+    assert counts == ['90', '9']
+    assert (tmp_path / 'dbt_success_badge.txt').read_text() == 'DBT Snowplow Web Success Rate: 90.0%'
+
+def test_run_status_falls_back_to_top_errors(tmp_path):
+    errors_file = tmp_path / 'top_errors.txt'
+    errors_file.write_text('PASS: 3 WARN: 0 ERROR: 1 SKIP: 0 TOTAL: 4\n')
+    chart, _ = assets.generate_dbt_chart(str(tmp_path), errors_file=str(errors_file),
+                                         stats_file=str(tmp_path / 'missing.json'))
+    bars = [rect for rect in ET.parse(chart).getroot().iter(SVG + 'rect') if rect.get('height') == '60']
+    assert [bar.get('fill') for bar in bars] == ['#008000', '#FF0000']
+    assert assets.generate_dbt_chart(str(tmp_path), errors_file=str(tmp_path / 'missing.txt')) == (None, None)
+
+def test_write_chart_converts_to_png_on_request(tmp_path, monkeypatch):
+    converted = []
+    monkeypatch.setattr(assets, 'svg_to_png', lambda svg_file, png_file: converted.append(svg_file) or png_file)
+    svg = assets.svg_document(10, 10, [])
+    assert assets.write_chart(svg, str(tmp_path), 'chart') == str(tmp_path / 'chart.svg')
+    assert assets.write_chart(svg, str(tmp_path), 'chart', png=True) == str(tmp_path / 'chart.png')
+    assert converted == [str(tmp_path / 'chart.svg')]
+
+def test_png_without_cairosvg_names_the_dependency(tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, 'cairosvg', None)
+    with pytest.raises(RuntimeError, match='cairosvg'):
+        assets.svg_to_png(str(tmp_path / 'chart.svg'), str(tmp_path / 'chart.png'))
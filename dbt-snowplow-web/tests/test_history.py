@@ -0,0 +1,19 @@
+import json
+
+from history import last_load_summary
+
+def test_last_load_summary_parses_the_run_records(tmp_path):
+    metrics_file = tmp_path / 'load_metrics.ndjson'
+    records = [
+        {'phase': 'run', 'label': 'first', 'rows_loaded': 1},
+        {'phase': 'script', 'statement': "SELECT '\"phase\": \"run\"'"},
+        {'phase': 'run', 'label': 'second', 'rows_loaded': 2},
+        {'phase': 'verify', 'expected': {'phase': 'run', 'rows_loaded': 2}},
+    ]
+    metrics_file.write_text('\n'.join(json.dumps(record) for record in records) + '\nnot json\n')
+    assert last_load_summary(metrics_file) == records[2]
+
+def test_last_load_summary_without_metrics(tmp_path):
+    assert last_load_summary(tmp_path / 'missing.ndjson') is None
+    (tmp_path / 'empty.ndjson').write_text('')
+    assert last_load_summary(tmp_path / 'empty.ndjson') is None
@@ -0,0 +1,65 @@
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+import gen_events
+from load_backends import DuckDBBackend
+from sql_statements import split_sql_statements
+
+LOAD_SQL = Path(__file__).resolve().parent.parent / 'load_events_data.sql'
+
+@pytest.fixture
+def backend(tmp_path):
+    return DuckDBBackend(':memory:', data_dir=str(tmp_path), container_dir='/app/data')
+
+def test_volume_and_database_statements_are_dropped(backend):
+    assert backend.translate("CREATE EXTERNAL VOLUME IF NOT EXISTS local\nSTORAGE_LOCATIONS = ((NAME = 'local'));") == []
+    assert backend.translate("use database embucket;") == []
+
+def test_use_schema(backend):
+    assert backend.translate("USE SCHEMA public_snowplow_manifest;") == ["USE public_snowplow_manifest"]
+
+def test_timestamp_ntz_becomes_timestamp(backend):
+    assert backend.translate("CREATE TABLE t (a timestamp_ntz, b TIMESTAMP_NTZ(9), c STRING);") == [
+        "CREATE TABLE t (a TIMESTAMP, b TIMESTAMP(9), c STRING);"]
+
+def test_local_path(backend, tmp_path):
+    assert backend.local_path('file:///app/data/events.csv') == str(tmp_path / 'events.csv')
+    assert backend.local_path('file:///app/database/events.csv') == '/app/database/events.csv'
+    assert backend.local_path('/elsewhere/events.csv') == '/elsewhere/events.csv'
+
+def test_copy_csv(backend, tmp_path):
+    statement = ("COPY INTO events\nFROM 'file:///app/data/events_today.csv'\nSTORAGE_INTEGRATION = local\n"
+                 "FILE_FORMAT = (TYPE = CSV, SKIP_HEADER = 1)\nON_ERROR = 'CONTINUE';")
+    path = str(tmp_path / 'events_today.csv')
+    assert backend.translate_copy(statement) == [
+        (path, f"COPY events FROM '{path}' (FORMAT CSV, HEADER true, IGNORE_ERRORS true)")]
+
+def test_copy_parquet_files(backend, tmp_path):
+    statement = ("COPY INTO events FROM 'file:///app/data/events_today' FILES = ('a.parquet', 'b.parquet') "
+                 "FILE_FORMAT = (TYPE = PARQUET);")
+    assert [path for path, _ in backend.translate_copy(statement)] == [
+        str(tmp_path / 'events_today' / 'a.parquet'), str(tmp_path / 'events_today' / 'b.parquet')]
+    assert all(sql.endswith("(FORMAT PARQUET)") for _, sql in backend.translate_copy(statement))
+
+def test_unsupported_copy(backend):
+    with pytest.raises(ValueError):
+        backend.translate_copy("COPY INTO events FROM @stage;")
+
+def test_load_script_runs_on_duckdb(backend, tmp_path):
+    pytest.importorskip('duckdb')
+    for name, day in (('events_yesterday.csv', date(2024, 1, 14)), ('events_today.csv', date(2024, 1, 15))):
+        with gen_events.open_event_csv(str(tmp_path / name)) as csvfile:
+            gen_events.write_shards(gen_events.iter_shards(gen_events.shard_tasks('python', day, 150, 1)), csvfile)
+
+    conn = backend.connect()
+    cursor = conn.cursor()
+    copied = []
+    for statement in split_sql_statements(LOAD_SQL.read_text()):
+        cursor.execute(statement)
+        if statement.upper().startswith('COPY INTO'):
+            copied.append(cursor.rowcount)
+    assert copied == [150, 150]
+    assert cursor.execute("SELECT COUNT(*) FROM events;").fetchone() == (300,)
+    conn.close()
@@ -0,0 +1,244 @@
+import pytest
+
+import load_events
+
+class FakeConnection:
+    """The async query API of the Snowflake connector over scripted query outcomes."""
+
+    def __init__(self, polls=None, poll_error=None, failing=()):
+        self.polls = polls or {}
+        self.poll_error = poll_error
+        self.failing = set(failing)
+        self.waited = []
+
+    def get_query_status_throw_if_error(self, query_id):
+        if self.poll_error is not None:
+            raise self.poll_error
+        if query_id in self.failing:
+            raise RuntimeError(f"{query_id} failed")
+        self.polls[query_id] = self.polls.get(query_id, 1) - 1
+        return 'RUNNING' if self.polls[query_id] >= 0 else 'SUCCESS'
+
+    def is_still_running(self, status):
+        return status == 'RUNNING'
+
+class FakeCursor:
+    def __init__(self, connection, reject=()):
+        self.connection = connection
+        self.reject = set(reject)
+        self.sfqid = None
+        self.rowcount = -1
+        self.submitted = []
+
+    def execute_async(self, statement):
+        if statement in self.reject:
+            raise RuntimeError('async not supported')
+        self.sfqid = f"q{len(self.submitted) + 1}"
+        self.submitted.append(statement)
+
+    def get_results_from_sfqid(self, query_id):
+        self.connection.waited.append(query_id)
+        if query_id in self.connection.failing:
+            raise RuntimeError(f"{query_id} failed")
+
+WAVE = [(1, 'INSERT INTO events VALUES (1);'), (2, 'INSERT INTO events VALUES (2);')]
+
+def test_wave_waits_for_every_statement():
+    conn = FakeConnection(polls={'q1': 3})
+    metrics = []
+    assert load_events._execute_wave_async(conn, FakeCursor(conn), WAVE, 2, metrics)
+    assert sorted(conn.waited) == ['q1', 'q2']
+    assert [m['status'] for m in metrics] == ['ok', 'ok']
+
+def test_rejected_first_submission_falls_back():
+    conn = FakeConnection()
+    cursor = FakeCursor(conn, reject=[WAVE[0][1]])
+    assert not load_events._execute_wave_async(conn, cursor, WAVE, 2)
+    assert cursor.submitted == []
+
+def test_poll_failure_waits_for_the_results():
+    conn = FakeConnection(poll_error=RuntimeError('status endpoint missing'))
+    assert load_events._execute_wave_async(conn, FakeCursor(conn), WAVE, 2)
+    assert sorted(conn.waited) == ['q1', 'q2']
+
+def test_failed_statement_fails_the_wave_after_it_finished():
+    conn = FakeConnection(polls={'q2': 2}, failing=['q1'])
+    metrics = []
+    with pytest.raises(RuntimeError, match='Statement'):
+        load_events._execute_wave_async(conn, FakeCursor(conn), WAVE, 2, metrics)
+    # The other statement of the wave was still awaited before the error
+    assert 'q2' in conn.waited
+    assert sorted(m['status'] for m in metrics) == ['error', 'ok']
+
+def test_generated_events_follow_the_profile_and_anomalies():
+    pytest.importorskip('pyarrow')
+    import gen_events
+    tables = []
+
+    def write_table(conn, table, table_name):
+        tables.append(table)
+        return table.num_rows
+
+    profile = gen_events.workload_profile('web', 1, users=3)
+    anomalies = gen_events.anomaly_settings(bot_share=1.0)
+    rows = load_events.load_generated_events(None, write_table, 200, seed=1, append=True, profile=profile,
+                                             anomalies=anomalies)
+    assert rows == sum(table.num_rows for table in tables) == 200
+    users = {user for table in tables for user in table.column('domain_userid').to_pylist()}
+    assert len(users) <= 3
+    assert all('Googlebot' in agent for table in tables for agent in table.column('useragent').to_pylist())
+
+def refuse(*args):
+    raise OSError('not supported here')
+
+def test_linked_file_is_staged_once_without_hashing(tmp_path, monkeypatch):
+    monkeypatch.setattr(load_events, '_file_sha256', refuse)
+    source = tmp_path / 'events.csv'
+    source.write_text('a,b\n1,2\n')
+    data_dir = tmp_path / 'datasets'
+    data_dir.mkdir()
+    manifest = {}
+    assert load_events.stage_file(str(source), 'events.csv', str(data_dir), manifest)
+    assert manifest['events.csv']['method'] == 'hardlink'
+    assert 'sha256' not in manifest['events.csv']
+    assert not load_events.stage_file(str(source), 'events.csv', str(data_dir), manifest)
+
+    source.unlink()
+    source.write_text('a,b\n3,4\n5,6\n')
+    assert load_events.stage_file(str(source), 'events.csv', str(data_dir), manifest)
+    assert (data_dir / 'events.csv').read_text() == 'a,b\n3,4\n5,6\n'
+
+def test_staging_falls_back_to_symlink_inside_the_data_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(load_events.os, 'link', refuse)
+    monkeypatch.setattr(load_events, '_reflink', refuse)
+    source = tmp_path / 'events.csv'
+    source.write_text('a,b\n1,2\n')
+    manifest = {}
+    assert load_events.stage_file(str(source), 'staged/events.csv', str(tmp_path), manifest)
+    assert manifest['staged/events.csv']['method'] == 'symlink'
+    assert (tmp_path / 'staged' / 'events.csv').is_symlink()
+    assert (tmp_path / 'staged' / 'events.csv').read_text() == 'a,b\n1,2\n'
+
+def test_copied_file_with_the_same_content_is_not_copied_again(tmp_path, monkeypatch):
+    monkeypatch.setattr(load_events.os, 'link', refuse)
+    monkeypatch.setattr(load_events, '_reflink', refuse)
+    source = tmp_path / 'source' / 'events.csv'
+    source.parent.mkdir()
+    source.write_text('a,b\n1,2\n')
+    data_dir = tmp_path / 'datasets'
+    data_dir.mkdir()
+    manifest = {}
+    assert load_events.stage_file(str(source), 'events.csv', str(data_dir), manifest)
+    assert manifest['events.csv']['method'] == 'copy'
+    assert not (data_dir / 'events.csv').is_symlink()
+
+    # Regenerated with the same rows: a new inode and mtime, but the hash matches
+    source.unlink()
+    source.write_text('a,b\n1,2\n')
+    monkeypatch.setattr(load_events, '_link_or_copy', refuse)
+    assert not load_events.stage_file(str(source), 'events.csv', str(data_dir), manifest)
+    assert manifest['events.csv']['signature'] == load_events._file_signature(str(source))
+
+def write_csv(path, rows):
+    path.write_text('event_id,app_id\n' + ''.join(f'e{i},app\n' for i in range(rows)))
+
+def test_split_keeps_rows_whole_and_reuses_chunks(tmp_path, monkeypatch):
+    source = tmp_path / 'events_today.csv'
+    write_csv(source, 101)
+    data_dir = tmp_path / 'datasets'
+    chunks = load_events.split_file_to_data_dir(str(source), 4, str(data_dir))
+    assert [name for name, _ in chunks] == [f'events_today.part-00{i}.csv' for i in range(4)]
+    assert sum(rows for _, rows in chunks) == 101
+    lines = []
+    for name, rows in chunks:
+        text = (data_dir / name).read_text()
+        assert text.startswith('event_id,app_id\n') and text.endswith('\n')
+        assert load_events.count_file_rows(str(data_dir / name)) == rows
+        lines += text.splitlines()[1:]
+    assert lines == source.read_text().splitlines()[1:]
+
+    monkeypatch.setattr(load_events, '_copy_rows', None)
+    assert load_events.split_file_to_data_dir(str(source), 4, str(data_dir)) == chunks
+
+def test_split_into_more_chunks_than_rows(tmp_path):
+    source = tmp_path / 'events.csv'
+    write_csv(source, 2)
+    chunks = load_events.split_file_to_data_dir(str(source), 5, str(tmp_path / 'datasets'))
+    assert sum(rows for _, rows in chunks) == 2
+    assert len(list((tmp_path / 'datasets').glob('events.part-*.csv'))) == len(chunks) <= 2
+
+class PoolBackend:
+    """Connections whose cursors record the statement and connection they ran on."""
+
+    def __init__(self):
+        self.opened = 0
+        self.executed = []
+
+    def connect(self):
+        backend = self
+        backend.opened += 1
+        connection = backend.opened
+
+        class Cursor:
+            def execute(self, statement):
+                if 'broken' in statement:
+                    raise RuntimeError('file not found')
+                backend.executed.append((connection, statement))
+
+            def fetchall(self):
+                return []
+
+            def close(self):
+                pass
+
+        class Connection:
+            def cursor(self):
+                return Cursor()
+
+            def close(self):
+                pass
+
+        return Connection()
+
+def test_parallel_copies_run_each_statement_once_over_the_pool():
+    backend = PoolBackend()
+    statements = [f"COPY INTO events FROM 'file:///app/data/part-{i}.csv';" for i in range(6)] + ['broken']
+    metrics = []
+    load_events.load_copies_in_parallel(backend, statements, 3, expected_rows={statements[0]: 10}, metrics=metrics)
+    assert backend.opened == 3
+    assert sorted(statement for _, statement in backend.executed) == sorted(statements[:6])
+    assert [record['rows'] for record in metrics if record['statement'] == statements[0]] == [10]
+    assert [record['error'] for record in metrics if record['error']] == ['file not found']
+
+def test_resolve_input_files(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for name in ('drops/2024-06-01/a.csv', 'drops/2024-06-01/notes.txt', 'drops/2024-06-02/b.parquet',
+                 'drops/2024-06-02/c.csv', 'dataset/date=2024-06-01/part-0.parquet', 'events.csv'):
+        (tmp_path / name).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / name).write_text('')
+
+    directories, files = load_events.resolve_input_files(['events.csv', 'dataset', 'drops/*/*'])
+    assert directories == ['dataset']
+    assert files == [('events.csv', 'events.csv'),
+                     ('drops/2024-06-01/a.csv', 'drops/2024-06-01/a.csv'),
+                     ('drops/2024-06-02/b.parquet', 'drops/2024-06-02/b.parquet'),
+                     ('drops/2024-06-02/c.csv', 'drops/2024-06-02/c.csv')]
+    _, files = load_events.resolve_input_files(['drops/**/*'], 'csv')
+    assert [name for _, name in files] == ['drops/2024-06-01/a.csv', 'drops/2024-06-02/c.csv']
+    assert load_events.resolve_input_files(['*.parquet']) == ([], [])
+
+def test_build_copy_statements_batches_files_per_format():
+    staged = ['a.csv', 'b.csv', 'c.csv', 'd.parquet']
+    single = load_events.build_copy_statements(staged)
+    assert len(single) == 4
+    assert single[0].startswith("COPY INTO events FROM 'file:///app/data/a.csv' ")
+    assert 'TYPE = PARQUET' in single[3] and 'SKIP_HEADER = 1' in single[0]
+
+    batched = load_events.build_copy_statements(staged, files_per_copy=2)
+    assert batched == [
+        load_events.copy_into_statement('file:///app/data/', 'csv', ['a.csv', 'b.csv']),
+        load_events.copy_into_statement('file:///app/data/', 'csv', ['c.csv']),
+        load_events.copy_into_statement('file:///app/data/', 'parquet', ['d.parquet']),
+    ]
+    assert "FILES = ('a.csv', 'b.csv')" in batched[0]
+    assert all('TYPE = PARQUET' in statement for statement in load_events.build_copy_statements(staged, 'parquet'))
@@ -0,0 +1,61 @@
+import json
+import sys
+
+import model_timings
+from generate_dbt_test_assets import generate_model_latency_chart
+from model_timings import compare_to_baseline
+
+def model(name, seconds, status='success'):
+    return {'name': name, 'status': status, 'execution_time': seconds}
+
+def test_compare_to_baseline_needs_both_thresholds():
+    models = [
+        model('slower', 3.0),           # +50%, +1.0s
+        model('jitter', 0.3),           # +200%, but only +0.2s
+        model('within', 2.4),           # +20%
+        model('errored', 9.0, 'error'),
+        model('new', 5.0),
+    ]
+    baseline = {'slower': 2.0, 'jitter': 0.1, 'within': 2.0, 'errored': 1.0}
+    regressions = compare_to_baseline(models, baseline, threshold=0.25, min_seconds=0.5)
+    assert [m['name'] for m in regressions] == ['slower']
+    assert [m['regressed'] for m in models] == [True, False, False, False, False]
+    assert [m['baseline_time'] for m in models] == [2.0, 0.1, 2.0, 1.0, None]
+
+def write_run_results(path, seconds):
+    results = [{'unique_id': 'model.snowplow_web.snowplow_web_sessions', 'status': 'success',
+                'execution_time': seconds, 'adapter_response': {'rows_affected': 10}},
+               {'unique_id': 'test.snowplow_web.not_null', 'status': 'pass', 'execution_time': 1.0}]
+    path.write_text(json.dumps({'results': results}))
+
+def run_main(monkeypatch, *argv):
+    monkeypatch.setattr(sys, 'argv', ['model_timings.py', *argv])
+    return model_timings.main()
+
+def test_main_keeps_timings_and_baseline_per_label(tmp_path, monkeypatch):
+    run_results = tmp_path / 'run_results.json'
+    write_run_results(run_results, 2.0)
+    common = ['--run-results', str(run_results), '--output-dir', str(tmp_path)]
+    assert run_main(monkeypatch, *common, '--label', 'full') == 0
+    write_run_results(run_results, 0.5)
+    assert run_main(monkeypatch, *common, '--label', 'incremental') == 0
+
+    full = json.loads((tmp_path / 'model_timings_full.json').read_text())
+    assert full['label'] == 'full'
+    assert [m['name'] for m in full['models']] == ['snowplow_web_sessions']
+    assert json.loads((tmp_path / 'model_timings_baseline_full.json').read_text()) == {'snowplow_web_sessions': 2.0}
+    assert json.loads((tmp_path / 'model_timings_baseline_incremental.json').read_text()) == {'snowplow_web_sessions': 0.5}
+
+    write_run_results(run_results, 4.0)
+    assert run_main(monkeypatch, *common, '--label', 'full', '--fail-on-regression') == 1
+    assert json.loads((tmp_path / 'model_timings_baseline_full.json').read_text()) == {'snowplow_web_sessions': 2.0}
+
+def test_latency_chart_is_written_per_label(tmp_path):
+    for label, seconds in (('full', 2.0), ('incremental', 0.5)):
+        timings_file = tmp_path / f'model_timings_{label}.json'
+        models = [dict(model('snowplow_web_sessions', seconds), baseline_time=1.0, regressed=label == 'full')]
+        timings_file.write_text(json.dumps({'label': label, 'models': models}))
+        path = generate_model_latency_chart(output_dir=str(tmp_path), timings_file=str(timings_file))
+        assert path == str(tmp_path / f'dbt_model_latency_{label}.svg')
+    assert 'execution time (full)' in (tmp_path / 'dbt_model_latency_full.svg').read_text()
+    assert 'execution time (incremental)' in (tmp_path / 'dbt_model_latency_incremental.svg').read_text()
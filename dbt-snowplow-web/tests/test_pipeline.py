@@ -0,0 +1,76 @@
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+import pipeline
+
+@pytest.fixture
+def runner(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline, 'CACHE_FILE', tmp_path / '.pipeline_cache.json')
+    return pipeline.Pipeline(pipeline.parse_args(['--no-venv']))
+
+def test_content_hash_of_values_files_and_directories(tmp_path):
+    directory = tmp_path / 'seeds'
+    (directory / 'nested').mkdir(parents=True)
+    (directory / 'nested' / 'a.csv').write_text('a')
+    key = pipeline.content_hash(directory, 'value', 1)
+
+    assert pipeline.content_hash(directory, 'value', 1) == key
+    assert pipeline.content_hash(directory, 'value', 2) != key
+    (directory / 'nested' / 'a.csv').write_text('b')
+    assert pipeline.content_hash(directory, 'value', 1) != key
+    # A missing path and its creation hash differently
+    missing = pipeline.content_hash(tmp_path / 'packages.yml')
+    (tmp_path / 'packages.yml').write_text('')
+    assert pipeline.content_hash(tmp_path / 'packages.yml') != missing
+    # A value never hashes like a path of the same name
+    assert pipeline.content_hash(str(tmp_path / 'packages.yml')) != pipeline.content_hash(tmp_path / 'packages.yml')
+
+def test_stage_is_skipped_while_its_key_and_outputs_hold(runner, tmp_path):
+    calls = []
+    output = tmp_path / 'events.csv'
+    action = lambda: (calls.append(1), output.write_text('x'))
+
+    runner.stage('generate', 'key', [output], action)
+    runner.stage('generate', 'key', [output], action)
+    assert len(calls) == 1
+    assert [timing['cached'] for timing in runner.timings] == [False, True]
+    # The key survives in the cache file
+    assert pipeline.load_cache() == {'generate': 'key'}
+
+    runner.stage('generate', 'other key', [output], action)
+    output.unlink()
+    runner.stage('generate', 'other key', [output], action)
+    runner.force.add('generate')
+    runner.stage('generate', 'other key', [output], action)
+    runner.stage('report', action=action)
+    assert len(calls) == 5
+
+def test_invalidate(runner):
+    runner.stage('load', 'key', action=lambda: None)
+    runner.invalidate('load')
+    assert pipeline.load_cache() == {}
+
+def test_generate_key_changes_with_the_day(runner, monkeypatch):
+    keys = []
+    monkeypatch.setattr(runner, 'stage', lambda name, key, outputs, action: keys.append(key))
+
+    class Day(date):
+        today_value = date(2024, 1, 15)
+
+        @classmethod
+        def today(cls):
+            return cls.today_value
+
+    monkeypatch.setattr(pipeline, 'date', Day)
+    runner.generate()
+    runner.generate()
+    Day.today_value = date(2024, 1, 16)
+    runner.generate()
+    assert keys[0] == keys[1] != keys[2]
+
+def test_workload_label():
+    assert pipeline.workload_label('full', pipeline.parse_args([])) == 'full'
+    args = pipeline.parse_args(['--profile', 'web', '--bot-share', '0.1', '--late-share', '0.05'])
+    assert pipeline.workload_label('incremental', args) == 'incremental-web-late0.05-bot0.1'
@@ -0,0 +1,86 @@
+import json
+
+import pytest
+
+import query_profile
+
+def comment(node_id):
+    return '/* ' + json.dumps({'app': 'dbt', 'node_id': node_id}) + ' */'
+
+def log_lines(invocation_id, statements):
+    """dbt JSON log events: one SQLQuery and one SQLQueryStatus per (connection, node, sql, seconds, status)."""
+    lines = []
+    for connection, node_id, sql, seconds, status in statements:
+        info = {'invocation_id': invocation_id}
+        node_info = {'unique_id': node_id}
+        lines.append({'info': dict(info, name='SQLQuery'),
+                      'data': {'conn_name': connection, 'sql': sql, 'node_info': node_info}})
+        lines.append({'info': dict(info, name='SQLQueryStatus'),
+                      'data': {'conn_name': connection, 'status': status, 'elapsed': seconds,
+                               'query_id': f"{invocation_id}-{len(lines)}", 'node_info': node_info}})
+    return [json.dumps(line) for line in lines]
+
+def test_statement_helpers():
+    sql = comment('model.snowplow_web.page_views') + '\ncreate or replace  table x as\nselect 1'
+    assert query_profile.node_of(sql) == 'model.snowplow_web.page_views'
+    assert query_profile.node_of('select 1') is None
+    assert query_profile.statement_text(sql) == 'create or replace table x as select 1'
+    assert query_profile.statement_kind(sql) == 'create or replace'
+    assert query_profile.statement_kind('merge into x using y') == 'merge'
+    assert query_profile.statement_kind('drop table x') == 'drop table'
+
+def test_read_dbt_log_reads_the_last_invocation(tmp_path):
+    sessions = 'model.snowplow_web.sessions'
+    log_file = tmp_path / 'dbt.log'
+    lines = log_lines('first', [('a', sessions, 'select 0', 9.0, 'SUCCESS 1')])
+    lines.append('12:00:00 a plain text line')
+    # Two connections interleave: the status pairs with the statement of its own connection
+    second = log_lines('second', [('a', sessions, comment(sessions) + ' merge into s', 1.5, 'SUCCESS 1200'),
+                                  ('b', 'model.snowplow_web.users', 'select 2', 0.25, 'OK')])
+    lines += [second[0], second[2], second[3], second[1]]
+    log_file.write_text('\n'.join(lines) + '\n')
+
+    statements = query_profile.read_dbt_log(log_file)
+    assert [(s['node_id'], s['seconds'], s['rows'], s['status']) for s in statements] == [
+        ('model.snowplow_web.users', 0.25, None, 'OK'), (sessions, 1.5, 1200, 'SUCCESS')]
+    assert [s['seconds'] for s in query_profile.read_dbt_log(log_file, 'first')] == [9.0]
+
+def test_hotspots_rank_models_and_statements():
+    def statement(node_id, seconds, sql='select 1', rows=None, bytes_scanned=None):
+        return {'node_id': node_id, 'query_id': None, 'sql': sql, 'seconds': seconds, 'rows': rows,
+                'bytes_scanned': bytes_scanned, 'status': 'SUCCESS'}
+
+    statements = [
+        statement('model.snowplow_web.sessions', 2.0, 'merge into s', rows=10, bytes_scanned=100),
+        statement('model.snowplow_web.sessions', 3.0, 'create or replace table t', rows=5),
+        statement('model.snowplow_web.sessions', None),
+        statement('model.snowplow_web.users', 4.0),
+        statement('test.snowplow_web.not_null', 50.0),
+        statement(None, 60.0),
+    ]
+    report = query_profile.hotspots(statements, top=2)
+    assert [(model['model'], model['seconds'], model['statements']) for model in report] == [
+        ('sessions', 5.0, 3), ('users', 4.0, 1)]
+    sessions = report[0]
+    assert sessions['rows'] == 15
+    assert sessions['bytes_scanned'] == 100
+    assert [(s['kind'], s['seconds']) for s in sessions['slowest']] == [('create or replace', 3.0), ('merge', 2.0)]
+    assert report[1]['bytes_scanned'] is None
+
+def test_attribute_fills_in_nodes_by_query_id():
+    history = [{'query_id': 'q1', 'node_id': None}, {'query_id': 'q2', 'node_id': 'model.snowplow_web.kept'}]
+    logged = [{'query_id': 'q1', 'node_id': 'model.snowplow_web.sessions'}, {'query_id': None, 'node_id': 'x'}]
+    assert [s['node_id'] for s in query_profile.attribute(history, logged)] == [
+        'model.snowplow_web.sessions', 'model.snowplow_web.kept']
+
+def test_read_query_history():
+    duckdb = pytest.importorskip('duckdb')
+    conn = duckdb.connect(':memory:')
+    conn.execute("CREATE TABLE history (query_id TEXT, query_text TEXT, total_elapsed_time INT, rows_produced INT, "
+                 "bytes_scanned INT, execution_status TEXT, query_tag TEXT)")
+    conn.execute("INSERT INTO history VALUES (?, ?, 1500, 7, 2048, 'SUCCESS', 'run_1'), "
+                 "('q2', 'select 2', 10, 1, 0, 'SUCCESS', 'run_2')",
+                 ['q1', comment('model.snowplow_web.sessions') + ' select 1'])
+    statements = query_profile.read_query_history(conn, 'run_1', "SELECT * FROM history WHERE query_tag = '{tag}'")
+    assert [(s['node_id'], s['seconds'], s['rows'], s['bytes_scanned']) for s in statements] == [
+        ('model.snowplow_web.sessions', 1.5, 7, 2048)]
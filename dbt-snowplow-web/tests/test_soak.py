@@ -0,0 +1,33 @@
+import pytest
+
+from soak import _slope, latency_trend
+
+def cycle(number, run, models=None):
+    return {'cycle': number, 'run': run, 'models': models or {}}
+
+def test_slope():
+    assert _slope([(0, 1.0), (1, 3.0), (2, 5.0)]) == pytest.approx(2.0)
+    assert _slope([(1, 1.0)]) is None
+    assert _slope([(1, 1.0), (1, 2.0)]) is None
+
+def test_trend_leaves_out_the_first_cycle():
+    results = [cycle(0, 100.0)] + [cycle(number, 10.0 + number) for number in range(1, 9)]
+    trend = latency_trend(results)
+    assert trend['first'] == 11.0
+    assert trend['last'] == 18.0
+    assert trend['slope'] == pytest.approx(1.0)
+    # Mean of cycles 7-8 over the mean of cycles 1-2
+    assert trend['ratio'] == pytest.approx(17.5 / 11.5)
+
+def test_trend_of_one_model():
+    results = [cycle(number, 1.0, {'page_views': {'execution_time': seconds}})
+               for number, seconds in enumerate([9.0, 2.0, 2.0, None, 2.0])]
+    results[3]['models'] = {}
+    trend = latency_trend(results, 'page_views')
+    assert trend['ratio'] == pytest.approx(1.0)
+    assert trend['slope'] == pytest.approx(0.0)
+    assert latency_trend(results, 'sessions') is None
+
+def test_trend_without_incremental_cycles():
+    assert latency_trend([cycle(0, 5.0)]) is None
+    assert latency_trend([cycle(0, 5.0), cycle(1, 0.0)])['ratio'] is None
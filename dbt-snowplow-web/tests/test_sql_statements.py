@@ -0,0 +1,50 @@
+from sql_statements import CHANGE, DDL, LOAD, QUERY, classify_statement, plan_waves, split_sql_statements
+
+def test_split_on_semicolons():
+    assert split_sql_statements("SELECT 1; SELECT 2;\nSELECT 3") == ['SELECT 1;', 'SELECT 2;', 'SELECT 3;']
+
+def test_semicolons_inside_quotes_do_not_split():
+    sql = "INSERT INTO t VALUES ('a;b', 'it''s; fine'); SELECT \"odd;name\" FROM t;"
+    assert split_sql_statements(sql) == ["INSERT INTO t VALUES ('a;b', 'it''s; fine');",
+                                         'SELECT "odd;name" FROM t;']
+
+def test_backslash_escaped_quote():
+    assert split_sql_statements(r"SELECT 'a\';b'; SELECT 2;") == [r"SELECT 'a\';b';", 'SELECT 2;']
+
+def test_dollar_quoted_block_is_kept_whole():
+    sql = "CREATE FUNCTION f() AS $$ SELECT 1; SELECT 2; $$; SELECT 3;"
+    assert split_sql_statements(sql) == ["CREATE FUNCTION f() AS $$ SELECT 1; SELECT 2; $$;", 'SELECT 3;']
+
+def test_comments_are_dropped():
+    sql = "-- leading; comment\nSELECT 1 /* inline; */ + 2;\n-- trailing"
+    assert split_sql_statements(sql) == ['SELECT 1   + 2;']
+
+def test_multi_line_statement_keeps_line_breaks():
+    assert split_sql_statements("CREATE TABLE t (\n  a INT\n);") == ['CREATE TABLE t (\n  a INT\n);']
+
+def test_empty_statements_are_skipped():
+    assert split_sql_statements(";;\n ; SELECT 1;;") == ['SELECT 1;']
+
+def test_classify_statement():
+    assert classify_statement("COPY INTO events FROM 'file:///x';") == LOAD
+    assert classify_statement("  insert into t values (1);") == LOAD
+    assert classify_statement("(SELECT 1);") == QUERY
+    assert classify_statement("WITH a AS (SELECT 1) SELECT * FROM a;") == QUERY
+    assert classify_statement("DELETE FROM events WHERE 1 = 1;") == CHANGE
+    assert classify_statement("MERGE INTO t USING s ON t.a = s.a WHEN MATCHED THEN DELETE;") == CHANGE
+    assert classify_statement("CREATE TABLE t (a INT);") == DDL
+    assert classify_statement("USE SCHEMA s;") == DDL
+    assert classify_statement("") == DDL
+
+def test_plan_waves_groups_consecutive_loads_and_queries():
+    statements = ['CREATE TABLE a (x INT);', 'INSERT INTO a VALUES (1);', 'INSERT INTO a VALUES (2);',
+                  'SELECT * FROM a;', 'SELECT 1;', 'DROP TABLE a;', 'DROP TABLE b;', 'INSERT INTO c VALUES (1);']
+    waves = plan_waves(statements)
+    assert [(kind, [position for position, _ in wave]) for kind, wave in waves] == [
+        (DDL, [1]), (LOAD, [2, 3]), (QUERY, [4, 5]), (DDL, [6]), (DDL, [7]), (LOAD, [8])]
+
+def test_changes_are_barriers():
+    statements = ['INSERT INTO events VALUES (1);', 'DELETE FROM events WHERE a = 1;', 'INSERT INTO events VALUES (2);',
+                  'UPDATE events SET a = 2;', 'UPDATE events SET a = 3;']
+    assert [(kind, [position for position, _ in wave]) for kind, wave in plan_waves(statements)] == [
+        (LOAD, [1]), (CHANGE, [2]), (LOAD, [3]), (CHANGE, [4]), (CHANGE, [5])]
@@ -0,0 +1,77 @@
+import pytest
+
+import warehouse
+from load_backends import DuckDBBackend
+
+class FlakyBackend:
+    """Refuses the first connections like a warehouse that is still starting."""
+
+    label = 'Flaky'
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.probes = 0
+
+    def connect(self):
+        self.probes += 1
+        if self.probes <= self.failures:
+            raise ConnectionError('connection refused')
+        return DuckDBBackend(':memory:').connect()
+
+class FakeClock:
+    """Stands in for the time module; sleeping advances the clock instead of waiting."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def perf_counter(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+def test_wait_backs_off_exponentially(monkeypatch):
+    pytest.importorskip('duckdb')
+    clock = FakeClock()
+    monkeypatch.setattr(warehouse, 'time', clock)
+    backend = FlakyBackend(failures=5)
+    assert warehouse.wait_until_ready(backend, initial_delay=0.005, max_delay=0.04) == pytest.approx(0.115)
+    assert backend.probes == 6
+    assert clock.sleeps == [0.005, 0.01, 0.02, 0.04, 0.04]
+
+def test_wait_gives_up_at_the_timeout(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(warehouse, 'time', clock)
+    backend = FlakyBackend(failures=100)
+    assert warehouse.wait_until_ready(backend, timeout=10, initial_delay=1, max_delay=1) is None
+    assert backend.probes == 11
+    assert clock.now == 10
+
+@pytest.fixture
+def conn():
+    pytest.importorskip('duckdb')
+    conn = DuckDBBackend(':memory:').connect()
+    cursor = conn.cursor()
+    for statement in ("CREATE SCHEMA public_derived",
+                      "CREATE TABLE public_snowplow_manifest.events (id INT)",
+                      "INSERT INTO public_snowplow_manifest.events VALUES (1), (2), (3)",
+                      "CREATE TABLE public_snowplow_manifest.snowplow_web_dim_rfc_5646_language_mapping (id INT)",
+                      "CREATE TABLE public_derived.snowplow_web_sessions (id INT)",
+                      "CREATE VIEW public_derived.snowplow_web_sessions_this_run AS SELECT * FROM public_derived.snowplow_web_sessions"):
+        cursor.execute(statement)
+    cursor.close()
+    return conn
+
+def test_table_row_counts_skip_views(conn):
+    assert warehouse.table_row_counts(conn) == {
+        'public_derived.snowplow_web_sessions': 0,
+        'public_snowplow_manifest.events': 3,
+        'public_snowplow_manifest.snowplow_web_dim_rfc_5646_language_mapping': 0,
+    }
+
+def test_reset_keeps_the_seeds(conn):
+    assert warehouse.reset_schemas(conn) == 3
+    assert warehouse.table_row_counts(conn) == {
+        'public_snowplow_manifest.snowplow_web_dim_rfc_5646_language_mapping': 0}
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Readiness probe and warm reset for the Embucket warehouse.
+
+`wait` returns as soon as `SELECT 1` succeeds through the Snowflake connector,
+polling with exponential backoff from a few milliseconds. `reset` empties the
+schemas a dbt-snowplow-web run writes to, so a running container can be reused
+for the next benchmark iteration instead of being rebuilt from scratch. `counts`
+reports the row count of every table in those schemas.
+"""
+
+import sys
+import json
+import time
+import argparse
+
+from load_backends import EmbucketBackend
+from load_events import get_connection_config
+
+# Schemas dbt-snowplow-web writes to with the `public` target schema; the events
+# table and the incremental manifests live in public_snowplow_manifest
+RESET_SCHEMAS = ['public_snowplow_manifest', 'public_derived', 'public_scratch']
+
+# Seed tables survive a reset, so dbt seed does not have to run again
+KEEP_PREFIXES = ['snowplow_web_dim_']
+
+def probe(backend):
+    """
+    Run SELECT 1 once.
+
+    Returns:
+        bool: True when the warehouse answered
+    """
+    try:
+        conn = backend.connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            return cursor.fetchone() is not None
+        finally:
+            conn.close()
+    except Exception:
+        return False
+
+def wait_until_ready(backend, timeout=300, initial_delay=0.005, max_delay=2.0):
+    """
+    Wait until the warehouse runs SQL, backing off exponentially between probes.
+
+    Returns:
+        float: Seconds until the warehouse was ready, or None on timeout
+    """
+    start = time.perf_counter()
+    delay = initial_delay
+    attempts = 0
+    while True:
+        attempts += 1
+        if probe(backend):
+            elapsed = time.perf_counter() - start
+            print(f"✓ {backend.label} is ready after {elapsed:.3f}s ({attempts} probe(s))")
+            return elapsed
+        elapsed = time.perf_counter() - start
+        if elapsed + delay > timeout:
+            print(f"❌ {backend.label} did not answer SELECT 1 within {timeout}s ({attempts} probes)")
+            return None
+        time.sleep(delay)
+        delay = min(delay * 2, max_delay)
+
+def reset_schemas(conn, schemas=RESET_SCHEMAS, keep_prefixes=KEEP_PREFIXES):
+    """
+    Drop every table and view in the given schemas, except the kept seed tables.
+
+    Missing schemas are skipped; the next load and dbt run recreate what they need.
+
+    Returns:
+        int: Number of objects dropped
+    """
+    cursor = conn.cursor()
+    dropped = 0
+    for schema in schemas:
+        try:
+            cursor.execute(
+                "SELECT table_name, table_type FROM information_schema.tables "
+                f"WHERE LOWER(table_schema) = LOWER('{schema}')"
+            )
+            objects = cursor.fetchall()
+        except Exception as e:
+            print(f"⚠ Warning listing {schema}: {e}")
+            continue
+
+        for name, table_type in objects:
+            if any(name.lower().startswith(prefix) for prefix in keep_prefixes):
+                continue
+            kind = 'VIEW' if 'VIEW' in str(table_type).upper() else 'TABLE'
+            try:
+                cursor.execute(f"DROP {kind} IF EXISTS {schema}.{name}")
+                dropped += 1
+            except Exception as e:
+                print(f"⚠ Warning dropping {schema}.{name}: {e}")
+        print(f"✓ Reset {schema}")
+    cursor.close()
+    return dropped
+
+def table_row_counts(conn, schemas=RESET_SCHEMAS):
+    """
+    Count the rows of every table in the given schemas.
+
+    Returns:
+        dict: schema.table -> number of rows
+    """
+    cursor = conn.cursor()
+    counts = {}
+    for schema in schemas:
+        try:
+            cursor.execute(
+                "SELECT table_name FROM information_schema.tables "
+                f"WHERE LOWER(table_schema) = LOWER('{schema}') AND table_type NOT LIKE '%VIEW%'"
+            )
+            names = [row[0] for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"⚠ Warning listing {schema}: {e}")
+            continue
+
+        for name in sorted(names):
+            try:
+                cursor.execute(f"SELECT COUNT(*) FROM {schema}.{name}")
+                counts[f"{schema}.{name}".lower()] = cursor.fetchone()[0]
+            except Exception as e:
+                print(f"⚠ Warning counting {schema}.{name}: {e}")
+    cursor.close()
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description='Readiness probe, warm reset and table row counts for Embucket')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    wait_parser = subparsers.add_parser('wait', help='Wait until SELECT 1 succeeds')
+    wait_parser.add_argument('--timeout', type=float, default=300, help='Seconds to wait at most (default: 300)')
+    reset_parser = subparsers.add_parser('reset', help='Empty the schemas a dbt run writes to, keeping the seeds')
+    reset_parser.add_argument('--schemas', nargs='+', default=RESET_SCHEMAS,
+                              help=f"Schemas to empty (default: {' '.join(RESET_SCHEMAS)})")
+    reset_parser.add_argument('--keep', nargs='*', default=KEEP_PREFIXES,
+                              help=f"Table name prefixes to keep (default: {' '.join(KEEP_PREFIXES)})")
+    counts_parser = subparsers.add_parser('counts', help='Count the rows of every table a dbt run writes to')
+    counts_parser.add_argument('--schemas', nargs='+', default=RESET_SCHEMAS,
+                               help=f"Schemas to count (default: {' '.join(RESET_SCHEMAS)})")
+    counts_parser.add_argument('--output', default=None, help='Write the counts as JSON to this file')
+    args = parser.parse_args()
+
+    if args.command == 'wait':
+        # Fail fast per probe instead of the connector's long login retries
+        backend = EmbucketBackend(dict(get_connection_config(), login_timeout=5, network_timeout=5))
+        sys.exit(0 if wait_until_ready(backend, args.timeout) is not None else 1)
+
+    if args.command == 'counts':
+        conn = EmbucketBackend(get_connection_config()).connect()
+        counts = table_row_counts(conn, args.schemas)
+        conn.close()
+        for name, rows in counts.items():
+            print(f"{name:<70} {rows:>12,}")
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(counts, f, indent=2)
+        return
+
+    start = time.perf_counter()
+    conn = EmbucketBackend(get_connection_config()).connect()
+    dropped = reset_schemas(conn, args.schemas, args.keep)
+    conn.close()
+    print(f"✓ Dropped {dropped} objects in {time.perf_counter() - start:.2f}s")
+
+if __name__ == "__main__":
+    main()